@@ -0,0 +1,316 @@
+"""
+ActionLog - an append-only record of the shots and guesses of a game, compact enough to keep for
+every game played and complete enough to rebuild the game from (see BlackBoxGame.replay).
+
+A log is a string of unsigned LEB128 varints: the format version, the board size, the number of
+atoms, the game's seed plus one and the interior layout mask plus one (either 0 when absent - the
+layout is only recorded when the atoms were placed by hand rather than drawn from the seed), then
+one varint per action of (row * size + column) * 2 + SHOT or GUESS - a byte or two per action on a
+ten by ten board.
+
+Archives are files of logs, each preceded by its length as a varint, so games can be appended to
+them as they finish:
+
+    python ActionLog.py games.bbl
+"""
+import time
+
+VERSION = 1
+
+# the kinds of action recorded
+SHOT = 0
+GUESS = 1
+
+
+# maps a varint byte to its seven bits of value, and to 1 if another byte follows it and 0 if not
+_VALUE_BITS = bytes(byte & 0x7F for byte in range(256))
+_CONTINUES = bytes(byte >> 7 for byte in range(256))
+
+# varints of more bytes than this (the layout of a large board) are converted seven bytes at a
+# time - shifting the whole int once for every byte would take time quadratic in its length
+_SHORT_VARINT = 9
+
+
+def write_varint(buffer, value):
+    """
+    write_varint - appends an unsigned LEB128 varint to a bytearray
+    """
+    if value < 0:
+        raise ValueError(f"cannot record {value} - values must not be negative")
+
+    if value.bit_length() > 7 * _SHORT_VARINT:
+        data = value.to_bytes((value.bit_length() + 55) // 56 * 7, "little")
+        groups = bytearray()
+        for start in range(0, len(data), 7):
+            chunk = int.from_bytes(data[start:start + 7], "little")
+            for _ in range(8):
+                groups.append(0x80 | (chunk & 0x7F))
+                chunk >>= 7
+        # the groups above the highest bit set are dropped
+        while groups[-1] == 0x80:
+            groups.pop()
+        groups[-1] &= 0x7F
+        buffer += groups
+        return
+
+    while value > 0x7F:
+        buffer.append(0x80 | (value & 0x7F))
+        value >>= 7
+    buffer.append(value)
+
+
+def read_varint(data, offset):
+    """
+    read_varint - reads an unsigned LEB128 varint from data at offset
+
+    :return: (value, offset just after it)
+    :rtype: tuple(int, int)
+    """
+    value = 0
+    shift = 0
+    for _ in range(_SHORT_VARINT):
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+    end = bytes(data[offset:]).translate(_CONTINUES).find(0)
+    if end == -1:
+        raise IndexError("the varint runs past the end of the data")
+    groups = bytes(data[offset - _SHORT_VARINT:offset + end + 1]).translate(_VALUE_BITS)
+
+    chunks = bytearray()
+    for start in range(0, len(groups), 8):
+        chunk = 0
+        for group in reversed(groups[start:start + 8]):
+            chunk = chunk << 7 | group
+        chunks += chunk.to_bytes(7, "little")
+
+    return int.from_bytes(chunks, "little"), offset + end + 1
+
+
+def varint_length(value):
+    """
+    varint_length - returns the number of bytes write_varint writes a value in
+    """
+    return max(1, (value.bit_length() + 6) // 7)
+
+
+def log_length(size, action_count):
+    """
+    log_length - returns the most bytes the log of a game on a board of a size can take with a
+    number of actions - the longest seed and a layout included
+    """
+    cells = (size - 2) * (size - 2)
+
+    return (varint_length(VERSION) + varint_length(size) + varint_length(cells) + varint_length(2 ** 63)
+            + varint_length(2 ** cells) + action_count * varint_length(size * size * 2))
+
+
+class ActionLog():
+    """
+    ActionLog - the log of one game: how its board was made and every action taken on it
+    """
+    def __init__(self, size, atom_count, seed=None, layout=None):
+        """
+        __init__ - starts the log of a new game
+
+        :param size: the number of rows (and columns) of the board
+        :type size: int
+        :param atom_count: the number of atoms on the board
+        :type atom_count: int
+        :param seed: the seed the game's layout and ray colors were drawn from
+        :type seed: int
+        :param layout: the interior layout mask (see Layouts) when the atoms were placed by hand
+        :type layout: int
+        """
+        self._size = size
+        self._atom_count = atom_count
+        self._seed = seed
+        self._layout = layout
+
+        self._data = bytearray()
+        write_varint(self._data, VERSION)
+        write_varint(self._data, size)
+        write_varint(self._data, atom_count)
+        write_varint(self._data, 0 if seed is None else seed + 1)
+        write_varint(self._data, 0 if layout is None else layout + 1)
+        self._header_length = len(self._data)
+        self._action_count = 0
+
+    @classmethod
+    def from_bytes(cls, data):
+        """
+        from_bytes - reads a log written by to_bytes
+
+        :rtype: Object(ActionLog)
+        """
+        version, offset = read_varint(data, 0)
+        if version != VERSION:
+            raise ValueError(f"not a version {VERSION} action log")
+
+        size, offset = read_varint(data, offset)
+        atom_count, offset = read_varint(data, offset)
+        seed, offset = read_varint(data, offset)
+        layout, offset = read_varint(data, offset)
+
+        log = cls(size, atom_count, seed - 1 if seed else None, layout - 1 if layout else None)
+        log._data += data[offset:]
+        while offset < len(data):
+            _, offset = read_varint(data, offset)
+            log._action_count += 1
+
+        return log
+
+    def to_bytes(self):
+        return bytes(self._data)
+
+    def copy(self):
+        """
+        copy - returns an independent copy of the log, for a cloned game
+        """
+        log = ActionLog.__new__(ActionLog)
+        log.__dict__.update(self.__dict__)
+        log._data = bytearray(self._data)
+
+        return log
+
+    def get_size(self):
+        return self._size
+
+    def get_atom_count(self):
+        return self._atom_count
+
+    def get_seed(self):
+        return self._seed
+
+    def get_layout(self):
+        return self._layout
+
+    def set_layout(self, atom_count, layout):
+        """
+        set_layout - records the atoms as placed by hand, after they have been added or removed
+        (see Editor), keeping the actions already recorded
+
+        :param atom_count: the number of atoms now on the board
+        :type atom_count: int
+        :param layout: the interior layout mask (see Layouts) of those atoms
+        :type layout: int
+        """
+        header = bytearray()
+        write_varint(header, VERSION)
+        write_varint(header, self._size)
+        write_varint(header, atom_count)
+        write_varint(header, 0 if self._seed is None else self._seed + 1)
+        write_varint(header, layout + 1)
+
+        self._data[:self._header_length] = header
+        self._header_length = len(header)
+        self._atom_count = atom_count
+        self._layout = layout
+
+    def __len__(self):
+        """
+        __len__ - returns the number of actions recorded
+        """
+        return self._action_count
+
+    def record(self, kind, row, column):
+        """
+        record - appends an action to the log
+
+        :param kind: SHOT or GUESS
+        :type kind: int
+        """
+        write_varint(self._data, (row * self._size + column) * 2 + kind)
+        self._action_count += 1
+
+    def get_end(self):
+        """
+        get_end - returns the position in the actions after the last one recorded, from which
+        actions reads only those recorded later
+
+        :rtype: int
+        """
+        return len(self._data) - self._header_length
+
+    def actions(self, start=0):
+        """
+        actions - returns the actions recorded, in order
+
+        :param start: the position in the actions to read from - the first action if 0, or a
+                      position from get_end (which set_layout leaves in place)
+        :type start: int
+        :return: generator of (kind, row, column)
+        :rtype: generator[tuple(int, int, int)]
+        """
+        data = self._data
+        offset = self._header_length + start
+        while offset < len(data):
+            value, offset = read_varint(data, offset)
+            row, column = divmod(value >> 1, self._size)
+            yield (value & 1, row, column)
+
+
+def append(path, log):
+    """
+    append - appends a finished game's log to an archive file
+    """
+    record = bytearray()
+    data = log.to_bytes()
+    write_varint(record, len(data))
+    record += data
+
+    with open(path, "ab") as archive:
+        archive.write(record)
+
+
+def read_archive(path):
+    """
+    read_archive - returns every log in an archive file, in the order they were appended
+
+    :return: generator of logs
+    :rtype: generator[Object(ActionLog)]
+    """
+    with open(path, "rb") as archive:
+        data = archive.read()
+
+    offset = 0
+    while offset < len(data):
+        length, offset = read_varint(data, offset)
+        yield ActionLog.from_bytes(data[offset:offset + length])
+        offset += length
+
+
+def main(argv=None):
+    # imported here so that games, which log every action, do not pay for it when starting up
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Replay every game in an archive of action logs.")
+    parser.add_argument("archive", help="file of action logs")
+    args = parser.parse_args(argv)
+
+    import BlackBoxGame_Controller as BlackBoxGame
+
+    started = time.perf_counter()
+    games = 0
+    actions = 0
+    total_score = 0
+    won = 0
+    for log in read_archive(args.archive):
+        game = BlackBoxGame.BlackBoxGame.replay(log)
+        games += 1
+        actions += len(log)
+        total_score += game.get_score()
+        won += game.atoms_left() == 0 and game.get_score() > 0
+    elapsed = time.perf_counter() - started
+
+    print(f"replayed {games} games ({actions} actions) in {elapsed:.2f}s")
+    if games:
+        print(f"mean final score {total_score / games:.2f}, won {won / games:.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""
+BatchTracer - traces every edge ray across a whole stack of boards at once with NumPy.
+
+The rules are those of Tracer.trace (and so of BlackBoxGame.move_ray and
+Ray.recalculate_trajectory), but instead of walking one ray at a time every ray
+of every board is advanced a step per iteration with array operations. Rays
+which have finished are dropped from the working arrays so each iteration only
+costs as much as the rays still travelling.
+"""
+import numpy as np
+
+import Tracer
+
+# outcome codes of the arrays returned by trace_batch
+HIT = 0
+REFLECTION = 1
+EXIT = 2
+OUTCOME_NAMES = (Tracer.HIT, Tracer.REFLECTION, Tracer.EXIT)
+
+
+def edge_origins(size):
+    """
+    edge_origins - returns the flat indices of the edge cells of a board, in the same
+    (row major) order as Board.get_edges
+
+    :param size: the number of rows (and columns) of the board
+    :type size: int
+    :return: the flat index of every edge cell
+    :rtype: np.ndarray[int64]
+    """
+    last = size - 1
+    edges = [column for column in range(1, last)]
+    for row in range(1, last):
+        edges.append(row * size)
+        edges.append(row * size + last)
+    edges.extend(last * size + column for column in range(1, last))
+
+    return np.array(edges, dtype=np.int64)
+
+
+def edge_numbers(size):
+    """
+    edge_numbers - returns the number of each edge cell in edge_origins order, indexed by flat
+    index - the column of its byte in a signature (see Tracer.signature)
+
+    :return: the number of each edge cell, and -1 for every other cell
+    :rtype: np.ndarray[int64] of shape (size * size,)
+    """
+    numbers = np.full(size * size, -1, dtype=np.int64)
+    numbers[edge_origins(size)] = np.arange(4 * (size - 2))
+
+    return numbers
+
+
+def interior_cells(size):
+    """
+    interior_cells - returns the flat index of every interior cell of a board, in the order of
+    the bits of an interior layout mask
+
+    :rtype: np.ndarray[int64]
+    """
+    return np.array([row * size + column for row in range(1, size - 1) for column in range(1, size - 1)],
+                    dtype=np.int64)
+
+
+def trace_batch(layouts):
+    """
+    trace_batch - traces a ray from every edge cell of every board in layouts
+
+    :param layouts: a stack of B boards of size N x N (edges included) marking the atoms
+    :type layouts: np.ndarray[bool] of shape (B, N, N)
+    :return: (outcomes, termini) - both of shape (B, 4 * (N - 2)) with a column per edge cell in
+             edge_origins order. outcomes holds HIT, REFLECTION or EXIT and termini the flat index
+             of the atom struck or of the edge cell the ray leaves from.
+    :rtype: tuple(np.ndarray[int8], np.ndarray[int64])
+    """
+    layouts = np.asarray(layouts, dtype=bool)
+    if layouts.ndim != 3 or layouts.shape[1] != layouts.shape[2]:
+        raise ValueError("layouts must be a stack of square boards of shape (B, N, N)")
+
+    count, size = layouts.shape[0], layouts.shape[1]
+    cell_count = size * size
+    origins = edge_origins(size)
+    edge_count = len(origins)
+    index_type = np.int32 if count * cell_count < 2 ** 31 else np.int64
+
+    # every board's cells laid end to end as Tracer ATOM / EDGE flags, so a ray on board b at
+    # cell i reads cells[b * N * N + i] and positions are kept as indices into the whole stack
+    edge_flags = np.zeros(cell_count, dtype=np.uint8)
+    edge_flags[origins] = Tracer.EDGE
+    cells = (layouts.reshape(count, cell_count).view(np.uint8) | edge_flags).reshape(-1)
+    atoms = layouts.reshape(-1)
+
+    # the change in index for a step in each direction, and the offset to the diagonals
+    steps = np.array([-size, 1, size, -1], dtype=index_type)
+    sides = np.array([1, size, 1, size], dtype=index_type)
+
+    # per direction, the direction a ray turns to when only its ccw / cw diagonal is an atom
+    ccw_turns = np.array([Tracer.RIGHT, Tracer.DOWN, Tracer.RIGHT, Tracer.DOWN], dtype=np.int8)
+    cw_turns = np.array([Tracer.LEFT, Tracer.UP, Tracer.LEFT, Tracer.UP], dtype=np.int8)
+
+    initial_directions = np.array(
+        [Tracer.initial_direction(origin, size) for origin in origins], dtype=np.int8)
+
+    outcomes = np.empty(count * edge_count, dtype=np.int8)
+    termini = np.empty(count * edge_count, dtype=np.int64)
+
+    # the rays still travelling - one per (board, edge) - and their state
+    ray = np.arange(count * edge_count, dtype=index_type)
+    base = (np.arange(count, dtype=index_type) * cell_count)[:, None]
+    origin = (base + origins.astype(index_type)).reshape(-1)
+    position = origin.copy()
+    direction = np.tile(initial_directions, count)
+
+    # a ray visits each (cell, direction) at most once, so any ray still going after that is looping
+    for _ in range(4 * cell_count + 1):
+        if len(ray) == 0:
+            break
+
+        next_position = position + steps[direction]
+        flags = cells[next_position]
+        hit = (flags & Tracer.ATOM).astype(bool)
+        leave = (flags & Tracer.EDGE).astype(bool)
+
+        side = sides[direction]
+        ccw_atom = atoms[next_position - side]
+        cw_atom = atoms[next_position + side]
+        turn = (ccw_atom | cw_atom) & ~(hit | leave)
+
+        # atoms diagonal to the first move reflect the ray straight back out
+        reflect = turn & (position == origin)
+        turn &= ~reflect
+
+        if turn.any():
+            # otherwise the ray turns away from them (or back on itself if both are atoms)
+            turning = np.flatnonzero(turn)
+            ccw_turning = ccw_atom[turning]
+            cw_turning = cw_atom[turning]
+            turned = direction[turning]
+            turned = np.where(ccw_turning & cw_turning, turned ^ 2,
+                              np.where(ccw_turning, ccw_turns[turned], cw_turns[turned]))
+            direction[turning] = turned
+
+            # after a turn the ray takes one step on its new trajectory, which may also end it
+            turned_position = position[turning] + steps[turned]
+            next_position[turning] = turned_position
+            turned_flags = cells[turned_position]
+            hit[turning] = (turned_flags & Tracer.ATOM).astype(bool)
+            leave[turning] = (turned_flags & Tracer.EDGE).astype(bool)
+
+        done = hit | leave | reflect
+        if done.any():
+            finished = np.flatnonzero(done)
+            finished_position = next_position[finished]
+            finished_origin = origin[finished]
+            finished_reflect = reflect[finished]
+            outcomes[ray[finished]] = np.where(
+                hit[finished], HIT,
+                np.where(finished_reflect | (finished_position == finished_origin), REFLECTION, EXIT))
+            termini[ray[finished]] = np.where(finished_reflect, finished_origin, finished_position)
+
+            travelling = ~done
+            ray = ray[travelling]
+            origin = origin[travelling]
+            next_position = next_position[travelling]
+            direction = direction[travelling]
+
+        position = next_position
+
+    # checked after the loop rather than in an else clause, which would also run when the last
+    # rays finished on the final step allowed
+    if len(ray):
+        raise RuntimeError("a ray failed to leave the board")
+
+    # termini are reported as indices within each board
+    termini %= cell_count
+
+    return outcomes.reshape(count, edge_count), termini.reshape(count, edge_count)
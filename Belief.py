@@ -0,0 +1,381 @@
+"""
+Belief - the atom layouts still consistent with what has been observed in a game, kept up to date
+as each ray result and guess arrives.
+
+The belief holds its candidates as a row of flags marking the cells of each layout's atoms,
+together with its signature - the outcome code (see Tracer.signature) of a ray from every edge.
+When there are few enough consistent layouts the candidates are all of them and the belief is
+exact; otherwise they are a uniform random sample of them.
+
+The consistent layouts are found in one of two ways:
+
+    - from a signature table (see SignatureFile), when one has been built for the atom count.
+      The belief keeps the rows of the table which match every observation - filtering them as
+      each observation arrives - and reads candidates' signatures straight from the table.
+    - otherwise from a Solver, which describes them in groups (see Solver.partitions), drawing
+      candidates from the groups and tracing them with BatchTracer.
+
+A new observation only filters the candidates, since a uniform sample of the consistent layouts
+stays a uniform sample of those which agree with it. When filtering leaves a sample too small it
+is topped up with newly drawn layouts.
+
+Topping up from a table takes a millisecond or two. Without one, the Solver's groups are narrowed
+by the observations made since the last top up (see Solver.partitions). Early in a game of four
+or five atoms that can still mean searching thousands of groups: about one update in twenty
+takes 50 to 120 ms, and the slowest a few hundred. The median update takes well under a
+millisecond. Build the table (python SignatureFile.py build --atoms 4) wherever hints must keep
+up with every frame, or update off the frame as Heatmap.HeatmapWorker does.
+
+Needs NumPy.
+"""
+import itertools
+import math
+import random
+
+import numpy as np
+
+import BatchTracer
+import SignatureFile
+import Solver
+import Tracer
+
+# the number of layouts held when there are too many to hold them all
+SAMPLE_SIZE = 1024
+
+# a sample is topped up when filtering leaves fewer than this fraction of SAMPLE_SIZE
+REFILL_FRACTION = 0.25
+
+# the matching rows of a table are held as a mask of every row until fewer than this fraction of
+# them match, and as a list of row numbers after that
+DENSE_FRACTION = 1 / 16
+
+
+class Belief():
+    """
+    Belief - the candidate layouts of one game: all of those consistent with its observations,
+    or a uniform sample of them
+    """
+    def __init__(self, atom_count, size=10, sample_size=SAMPLE_SIZE, rng=None, table=None):
+        """
+        __init__ - initializes a belief with nothing yet observed
+
+        :param atom_count: the number of atoms on the board
+        :type atom_count: int
+        :param size: the number of rows (and columns) of the board
+        :type size: int
+        :param sample_size: the number of layouts to hold when there are too many to hold them all
+        :type sample_size: int
+        :param rng: the source of randomness samples are drawn with
+        :type rng: random.Random
+        :param table: the signature table of atom_count atoms to find layouts in - the one opened by
+                      SignatureFile.open_table if None, and none at all if False
+        :type table: Object(SignatureFile.SignatureFile) or None or False
+        """
+        self._atom_count = atom_count
+        self._size = size
+        self._sample_size = sample_size
+        self._rng = rng or random.Random()
+        self._generator = np.random.default_rng(self._rng.getrandbits(64))
+        self._solver = Solver.Solver(atom_count, size)
+        self._edge_numbers = BatchTracer.edge_numbers(size)
+        self._edges = BatchTracer.edge_origins(size)
+        self._interior = BatchTracer.interior_cells(size)
+
+        if table is None:
+            table = SignatureFile.open_table(atom_count, size)
+        self._table = table or None
+        if self._table is not None:
+            self._table_keys, self._table_layouts = self._table.columns()
+            # the table rows consistent with the observations - None while that is all of them,
+            # then a mask of the rows while there are many, then the row numbers
+            self._table_rows = None
+
+        # the candidates - a row of the cells holding atoms and a row of outcome codes for each
+        self._atoms = np.zeros((0, size * size), dtype=bool)
+        self._codes = np.zeros((0, len(self._edges)), dtype=np.uint8)
+        # the number of candidates with an atom in each cell, kept in step with the candidates
+        self._atom_counts = np.zeros(size * size, dtype=np.int64)
+        self._exact = False
+        self._count = None
+
+        self._refresh()
+
+    def get_atom_count(self):
+        return self._atom_count
+
+    def get_size(self):
+        return self._size
+
+    def get_edges(self):
+        """
+        get_edges - returns the flat index of each edge cell, in the order of the signature columns
+        """
+        return self._edges
+
+    def get_atoms(self):
+        """
+        get_atoms - returns the candidates as rows of flags, one per cell, marking their atoms
+
+        :rtype: np.ndarray[bool] of shape (candidates, size * size)
+        """
+        return self._atoms
+
+    def get_codes(self):
+        """
+        get_codes - returns the signature of each candidate, in the same order as get_atoms
+
+        :rtype: np.ndarray[uint8] of shape (candidates, edges)
+        """
+        return self._codes
+
+    def marginals(self):
+        """
+        marginals - returns the probability of each cell holding an atom, over the candidates
+
+        :rtype: np.ndarray[float] of shape (size * size,)
+        """
+        if len(self._atoms) == 0:
+            return np.zeros(len(self._atom_counts))
+
+        return self._atom_counts / len(self._atoms)
+
+    def is_exact(self):
+        """
+        is_exact - returns whether the candidates are every consistent layout rather than a sample
+        """
+        return self._exact
+
+    def count(self):
+        """
+        count - returns the number of layouts consistent with the observations (not the number of
+        candidates held, which may be a sample of them)
+
+        :rtype: int
+        """
+        if self._count is None:
+            if self._table is None:
+                self._count = self._solver.count()
+            elif self._table_rows is None:
+                self._count = len(self._table_layouts)
+            elif self._table_rows.dtype == bool:
+                self._count = int(np.count_nonzero(self._table_rows))
+            else:
+                self._count = len(self._table_rows)
+
+        return self._count
+
+    def add_ray(self, origin_row, origin_column, result):
+        """
+        add_ray - records the result of a ray fired from an edge square
+
+        :param result: the return value of BlackBoxGame.shoot_ray
+        :type result: tuple(int, int) or None
+        :raises Solver.Contradiction: if the result is impossible given what is already known
+        """
+        size = self._size
+        self._solver.add_ray(origin_row, origin_column, result)
+        self._count = None
+
+        column = self._edge_numbers[origin_row * size + origin_column]
+        code = Tracer.HIT_CODE if result is None else self._edge_numbers[result[0] * size + result[1]]
+
+        if self._table is not None:
+            # the keys are stored a column at a time, so one edge's codes are contiguous
+            codes = self._table_keys[:, column]
+            self._filter_table(lambda rows: codes[rows] == code)
+
+        self._keep(self._codes[:, column] == code)
+
+    def add_guess(self, row, column, atom):
+        """
+        add_guess - records whether a square holds an atom
+
+        :param atom: whether the square holds an atom
+        :type atom: Bool
+        :raises Solver.Contradiction: if it conflicts with what is already known
+        """
+        size = self._size
+        self._solver.add_guess(row, column, atom)
+        self._count = None
+
+        if self._table is not None and 0 < row < size - 1 and 0 < column < size - 1:
+            bit = np.uint64((row - 1) * (size - 2) + column - 1)
+            self._filter_table(lambda rows: ((self._table_layouts[rows] >> bit) & np.uint64(1)) == bool(atom))
+
+        self._keep(self._atoms[:, row * size + column] == bool(atom))
+
+    def _filter_table(self, agrees):
+        """
+        _filter_table - keeps only the rows of the table which agree with a new observation
+
+        :param agrees: returns whether each of the rows it is given (a slice or row numbers)
+                       agrees with the observation
+        """
+        rows = self._table_rows
+        self._count = None
+
+        if rows is not None and rows.dtype != bool:
+            self._table_rows = rows[agrees(rows)]
+            return
+
+        # a contiguous scan of the whole table is quicker than gathering most of its rows
+        matches = agrees(slice(None))
+        if rows is None:
+            self._table_rows = matches
+        else:
+            np.logical_and(rows, matches, out=rows)
+        if self.count() < len(self._table_layouts) * DENSE_FRACTION:
+            self._table_rows = np.flatnonzero(self._table_rows)
+
+    def _keep(self, matches):
+        """
+        _keep - keeps only the candidates still consistent, refreshing them when a sample has been
+        left too small - or, with a table, when it could now hold every consistent layout
+        """
+        # the counts are adjusted by whichever of the dropped and the kept candidates are fewer
+        dropped = len(matches) - int(np.count_nonzero(matches))
+        if dropped:
+            if dropped < len(matches) - dropped:
+                self._atom_counts -= self._atoms[~matches].sum(axis=0)
+            else:
+                self._atom_counts = self._atoms[matches].sum(axis=0, dtype=np.int64)
+            self._atoms = self._atoms[matches]
+            self._codes = self._codes[matches]
+
+        if self._exact:
+            return
+
+        if len(self._atoms) < self._sample_size * REFILL_FRACTION or \
+                (self._table is not None and self.count() <= self._sample_size):
+            self._refresh()
+
+    def _refresh(self):
+        """
+        _refresh - holds every consistent layout if there are few enough, or tops the sample up to
+        sample_size with layouts drawn uniformly from them
+        """
+        if self._table is not None:
+            self._refresh_from_table()
+            return
+
+        partitions = list(self._solver.partitions())
+        weights = [math.comb(len(free_cells), remaining) for _, free_cells, remaining in partitions]
+        self._count = sum(weights)
+
+        layouts = []
+        if self._count <= self._sample_size:
+            for placed_mask, free_cells, remaining in partitions:
+                placed = _cells(placed_mask)
+                for chosen in itertools.combinations(free_cells, remaining):
+                    layouts.append(placed + list(chosen))
+            self._clear()
+            self._exact = True
+        else:
+            rng = self._rng
+            for placed_mask, free_cells, remaining in rng.choices(
+                    partitions, weights=weights, k=self._sample_size - len(self._atoms)):
+                layouts.append(_cells(placed_mask) + rng.sample(free_cells, remaining))
+
+        self._append_traced(layouts)
+
+    def _refresh_from_table(self):
+        """
+        _refresh_from_table - _refresh, drawing the layouts from the matching rows of the table
+        """
+        count = self.count()
+
+        if count <= self._sample_size:
+            rows = self._table_rows if self._table_rows is not None else np.arange(count)
+            if rows.dtype == bool:
+                rows = np.flatnonzero(rows)
+            self._clear()
+            self._exact = True
+        else:
+            wanted = self._sample_size - len(self._atoms)
+            rows = self._table_rows
+            if rows is None:
+                rows = self._generator.integers(0, count, wanted)
+            elif rows.dtype != bool:
+                rows = rows[self._generator.integers(0, count, wanted)]
+            else:
+                # rows drawn from the whole table are kept if they match - at least DENSE_FRACTION do
+                drawn = []
+                while wanted > 0:
+                    candidates = self._generator.integers(0, len(rows), int(wanted / DENSE_FRACTION))
+                    candidates = candidates[rows[candidates]][:wanted]
+                    drawn.append(candidates)
+                    wanted -= len(candidates)
+                rows = np.concatenate(drawn)
+
+        layouts = self._table_layouts[rows]
+        bits = (layouts[:, None] >> np.arange(len(self._interior), dtype=np.uint64)) & np.uint64(1)
+        atoms = np.zeros((len(rows), self._size * self._size), dtype=bool)
+        atoms[:, self._interior] = bits.astype(bool)
+
+        self._append(atoms, self._table_keys[rows])
+
+    def _clear(self):
+        """
+        _clear - drops every candidate held
+        """
+        self._atoms = self._atoms[:0]
+        self._codes = self._codes[:0]
+        self._atom_counts[:] = 0
+
+    def _append(self, atoms, codes):
+        """
+        _append - adds new candidates, given as rows of atom flags and their signatures
+        """
+        self._atoms = np.concatenate((self._atoms, atoms))
+        self._codes = np.concatenate((self._codes, codes))
+        self._atom_counts += atoms.sum(axis=0)
+
+    def _append_traced(self, layouts):
+        """
+        _append_traced - traces new candidates, given as lists of the cells holding their atoms
+        """
+        if not layouts:
+            return
+
+        size = self._size
+        atoms = np.zeros((len(layouts), size * size), dtype=bool)
+        rows = np.repeat(np.arange(len(layouts)), [len(layout) for layout in layouts])
+        atoms[rows, np.fromiter(itertools.chain.from_iterable(layouts), dtype=np.int64)] = True
+
+        outcomes, termini = BatchTracer.trace_batch(atoms.reshape(-1, size, size))
+        codes = np.where(outcomes == BatchTracer.HIT, Tracer.HIT_CODE,
+                         self._edge_numbers[termini]).astype(np.uint8)
+
+        self._append(atoms, codes)
+
+    def outcome_entropy(self):
+        """
+        outcome_entropy - returns, for each edge, the entropy in bits of the outcome of a ray fired
+        from it over the candidates - the information firing it is expected to give
+
+        :rtype: np.ndarray[float] of shape (edges,)
+        """
+        count, edge_count = self._codes.shape
+        if count == 0:
+            return np.zeros(edge_count)
+
+        offsets = np.arange(edge_count, dtype=np.int64) * 256
+        frequencies = np.bincount((self._codes + offsets).ravel(), minlength=edge_count * 256)
+        probabilities = frequencies.reshape(edge_count, 256) / count
+        with np.errstate(divide="ignore", invalid="ignore"):
+            terms = np.where(probabilities > 0, probabilities * np.log2(probabilities), 0.0)
+
+        return -terms.sum(axis=1)
+
+
+def _cells(mask):
+    """
+    _cells - returns the index of each bit set in a bitboard
+    """
+    cells = []
+    while mask:
+        low = mask & -mask
+        cells.append(low.bit_length() - 1)
+        mask ^= low
+
+    return cells
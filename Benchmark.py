@@ -0,0 +1,297 @@
+"""
+Benchmark - a reproducible performance benchmark of the game engine and the renderer.
+
+Every benchmark is seeded so each revision measures the same boards, and reports the best time
+per operation over several repeats. Results are written as JSON and can be compared against a
+baseline from another revision, failing (exit status 1) when any metric is slower than the
+baseline by more than the threshold.
+
+    python Benchmark.py --output baseline.json
+    python Benchmark.py --compare baseline.json --threshold 0.25
+
+The render benchmark draws one full frame with pygame's dummy video driver and is skipped when
+pygame is not installed. The cold start benchmark times a fresh interpreter importing each
+frontend, and fails if the engine or the terminal frontend imports pygame.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+
+import BlackBoxGame_Controller as BlackBoxGame
+import Board
+import Ray
+import Simulate
+import SparseBoard
+import Strategies
+
+# the modules timed from a fresh interpreter by the cold start benchmark, and whether each may
+# import pygame - "sys" alone times the interpreter itself
+COLD_START_MODULES = {
+    "sys": False,
+    "BlackBoxGame_Controller": False,
+    "Terminal": False,
+    "Main": True,
+}
+
+# board sizes and the atom counts benchmarked on each
+CONFIGURATIONS = {
+    10: (4, 8),
+    32: (16,),
+    100: (100,),
+}
+
+# board sizes and atom counts benchmarked with SparseBoard - far too large to build as a Board
+SPARSE_CONFIGURATIONS = {
+    100000: (2000,),
+}
+
+
+def measure(setup, operation, repeat):
+    """
+    measure - returns the best time taken per operation over repeat runs
+
+    :param setup: called before each run (untimed), returning the argument for operation
+    :param operation: called once per run with setup's result, returning the number of
+                      operations it performed
+    :param repeat: the number of runs
+    :rtype: float
+    """
+    best = None
+    for _ in range(repeat):
+        state = setup()
+        started = time.perf_counter()
+        count = operation(state)
+        elapsed = (time.perf_counter() - started) / count
+        best = elapsed if best is None else min(best, elapsed)
+
+    return best
+
+
+def seeded_games(seed, count, atoms, size):
+    """
+    seeded_games - returns the same count games every time for a given seed
+    """
+    random.seed(seed)
+    return [BlackBoxGame.BlackBoxGame(atoms, size) for _ in range(count)]
+
+
+def zigzag_game(seed, atoms, size, candidates=200):
+    """
+    zigzag_game - returns the seeded layout (out of candidates) whose rays travel furthest in
+    total, as a worst case for tracing
+    """
+    best = None
+    best_length = -1
+    for game in seeded_games(seed, candidates, atoms, size):
+        length = sum(len(path) for _, _, path in game.get_exit_table().values())
+        if length > best_length:
+            best, best_length = game, length
+
+    return best
+
+
+def benchmark_engine(results, seed, repeat):
+    """
+    benchmark_engine - measures board building, ray tracing, guessing and whole games
+    """
+    for size, atom_counts in CONFIGURATIONS.items():
+        for atoms in atom_counts:
+            label = f"size={size},atoms={atoms}"
+
+            def build_boards(_):
+                random.seed(seed)
+                for _ in range(20):
+                    Board.Board(atoms, size)
+                return 20
+            results[f"build_board[{label}]"] = measure(lambda: None, build_boards, repeat)
+
+            def shoot_every_edge(games):
+                shots = 0
+                for game in games:
+                    for row, column in game.get_board().get_edges():
+                        game.shoot_ray(row, column)
+                        shots += 1
+                return shots
+            results[f"shoot_ray_every_edge[{label}]"] = measure(
+                lambda: seeded_games(seed, 5, atoms, size), shoot_every_edge, repeat)
+
+            def guess_every_square(games):
+                guesses = 0
+                for game in games:
+                    for row in range(1, size - 1):
+                        for column in range(1, size - 1):
+                            game.guess_atom(row, column)
+                            guesses += 1
+                return guesses
+            results[f"guess_atom[{label}]"] = measure(
+                lambda: seeded_games(seed, 2, atoms, size), guess_every_square, repeat)
+
+            zigzag = zigzag_game(seed, atoms, size, candidates=200 if size <= 32 else 20)
+
+            def move_every_ray(game):
+                rays = 0
+                for row, column in game.get_board().get_edges():
+                    ray = Ray.Ray(row, column, size)
+                    while ray.get_direction() is not None:
+                        game.move_ray(ray)
+                    rays += 1
+                return rays
+            results[f"move_ray_zigzag[{label}]"] = measure(lambda: zigzag, move_every_ray, repeat)
+
+    def play_games(games):
+        strategy = Strategies.RandomStrategy(random.Random(seed))
+        for game in games:
+            Simulate.play_game(game, strategy)
+        return len(games)
+    for atoms in CONFIGURATIONS[10]:
+        results[f"simulated_game[size=10,atoms={atoms}]"] = measure(
+            lambda: seeded_games(seed, 200, atoms, 10), play_games, repeat)
+
+    for size, atom_counts in SPARSE_CONFIGURATIONS.items():
+        for atoms in atom_counts:
+            board = SparseBoard.SparseBoard.random(size, atoms, random.Random(seed))
+            origins = random.Random(seed).sample(range(1, size - 1), 1000)
+
+            def trace_sparse(_):
+                for origin in origins:
+                    board.trace(origin, full_path=False)
+                return len(origins)
+            results[f"sparse_trace[size={size},atoms={atoms}]"] = measure(lambda: None, trace_sparse, repeat)
+
+
+def benchmark_render(results, seed, repeat):
+    """
+    benchmark_render - measures one full frame of Main's draw pass with the dummy video driver
+    """
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    try:
+        import pygame
+        import Main
+        import Layout
+    except ImportError:
+        print("pygame is not installed - skipping the render benchmark", file=sys.stderr)
+        return
+
+    pygame.init()
+    screen = pygame.display.set_mode((1200, 1300))
+
+    for size, atom_counts in CONFIGURATIONS.items():
+        game = seeded_games(seed, 1, atom_counts[0], size)[0]
+        # some rays fired so edges are drawn in their colors
+        for row, column in game.get_board().get_edges()[::3]:
+            game.shoot_ray(row, column)
+
+        board = game.get_board()
+        layout = Layout.BoardLayout.fit(size, 1200, 1300)
+        squares = [(row, column) for row in range(size) for column in range(size)]
+
+        def draw_frame(square_surfaces):
+            for _ in range(5):
+                rects = Main.draw_squares(screen, board, layout, squares, square_surfaces)
+                pygame.display.update(rects)
+            return 5
+        results[f"draw_frame[size={size}]"] = measure(lambda: {}, draw_frame, repeat)
+
+    pygame.quit()
+
+
+def benchmark_cold_start(results, repeat):
+    """
+    benchmark_cold_start - measures starting a fresh interpreter and importing each of
+    COLD_START_MODULES, failing if one which must not import pygame does
+    """
+    directory = os.path.dirname(os.path.abspath(__file__))
+
+    for module, gui in COLD_START_MODULES.items():
+        command = [sys.executable, "-c", f"import sys, {module}; sys.exit(2 * ('pygame' in sys.modules))"]
+
+        def start(_):
+            subprocess.run(command, cwd=directory, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            return 1
+
+        status = subprocess.run(command, cwd=directory, stdout=subprocess.DEVNULL,
+                                stderr=subprocess.DEVNULL).returncode
+        if status == 2 and not gui:
+            raise RuntimeError(f"importing {module} imports pygame")
+        if status not in (0, 2):
+            print(f"{module} cannot be imported - skipping its cold start", file=sys.stderr)
+            continue
+
+        results[f"cold_start[{module}]"] = measure(lambda: None, start, repeat)
+
+
+def compare(results, baseline, threshold):
+    """
+    compare - prints each metric against the baseline and returns the names of those which are
+    slower than it by more than threshold (a fraction)
+    """
+    regressions = []
+    for name, seconds in sorted(results.items()):
+        before = baseline.get(name)
+        if before is None:
+            print(f"{name:50} {seconds * 1e6:12.2f}us  (new)")
+            continue
+
+        change = seconds / before - 1
+        flag = ""
+        if change > threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:50} {seconds * 1e6:12.2f}us  {change:+8.1%}{flag}")
+
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Black Box engine and renderer.")
+    parser.add_argument("--seed", type=int, default=1234, help="seed for every board benchmarked")
+    parser.add_argument("--repeat", type=int, default=5, help="runs of each benchmark (the best is kept)")
+    parser.add_argument("--output", help="file to write the results to as JSON")
+    parser.add_argument("--compare", help="JSON results of a baseline revision to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="fractional slowdown from the baseline counted as a regression")
+    parser.add_argument("--skip-render", action="store_true", help="do not benchmark the renderer")
+    parser.add_argument("--skip-cold-start", action="store_true",
+                        help="do not time starting the frontends in fresh interpreters")
+    args = parser.parse_args(argv)
+
+    results = {}
+    benchmark_engine(results, args.seed, args.repeat)
+    if not args.skip_render:
+        benchmark_render(results, args.seed, args.repeat)
+    if not args.skip_cold_start:
+        benchmark_cold_start(results, args.repeat)
+
+    report = {
+        "seed": args.seed,
+        "repeat": args.repeat,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "seconds_per_operation": results,
+    }
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2, sort_keys=True)
+
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)["seconds_per_operation"]
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} metrics regressed by more than {args.threshold:.0%}")
+            return 1
+        return 0
+
+    for name, seconds in sorted(results.items()):
+        print(f"{name:50} {seconds * 1e6:12.2f}us")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
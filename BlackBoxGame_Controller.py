@@ -1,5 +1,51 @@
+import random
+import struct
+import time
+
+import ActionLog
 import Board
+import Instrumentation
+import Layouts
 import Ray
+import Tracer
+
+# the possible outcomes of a ray as recorded in the exit table
+HIT = Tracer.HIT
+REFLECTION = Tracer.REFLECTION
+EXIT = Tracer.EXIT
+
+# snapshot header - format version, board size, score, atoms placed, number of guesses, number of rays,
+# the seed plus one (0 when there is none) and the number of rays fired (which with it colors the next)
+SNAPSHOT_VERSION = 3
+SNAPSHOT_HEADER = struct.Struct("<BHiHHHQI")
+
+# maps a cell's flags to 1 if it is selected and 0 otherwise, for finding selected cells with find
+_SELECTED_MARKS = bytes(1 if flags & Tracer.SELECTED else 0 for flags in range(256))
+
+
+def _cell_format(size):
+    """
+    _cell_format - returns the struct format code of the smallest unsigned int holding any cell
+    index of a board
+    """
+    if size * size <= 0x100:
+        return "B"
+    if size * size <= 0x10000:
+        return "H"
+    return "I"
+
+
+def snapshot_size(size, guess_count, ray_count, log_length):
+    """
+    snapshot_size - returns the length of the snapshot of a game on a board of a size with a number
+    of guesses, of squares rays have been fired from and of bytes in its log (see
+    BlackBoxGame.snapshot and ActionLog.log_length)
+    """
+    cell = struct.calcsize(_cell_format(size))
+    layout_bytes = (Layouts.interior_size(size) + 7) // 8
+
+    return (SNAPSHOT_HEADER.size + 2 * layout_bytes + guess_count * cell + ray_count * (2 * cell + 3)
+            + log_length)
 
 
 class BlackBoxGame():
@@ -16,22 +62,222 @@ class BlackBoxGame():
     accordingly.
 
     """
-    def __init__(self, atoms):
+    def __init__(self, atoms, size=10, atom_positions=None, seed=None):
         """
         __init__ - initializes an instance of the BlackBoxGame class
-        :param atoms: the location of atoms to be placed on the board
-        :type atoms: list[tuples]
+        :param atoms: the number of atoms to be placed on the board
+        :type atoms: int
+        :param size: the number of rows (and columns) of the board, edges included
+        :type size: int
+        :param atom_positions: where to place the atoms (see Layouts.positions) - placed randomly if None
+        :type atom_positions: List[[row, column]]
+        :param seed: the seed the atoms and ray colors are drawn from - a non-negative int. When
+                     neither it nor atom_positions is given it is drawn from the random module
+        :type seed: int
         """
-        self._board = Board.Board(atoms)
+        if seed is None and atom_positions is None:
+            seed = random.getrandbits(63)
+        self._seed = seed
+        # the number of rays fired, which with the seed gives each ray its color
+        self._rays_fired = 0
+
+        self._board = Board.Board(atoms, size, atom_positions, random if seed is None else random.Random(seed))
         self._score = 25
         self._atoms = self._board.get_atoms()
         self._guesses = []
 
+        # every shot and guess, from which the game can be rebuilt with replay
+        layout = None if atom_positions is None else Tracer.mask_to_layout(self._board.get_atom_mask(), size)
+        self._log = ActionLog.ActionLog(size, atoms, seed, layout)
+
+        # table of the outcome of a ray fired from each edge square - atoms never move
+        # during a game so each edge is traced once (lazily, on its first shot) and read thereafter
+        self._exit_table = {}
+
     def get_board(self):
         """
         get_board - returns copy of the game's _board object """
         return self._board
 
+    def get_seed(self):
+        """
+        get_seed - returns the seed the game's atoms and ray colors were drawn from (None if the
+        atoms were placed by hand without one)
+        """
+        return self._seed
+
+    def get_log(self):
+        """
+        get_log - returns the log of every shot and guess made so far
+
+        :rtype: Object(ActionLog.ActionLog)
+        """
+        return self._log
+
+    def get_guesses(self):
+        """
+        get_guesses - returns the squares guessed so far, in the order they were guessed
+
+        :rtype: List[[row, column]]
+        """
+        return self._guesses
+
+    @classmethod
+    def replay(cls, log, until=None):
+        """
+        replay - rebuilds a game from its log by repeating its actions, without any rendering
+
+        :param log: the log of the game
+        :type log: Object(ActionLog.ActionLog)
+        :param until: the number of actions to repeat - all of them if None
+        :type until: int
+        :return: the game as it was after those actions
+        :rtype: Object(BlackBoxGame)
+        """
+        size = log.get_size()
+        atom_positions = None if log.get_layout() is None else Layouts.positions(log.get_layout(), size)
+        game = cls(log.get_atom_count(), size, atom_positions, log.get_seed())
+
+        for number, (kind, row, column) in enumerate(log.actions()):
+            if number == until:
+                break
+            if kind == ActionLog.SHOT:
+                game.shoot_ray(row, column)
+            else:
+                game.guess_atom(row, column)
+
+        return game
+
+    def clone(self):
+        """
+        clone - returns an independent game in the same state, for trying out shots and guesses
+        without affecting this one. Rays never change once fired, and the exit table only depends
+        on the atoms, so both are shared rather than copied.
+
+        :return: the clone
+        :rtype: Object(BlackBoxGame)
+        """
+        game = BlackBoxGame.__new__(BlackBoxGame)
+        game._board = self._board.clone()
+        game._score = self._score
+        game._atoms = game._board.get_atoms()
+        game._guesses = [list(guess) for guess in self._guesses]
+        game._exit_table = dict(self._exit_table)
+        game._seed = self._seed
+        game._rays_fired = self._rays_fired
+        game._log = self._log.copy()
+
+        return game
+
+    def snapshot(self):
+        """
+        snapshot - returns the state of the game as compact binary: SNAPSHOT_HEADER, then the atoms
+        and the selected squares as interior layout masks (see Layouts), then each guess and,
+        for each square a ray has been fired from, its origin, terminus and color, and last the
+        game's log (see ActionLog.to_bytes). Squares are written as cell indices
+        (row * size + column) in the fewest bytes the board allows.
+
+        On a ten by ten board a new game takes 41 bytes of header and layouts and 5 to 13 of log
+        header (its seed is a varint), so about 55 in all. Each shot adds 5 bytes of ray and 1 or
+        2 of log, and each guess 1 byte and 1 or 2 of log, so a game of a dozen shots is around a
+        hundred and thirty bytes. The log is kept in the snapshot, although the rest of the
+        snapshot could restore the board without it, because an evicted or restored game must
+        still replay and archive as one that never left memory (see ActionLog), and it costs a
+        byte or two an action.
+
+        :return: the snapshot
+        :rtype: bytes
+        """
+        board = self._board
+        size = board.get_size()
+        cell = _cell_format(size)
+        layout_bytes = (Layouts.interior_size(size) + 7) // 8
+        cells = board.get_cells()
+
+        selected = 0
+        marks = cells.translate(_SELECTED_MARKS)
+        index = marks.find(1)
+        while index != -1:
+            selected |= 1 << index
+            index = marks.find(1, index + 1)
+        rays = board.get_originating_rays()
+
+        data = bytearray(SNAPSHOT_HEADER.pack(SNAPSHOT_VERSION, size, self._score, board.get_atom_count(),
+                                              len(self._guesses), len(rays),
+                                              0 if self._seed is None else self._seed + 1, self._rays_fired))
+        data += Tracer.mask_to_layout(board.get_atom_mask(), size).to_bytes(layout_bytes, "little")
+        data += Tracer.mask_to_layout(selected, size).to_bytes(layout_bytes, "little")
+        data += struct.pack(f"<{len(self._guesses)}{cell}",
+                            *(row * size + column for row, column in self._guesses))
+
+        ray_record = struct.Struct(f"<{cell}{cell}BBB")
+        for origin, ray in rays.items():
+            # every ray fired has stopped, so this needs no tracing (even after a restore)
+            terminus = ray.get_terminus()
+            data += ray_record.pack(origin, terminus[0] * size + terminus[1], *ray.get_color())
+
+        data += self._log.to_bytes()
+
+        return bytes(data)
+
+    @classmethod
+    def restore(cls, data):
+        """
+        restore - returns the game a snapshot was taken of, log included, without tracing any rays
+
+        :param data: a snapshot from BlackBoxGame.snapshot
+        :type data: bytes
+        :rtype: Object(BlackBoxGame)
+        """
+        version, size, score, atom_count, guess_count, ray_count, seed, rays_fired = SNAPSHOT_HEADER.unpack_from(data)
+        if version != SNAPSHOT_VERSION:
+            raise ValueError(f"not a version {SNAPSHOT_VERSION} game snapshot")
+
+        cell = _cell_format(size)
+        layout_bytes = (Layouts.interior_size(size) + 7) // 8
+        offset = SNAPSHOT_HEADER.size
+        layout = int.from_bytes(data[offset:offset + layout_bytes], "little")
+        offset += layout_bytes
+        selected = Tracer.layout_to_mask(int.from_bytes(data[offset:offset + layout_bytes], "little"), size)
+        offset += layout_bytes
+        guesses = struct.unpack_from(f"<{guess_count}{cell}", data, offset)
+        offset += struct.calcsize(f"<{guess_count}{cell}")
+
+        game = cls(atom_count, size, Layouts.positions(layout, size), seed - 1 if seed else None)
+        board = game._board
+        game._score = score
+        game._rays_fired = rays_fired
+
+        # correct guesses removed their atom from those left to find
+        for index in guesses:
+            guess = list(divmod(index, size))
+            if guess in game._atoms:
+                game._atoms.remove(guess)
+            game._guesses.append(guess)
+
+        while selected:
+            low = selected & -selected
+            board.set_flag(low.bit_length() - 1, Tracer.SELECTED, True)
+            selected ^= low
+
+        ray_record = struct.Struct(f"<{cell}{cell}BBB")
+        game._log = ActionLog.ActionLog.from_bytes(data[offset + ray_count * ray_record.size:])
+        for origin, terminus, *color in ray_record.iter_unpack(
+                data[offset:offset + ray_count * ray_record.size]):
+            origin_row, origin_column = divmod(origin, size)
+            ray = Ray.Ray(origin_row, origin_column, size, tuple(color))
+            ray.set_direction(None)
+            board.get_board_square((origin_row, origin_column)).set_originating_ray(ray)
+
+            terminal_square = board.get_board_square(divmod(terminus, size))
+            if terminal_square.is_atom():
+                ray.record_atom_collision(terminal_square)
+            else:
+                ray.set_terminal_location(divmod(terminus, size))
+                terminal_square.set_terminating_ray(ray)
+
+        return game
+
     def get_score(self):
         """
         get_score - returns the current score
@@ -51,64 +297,129 @@ class BlackBoxGame():
 
     def move_ray(self, ray):
         """
-        move_ray - this is the primary function which is responsible for recursively moving a ray. Although it 
+        move_ray - this is the primary function which is responsible for moving a ray. Although it
         primarily look after the action of the Ray.Ray class it lives in the Game instance itself.
 
         THIS IS HOW WE DETERMINE THE EXIT POINT OF ALL RAYS - HORIZONTAL, VERTICAL, OR WITH DETOURS
 
+        The ray is walked from its current location to its terminus in one pass of the Tracer engine
+        rather than one recursive call per square, so board size is not limited by the recursion limit.
+
         :param: ray - the ray object whose trajectory and interactions with the board are being determined
         :param type: Object(Ray.Ray)
 
-        :return: None - side effect - set's ray's terminus 
+        :return: None - side effect - set's ray's terminus
         :return type: None
         """
+        size = self._board.get_size()
+        origin_row, origin_column = ray.get_origin_location()
+        current_row, current_column = ray.get_current_location()
+
+        outcome, terminus, path = self._trace(
+            origin_row * size + origin_column, current_row * size + current_column,
+            Tracer.direction_from_name(ray.get_direction()))
 
-        # look to the next spot in the ray's trajectory
-        next_coordinates = ray.get_next_location()
-        next_location = self._board.get_board_square(next_coordinates)
+        terminal_square = self._board.get_board_square(divmod(terminus, size))
 
-        # check for a collisition - return if it occurs
-        if ray.check_for_collision(next_location):
+        if outcome == HIT:
+            ray.set_current_location(divmod(path[-1], size))
+            ray.record_atom_collision(terminal_square)
             return
 
-        # if we didn't collide as we moved we need to look to check our
-        # diagonals for atoms
-        ccw_diag_coordinates, cw_diag_coordinates = ray.get_diagonals()
+        # the ray stops on the last square before the edge it leaves from
+        ray.set_current_location(divmod(path[-2] if len(path) > 1 else path[-1], size))
+        ray.record_edge_collision(terminal_square)
 
-        ccw_diagonal = self._board.get_board_square(ccw_diag_coordinates)
-        cw_diagonal = self._board.get_board_square(cw_diag_coordinates)
+    def trace_ray(self, origin_row, origin_column):
+        """
+        trace_ray - determines where a ray fired from an edge square would end up using the same
+        rules as move_ray, but without touching the score or the squares of the board
+
+        :param origin_row: the row the ray is fired from
+        :type origin_row: int
+        :param origin_column: the column the ray is fired from
+        :type origin_column: int
+        :return: (outcome, square, path) - outcome is HIT, REFLECTION or EXIT, square is the atom
+                 struck or the square the ray leaves from and path the squares the ray travelled through
+        :rtype: tuple(String, tuple(int, int), list[tuple(int, int)])
+        """
+        size = self._board.get_size()
+        outcome, terminus, path = self._trace(origin_row * size + origin_column)
 
-        if ccw_diagonal.is_atom() or cw_diagonal.is_atom():
+        return (outcome, divmod(terminus, size), [divmod(position, size) for position in path])
 
-            # If we're on our first move and the immediately diagonals contain an atom we have a reflection
-            if ray.get_current_location() == ray.get_origin_location():
+    def _trace(self, origin, position=None, direction=None):
+        """
+        _trace - runs the Tracer engine over the board, reading the atoms from its bitboard
+        on boards small enough to shift cheaply and from its flat grid of cells otherwise
+        """
+        size = self._board.get_size()
 
-                terminal_square = self._board.get_board_square(
-                    ray.get_current_location())
+        if size <= Tracer.BITBOARD_MAX_SIZE:
+            result = Tracer.trace_mask(self._board.get_atom_mask(), size, origin, position, direction)
+        else:
+            result = Tracer.trace(self._board.get_cells(), size, origin, position, direction)
 
-                # let's the ray know it's finished and the square that it's an endpoint
-                # self.end_ray(ray, terminal_square)
-                return ray.record_edge_collision(terminal_square)
+        if Instrumentation.active is not None:
+            Instrumentation.active.record_trace(*result)
 
-            # otherwise they cause a bend in the path
-            else:
-                # we have to calculate our trajectory based on the pull
-                # of the atoms in our path
-                ray.recalculate_trajectory(ccw_diagonal, cw_diagonal)
+        return result
 
-                # get the coordinates of the next location in our new trajectory
-                next_coordinates = ray.get_next_location()
+    def get_exit_table(self):
+        """
+        get_exit_table - returns the outcome of a ray fired from every edge square on the board,
+        tracing any edge not already in the table
+
+        :return: dictionary mapping each edge square to the (outcome, square, path) from trace_ray
+        :rtype: dict[tuple(int, int), tuple(String, tuple(int, int), list[tuple(int, int)])]
+        """
+        for origin_row, origin_column in self._board.get_edges():
+            self.get_exit(origin_row, origin_column)
+
+        return self._exit_table
+
+    def get_exit(self, origin_row, origin_column):
+        """
+        get_exit - returns the exit table entry for a single edge square, tracing it the first
+        time it is requested
 
-                # determine the next coordinate will result in a collision - return if it would
-                if ray.check_for_collision(
-                        self._board.get_board_square(next_coordinates)):
-                    return
+        :return: (outcome, square, path) from trace_ray
+        :rtype: tuple(String, tuple(int, int), list[tuple(int, int)])
+        """
+        entry = self._exit_table.get((origin_row, origin_column))
 
-        # move the ray to the next step forward in its current trajectory
-        ray.set_current_location(next_coordinates)
+        if entry is None:
+            entry = self.trace_ray(origin_row, origin_column)
+            self._exit_table[(origin_row, origin_column)] = entry
 
-        #  finally, recursively call our current function from the next step in its path.
-        self.move_ray(ray)
+        return entry
+
+    def forget_exits(self, squares):
+        """
+        forget_exits - drops the exit table entries of edge squares whose rays have changed since
+        they were traced - after atoms are added or removed (see Editor) - so that they are traced
+        again when next needed
+
+        :param squares: the (row, column) of each edge square
+        :type squares: List[tuple(int, int)]
+        """
+        for square in squares:
+            self._exit_table.pop(tuple(square), None)
+
+    def get_signature(self):
+        """
+        get_signature - returns the outcome of a ray from every edge square encoded as by
+        Tracer.signature, for looking the board up in a signature table (see SignatureFile)
+
+        :return: one byte per edge square
+        :rtype: bytes
+        """
+        edges = self._board.get_edges()
+        numbers = {edge: number for number, edge in enumerate(edges)}
+        exit_table = self.get_exit_table()
+
+        return bytes(Tracer.HIT_CODE if exit_table[edge][0] == HIT else numbers[exit_table[edge][1]]
+                     for edge in edges)
 
     def shoot_ray(self, origin_row, origin_column):
         """
@@ -117,8 +428,26 @@ class BlackBoxGame():
         :type origin_row:
         :param origin_column:
         :type origin_column:
-        :return: Terminus Location (if it exists) or None
+        :return: Terminus Location (if it exists) or None - False if rays cannot be shot from the square
         :rtype: tuple(int, int) or None
+        :raises IndexError: if the square is not on the board
+        """
+        if Instrumentation.active is None:
+            terminus = self._shoot_ray(origin_row, origin_column)
+        else:
+            started = time.perf_counter()
+            terminus = self._shoot_ray(origin_row, origin_column)
+            Instrumentation.active.record_time("shoot_ray", time.perf_counter() - started)
+
+        # only shots which were taken are logged
+        if terminus is not False:
+            self._log.record(ActionLog.SHOT, origin_row, origin_column)
+
+        return terminus
+
+    def _shoot_ray(self, origin_row, origin_column):
+        """
+        _shoot_ray - shoot_ray without the instrumentation
         """
 
         # get the the square object at row x column
@@ -131,29 +460,37 @@ class BlackBoxGame():
         if origin_check == False:
             return False
 
-        # if we pass the origin check create shoot a new Ray.Ray object from row x column
-        new_ray = Ray.Ray(origin_row, origin_column)
+        # if we pass the origin check create a Ray.Ray object to record the shot from row x column -
+        # it is never moved, its terminus is read from the exit table below
+        if self._seed is None:
+            color = Ray.random_color()
+        else:
+            color = Ray.seeded_color(self._seed, self._rays_fired)
+        self._rays_fired += 1
+        new_ray = Ray.Ray(origin_row, origin_column, self._board.get_size(), color)
 
         # let the square we shot from know its an orign square
         origin.set_originating_ray(new_ray)
         # Deduct 1 from the score since we now have on exit point
         self.set_score(-1)
 
-        # while the ray object has a direction (will be set to none when it reaches an endpoint)
-        # send it to the helper function that will move it
-        while new_ray.get_direction() != None:
-            self.move_ray(new_ray)
+        # look up the ray's outcome in the exit table (tracing the edge with the Tracer engine the
+        # first time it is shot) and mark the ray as stopped
+        outcome, terminus, path = self.get_exit(origin_row, origin_column)
+        new_ray.set_direction(None)
+
+        if outcome == HIT:
+            # hitting an atom returns None as terminus
+            new_ray.record_atom_collision(self._board.get_board_square(terminus))
+            return None
 
-    # if we hit an exit point (other than through reflection) deduct the point for that
-        terminus = new_ray.get_terminal_location()
-        # check the the terminal point is an edge (hitting an atom returns none as terminus)
+        new_ray.set_terminal_location(terminus)
+        terminal_square = self._board.get_board_square(terminus)
+        terminal_square.set_terminating_ray(new_ray)
 
-        if terminus != None:
-            # check that the terminus is not a reflection, which shouldn't be counted twice
-            terminal_square = self._board.get_board_square(terminus)
-            terminal_square.set_terminating_ray(new_ray)
-            if terminus != (origin_row, origin_column):
-                self.set_score(-1)
+        # if we hit an exit point (other than through reflection) deduct the point for that
+        if outcome == EXIT:
+            self.set_score(-1)
 
         return terminus
 
@@ -168,7 +505,26 @@ class BlackBoxGame():
         :type column: int
         :return: True or False, indicating whether an atom exists at that coordinate
         :rtype: Bool
+        :raises IndexError: if the square is not on the board
         """
+        if Instrumentation.active is None:
+            correct = self._guess_atom(row, column)
+        else:
+            started = time.perf_counter()
+            correct = self._guess_atom(row, column)
+            Instrumentation.active.record_time("guess_atom", time.perf_counter() - started)
+
+        self._log.record(ActionLog.GUESS, row, column)
+
+        return correct
+
+    def _guess_atom(self, row, column):
+        """
+        _guess_atom - guess_atom without the instrumentation
+        """
+        # a square off the board cannot be guessed (or logged)
+        self._board.get_board_square((row, column))
+
         if [row, column] in self._atoms:
             # if an tom was properly guessed remove it from the atom's array
             # and return True, append the guess to the guesses array, and
@@ -1,5 +1,11 @@
 import random
 from Square import Square
+import Instrumentation
+import Layouts
+import Tracer
+
+# translation table clearing everything but the layout (ATOM and EDGE) from a cell's flags
+_LAYOUT_FLAGS = bytes(flags & (Tracer.ATOM | Tracer.EDGE) for flags in range(256))
 
 class Board():
     """
@@ -7,78 +13,122 @@ class Board():
     play BlackBox.
 
     The Board's primary responsibility is to act as a container for the individual
-    square cells which live inside it and make up the game. It instantiates them
-    telling each of them at the time they are born whether or not they contain
-    atoms.
+    square cells which live inside it and make up the game. It keeps the state of
+    every cell in a flat grid of flags (indexed by row * size + column) telling each
+    cell at the time the board is built whether or not it contains an atom, and hands
+    out lightweight Square views onto that grid as they are asked for.
 
     Because the board contains crucial game information it must interact with the
     overarching BlackBoxGame class by providing it squares or the entire board as it
     requests them.
     """
-    def __init__(self, number_of_atoms):
+    def __init__(self, number_of_atoms, size=10, atom_positions=None, rng=random):
         """
         __init__ - initalizes an instance of the board
-        :param atoms:   a list of the locations on the board where
-                        "atoms will be placed
-        :type atoms:    List[tuples]
+        :param number_of_atoms: the number of atoms to be placed on the board
+        :type number_of_atoms:  int
+        :param size: the number of rows (and columns) of the board, edges included
+        :type size: int
+        :param atom_positions: where to place the atoms - placed randomly if None
+        :type atom_positions: List[[row, column]]
+        :param rng: the source of randomness atoms are placed with - a random.Random, or the
+                    random module itself
+        :raises ValueError: if the board cannot be built - too few atoms or too many, a board
+                            smaller than three squares, or atom positions which do not fit it
         """
         if number_of_atoms < 1:
-            print("Please enter one or more atoms")
-            return None
+            raise ValueError("a board holds one or more atoms")
+        if size < 3:
+            raise ValueError("a board has a size of three or more")
+        if number_of_atoms > Layouts.interior_size(size):
+            raise ValueError(f"a {size}x{size} board holds no more atoms than the "
+                             f"{Layouts.interior_size(size)} squares inside its edges")
+        self._size = size
         self._atoms = number_of_atoms
-        self._atom_positions = self.position_atoms()
+        if atom_positions is None:
+            atom_positions = self.position_atoms(rng)
+        self._atom_positions = [list(position) for position in atom_positions]
+        self.check_positions(self._atom_positions)
         # logic around atoms and square types
-        self._board = self.build_board(self._atom_positions)
+        self._cells = self.build_board(self._atom_positions)
+
+        # the atoms again as a bitboard - bit row * size + column is set for each atom
+        self._atom_mask = 0
+        for row, column in self._atom_positions:
+            self._atom_mask |= 1 << (row * size + column)
+
+        # rays fired from and terminating at each square, keyed by the square's index in _cells
+        self._originating_rays = {}
+        self._terminating_rays = {}
+
+    def check_positions(self, atom_positions):
+        """
+        check_positions - checks that there is one atom position for each atom, each inside the
+        edges and no two the same
+
+        :param atom_positions: where the atoms are to be placed
+        :type atom_positions: List[[row, column]]
+        :raises ValueError: if they cannot be the atoms of the board
+        """
+        size = self._size
+        if len(atom_positions) != self._atoms:
+            raise ValueError(f"{len(atom_positions)} atom positions given for {self._atoms} atoms")
+
+        seen = set()
+        for row, column in atom_positions:
+            if not (0 < row < size - 1 and 0 < column < size - 1):
+                raise ValueError(f"atoms can only be placed inside the edges, not at ({row}, {column})")
+            if (row, column) in seen:
+                raise ValueError(f"two atoms cannot be placed at ({row}, {column})")
+            seen.add((row, column))
 
-    def position_atoms(self):
-        """position_atoms - generate random positions for 
-        the number of atoms provided
+    def position_atoms(self, rng=random):
+        """position_atoms - generate random positions for
+        the number of atoms provided, no two in the same square
 
-        @param number_of_atoms: The number of atoms to be placed on the board
-        @type number_of_atoms: int
+        @param rng: The source of randomness
+        @type rng: random.Random
 
         @return: Array of Atom Positions
         @rtype : List[(tuples)]
         """
-        atoms = []
-        for i in range(self._atoms):
-            x = random.randint(1,8)
-            y = random.randint(1,8)
-            atoms.append([x,y])
-        return atoms
-    
+        return Layouts.positions(Layouts.random_layout(rng, self._atoms, self._size), self._size)
+
     def build_board(self, atom_positions):
         """
-        build_board - assembles an instance of the board object with
+        build_board - assembles the flat grid of cell flags for the board with
         atoms at the locations passed in atom_positions
 
         :param atom_positions: a list of the places where atoms will be placed
         :type atom_positions: List[tuples]
-        :return: board - the assembled board [nested array of Square objects] with atoms in place
-        :rtype:  List[List[]]
+        :return: cells - the Tracer ATOM / EDGE flags of every cell, indexed by row * size + column
+        :rtype:  bytearray
         """
-        board = []
+        size = self._size
+        last = size - 1
+        cells = bytearray(size * size)
 
-        # nested loops to create nested arrays
-        for row in range(10):
-            board.append([])
-            for column in range(10):
-                #
-                square = Square(row,column)
-                board[row].append(square)
-                if [row,column] in atom_positions:
-                    square.set_atom(True)
+        # the first and last rows and columns are edges - except for the four corners
+        cells[1:last] = bytes([Tracer.EDGE]) * (size - 2)
+        cells[last * size + 1:last * size + last] = bytes([Tracer.EDGE]) * (size - 2)
+        for row in range(1, last):
+            cells[row * size] = Tracer.EDGE
+            cells[row * size + last] = Tracer.EDGE
 
-        return board
+        for row, column in atom_positions:
+            cells[row * size + column] |= Tracer.ATOM
+
+        return cells
 
     def get_board(self):
         """
-        get_board - returns the board object
+        get_board - returns the board as rows of Square views, created on request
 
-        :return: _board - two dimensional array populated with Square Objects
+        :return: two dimensional array populated with Square Objects
         :rtype: List[List[Object(Square)]]
         """
-        return self._board
+        return [[Square(row, column, self) for column in range(self._size)]
+                for row in range(self._size)]
 
     def get_board_square(self, square_coordinates):
         """
@@ -88,12 +138,162 @@ class Board():
         :type square_coordinates: tuple(ints)
         :return: the square object at that location
         :rtype: Object(Square)
+        :raises IndexError: if the square is not on the board - its flat index would otherwise
+                            alias another square's
         """
         row = square_coordinates[0]
         column = square_coordinates[1]
 
-        return self._board[row][column]
+        if not (0 <= row < self._size and 0 <= column < self._size):
+            raise IndexError(f"({row}, {column}) is not on the {self._size}x{self._size} board")
+
+        if Instrumentation.active is not None:
+            Instrumentation.active.increment("square_lookups")
+
+        return Square(row, column, self)
+
+    def get_edges(self):
+        """
+        get_edges - returns the coordinates of every edge square (those rays can be fired from)
+
+        :return: [(row, column), ...] in row major order
+        :rtype: List[tuple(int, int)]
+        """
+        last = self._size - 1
+        edges = [(0, column) for column in range(1, last)]
+        for row in range(1, last):
+            edges.append((row, 0))
+            edges.append((row, last))
+        edges.extend((last, column) for column in range(1, last))
+
+        return edges
+
+    def get_cells(self):
+        """
+        get_cells - returns the flat grid of cell flags used by the ray tracing engine
+
+        :return: _cells
+        :rtype: bytearray
+        """
+        return self._cells
+
+    def set_flag(self, index, flag, status):
+        """
+        set_flag - sets or clears one of the Tracer flags of a cell
+
+        :param index: the cell's index in the flat grid
+        :type index: int
+        :param flag: Tracer.ATOM, Tracer.EDGE or Tracer.SELECTED
+        :type flag: int
+        :param status: whether the flag is set
+        :type status: Bool
+        """
+        if flag == Tracer.ATOM and bool(status) != bool(self._cells[index] & Tracer.ATOM):
+            # an atom added or removed (see Editor) - the other records of the atoms follow it
+            position = list(divmod(index, self._size))
+            if status:
+                self._atom_mask |= 1 << index
+                self._atom_positions.append(position)
+                self._atoms += 1
+            else:
+                self._atom_mask &= ~(1 << index)
+                if position in self._atom_positions:
+                    self._atom_positions.remove(position)
+                self._atoms -= 1
+
+        if status:
+            self._cells[index] |= flag
+        else:
+            self._cells[index] &= ~flag
+
+    def get_atom_mask(self):
+        """
+        get_atom_mask - returns the atoms on the board as a bitboard
+
+        :return: an int with bit row * size + column set for each atom
+        :rtype: int
+        """
+        return self._atom_mask
+
+    def copy(self):
+        """
+        copy - returns a new board with the same atoms, and no rays fired or squares selected
+
+        :return: the copy
+        :rtype: Object(Board)
+        """
+        board = Board.__new__(Board)
+        board._size = self._size
+        board._atoms = self._atoms
+        board._atom_positions = [list(position) for position in self._atom_positions]
+        # selections are not part of the layout
+        board._cells = self._cells.translate(_LAYOUT_FLAGS)
+        board._atom_mask = self._atom_mask
+        board._originating_rays = {}
+        board._terminating_rays = {}
+
+        return board
+
+    def clone(self):
+        """
+        clone - returns a new board in the same state, sharing the (unchanging) rays fired so far
+
+        :return: the clone
+        :rtype: Object(Board)
+        """
+        board = Board.__new__(Board)
+        board._size = self._size
+        board._atoms = self._atoms
+        board._atom_positions = [list(position) for position in self._atom_positions]
+        board._cells = bytearray(self._cells)
+        board._atom_mask = self._atom_mask
+        board._originating_rays = dict(self._originating_rays)
+        board._terminating_rays = dict(self._terminating_rays)
+
+        return board
+
+    def __eq__(self, other):
+        """
+        __eq__ - boards are equal when they are the same size with atoms in the same places
+        """
+        if not isinstance(other, Board):
+            return NotImplemented
+
+        return self._size == other._size and self._atom_mask == other._atom_mask
+
+    def __hash__(self):
+        """
+        __hash__ - hashes the board's layout (and so changes if atoms are added or removed)
+        """
+        return hash((self._size, self._atom_mask))
+
+    def get_originating_rays(self):
+        """
+        get_originating_rays - returns the rays fired from each square keyed by the square's index
+        """
+        return self._originating_rays
+
+    def get_terminating_rays(self):
+        """
+        get_terminating_rays - returns the rays terminating at each square keyed by the square's index
+        """
+        return self._terminating_rays
+
+    def get_size(self):
+        """
+        get_size - returns the number of rows (and columns) of the board
+
+        :return: size
+        :rtype: int
+        """
+        return self._size
 
     def get_atoms(self):
         return self._atom_positions
-        
+
+    def get_atom_count(self):
+        """
+        get_atom_count - returns the number of atoms placed on the board (guessed or not)
+        """
+        return self._atoms
+
@@ -0,0 +1,180 @@
+"""
+Editor - keeps the outcome of the ray from every edge square of a board current while atoms are
+added and removed, for designing puzzles.
+
+Tracing every edge again after each edit would cost 4 * (size - 2) traces. Instead the editor
+records the path of each edge's ray, and for every cell the rays which looked at it. A trace only
+ever reads cells around those the ray moves from - the cell ahead, its two diagonals and, after a
+turn, the cell beside - so a ray can only change when an atom is added or removed next to one of
+them, and an edit re-traces just those rays.
+
+    editor = Editor.PuzzleEditor(board)
+    editor.toggle_atom(4, 5)    # the edge squares whose rays were re-traced
+    editor.get_exit(0, 3)       # (outcome, square, path) as from BlackBoxGame.get_exit
+"""
+import Tracer
+
+
+class PuzzleEditor():
+    """
+    PuzzleEditor - the ray from every edge square of a board being edited, and the cells each one
+    depends on
+    """
+    def __init__(self, board, game=None):
+        """
+        __init__ - traces the ray from every edge square of a board
+
+        :param board: the board to edit
+        :type board: Object(Board)
+        :param game: the game the board belongs to, if any - the entries of its exit table are
+                     dropped as edits change them (see BlackBoxGame.forget_exits), and its log
+                     records the edited atoms
+        :type game: Object(BlackBoxGame)
+        """
+        self._board = board
+        self._game = game
+        size = board.get_size()
+        self._size = size
+
+        # the interior cells around each cell - the only ones an atom can be added to
+        last = size - 1
+        self._around = []
+        for index in range(size * size):
+            row, column = divmod(index, size)
+            self._around.append([near_row * size + near_column
+                                 for near_row in range(max(row - 1, 1), min(row + 2, last))
+                                 for near_column in range(max(column - 1, 1), min(column + 2, last))
+                                 if (near_row, near_column) != (row, column)])
+
+        # the (outcome, terminus, path) of each edge's ray as flat indices, the cells each ray
+        # looked at, and the rays which looked at each cell
+        self._exits = {}
+        self._reads = {}
+        self._watchers = [set() for _ in range(size * size)]
+        # the number of rays traced since the board was first traced
+        self._retraced = 0
+
+        self._edges = [row * size + column for row, column in board.get_edges()]
+        for origin in self._edges:
+            self._trace(origin)
+
+    def get_board(self):
+        return self._board
+
+    def get_retraced_count(self):
+        """
+        get_retraced_count - returns the number of rays re-traced by edits so far
+        """
+        return self._retraced
+
+    def set_atom(self, row, column, status):
+        """
+        set_atom - adds or removes an atom, re-tracing the rays it could change
+
+        :param status: whether the square holds an atom
+        :type status: Bool
+        :raises ValueError: if the square is not inside the edges
+        :return: the edge squares whose rays were re-traced (including any which are unchanged)
+        :rtype: List[tuple(int, int)]
+        """
+        size = self._size
+        if not (0 < row < size - 1 and 0 < column < size - 1):
+            raise ValueError(f"atoms can only be placed inside the edges, not at ({row}, {column})")
+
+        square = self._board.get_board_square((row, column))
+        if square.is_atom() == bool(status):
+            return []
+        square.set_atom(status)
+
+        origins = sorted(self._watchers[row * size + column])
+        for origin in origins:
+            self._untrace(origin)
+            self._trace(origin)
+        self._retraced += len(origins)
+
+        squares = [divmod(origin, size) for origin in origins]
+        if self._game is not None:
+            self._game.forget_exits(squares)
+            # the log records the edited atoms, so that replaying it rebuilds the edited board
+            log = self._game.get_log()
+            layout = log.get_layout()
+            if layout is None:
+                layout = Tracer.mask_to_layout(self._board.get_atom_mask(), size)
+            else:
+                layout ^= 1 << ((row - 1) * (size - 2) + column - 1)
+            log.set_layout(self._board.get_atom_count(), layout)
+
+        return squares
+
+    def toggle_atom(self, row, column):
+        """
+        toggle_atom - adds an atom if the square is empty or removes the one in it (see set_atom)
+        """
+        return self.set_atom(row, column, not self._board.get_board_square((row, column)).is_atom())
+
+    def get_exit(self, origin_row, origin_column):
+        """
+        get_exit - returns the outcome of the ray from an edge square on the board as it now is
+
+        :return: (outcome, square, path) as from BlackBoxGame.trace_ray
+        :rtype: tuple(String, tuple(int, int), list[tuple(int, int)])
+        """
+        size = self._size
+        outcome, terminus, path = self._exits[origin_row * size + origin_column]
+
+        return (outcome, divmod(terminus, size), [divmod(position, size) for position in path])
+
+    def get_outcomes(self):
+        """
+        get_outcomes - returns the outcome and terminus of the ray from every edge square, without
+        their paths
+
+        :return: {(row, column): (outcome, (row, column))}
+        :rtype: dict[tuple(int, int), tuple(String, tuple(int, int))]
+        """
+        size = self._size
+
+        return {divmod(origin, size): (self._exits[origin][0], divmod(self._exits[origin][1], size))
+                for origin in self._edges}
+
+    def get_signature(self):
+        """
+        get_signature - returns the outcome of the ray from every edge square encoded as by
+        Tracer.signature, for looking the puzzle up in a signature table (see SignatureFile)
+
+        :rtype: bytes
+        """
+        numbers = {origin: number for number, origin in enumerate(self._edges)}
+
+        return bytes(Tracer.HIT_CODE if self._exits[origin][0] == Tracer.HIT else numbers[self._exits[origin][1]]
+                     for origin in self._edges)
+
+    def _trace(self, origin):
+        """
+        _trace - traces the ray from an edge cell, recording the cells it looked at
+        """
+        board = self._board
+        size = self._size
+        if size <= Tracer.BITBOARD_MAX_SIZE:
+            entry = Tracer.trace_mask(board.get_atom_mask(), size, origin)
+        else:
+            entry = Tracer.trace(board.get_cells(), size, origin)
+        self._exits[origin] = entry
+
+        # every cell the ray moved from - all of its path but the edge it leaves by, if any
+        outcome, _, path = entry
+        moved_from = path if outcome == Tracer.HIT or len(path) == 1 else path[:-1]
+
+        reads = set()
+        for position in moved_from:
+            reads.update(self._around[position])
+        for cell in reads:
+            self._watchers[cell].add(origin)
+        self._reads[origin] = reads
+
+    def _untrace(self, origin):
+        """
+        _untrace - forgets the cells a ray looked at, before it is traced again
+        """
+        for cell in self._reads.pop(origin):
+            self._watchers[cell].discard(origin)
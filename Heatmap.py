@@ -0,0 +1,149 @@
+"""
+Heatmap - the probability of each square of a game holding an atom, given the rays fired and the
+guesses made so far.
+
+Every layout still consistent with the game is taken to be equally likely, and a square's
+probability is the fraction of them with an atom in it. The layouts are held by a Belief, which
+keeps a count of the candidates with an atom in each cell as candidates are dropped and drawn -
+so an action costs the work of filtering the candidates once, not a pass over every consistent
+layout each time the probabilities are read.
+
+Headlessly:
+
+    heatmap = Heatmap.Heatmap(game)
+    game.shoot_ray(0, 3)
+    heatmap.update()
+    heatmap.probabilities()    # size x size array, 0 on the edges
+
+HeatmapWorker keeps the work off a thread which must not stall - the game's renderer hands it a
+clone of the game after each action and is called back when the new probabilities are ready.
+
+Needs NumPy.
+"""
+import threading
+
+import Belief
+import Hints
+
+
+class Heatmap():
+    """
+    Heatmap - the atom probabilities of one game's squares
+    """
+    def __init__(self, game, sample_size=Belief.SAMPLE_SIZE, rng=None, table=None):
+        """
+        __init__ - initializes a heatmap for a game, taking in any actions already made
+
+        :param game: the game to follow
+        :type game: Object(BlackBoxGame)
+        :param sample_size: see Belief.Belief
+        :type sample_size: int
+        :param rng: the source of randomness the belief samples layouts with
+        :type rng: random.Random
+        :param table: the signature table the belief finds layouts in (see Belief.Belief)
+        :type table: Object(SignatureFile.SignatureFile) or None or False
+        """
+        self._hints = Hints.HintEngine(game, sample_size, rng, table)
+
+    def get_hints(self):
+        return self._hints
+
+    def update(self, game=None):
+        """
+        update - takes the results of any actions made since the last update into the heatmap
+
+        :param game: a later copy of the game to follow from now on (see Hints.HintEngine.update)
+        :type game: Object(BlackBoxGame)
+        """
+        self._hints.update(game)
+
+    def probabilities(self):
+        """
+        probabilities - returns the probability of each square holding an atom
+
+        :return: indexed by [row, column]
+        :rtype: np.ndarray[float] of shape (size, size)
+        """
+        belief = self._hints.get_belief()
+        size = belief.get_size()
+
+        return belief.marginals().reshape(size, size)
+
+
+class HeatmapWorker():
+    """
+    HeatmapWorker - keeps a Heatmap up to date on a thread of its own.
+
+    Games handed to submit are copies owned by the worker, so the thread playing the game never
+    shares state with it. When several arrive before the worker is free only the latest is
+    taken in - it holds every action of the ones before it.
+    """
+    def __init__(self, game, ready=None, **options):
+        """
+        __init__ - starts a worker for a game
+
+        :param game: a copy of the game (see BlackBoxGame.clone) for the worker to own
+        :type game: Object(BlackBoxGame)
+        :param ready: called on the worker's thread each time new probabilities are ready
+        :type ready: callable()
+        :param options: passed on to Heatmap
+        """
+        self._ready = ready
+        self._options = options
+        self._condition = threading.Condition()
+        self._pending = game
+        self._probabilities = None
+        self._stopped = False
+
+        self._thread = threading.Thread(target=self._run, name="heatmap", daemon=True)
+        self._thread.start()
+
+    def submit(self, game):
+        """
+        submit - hands the worker a copy of the game taken after its latest action
+
+        :type game: Object(BlackBoxGame)
+        """
+        with self._condition:
+            self._pending = game
+            self._condition.notify()
+
+    def probabilities(self):
+        """
+        probabilities - returns the latest probabilities worked out (see Heatmap.probabilities),
+        or None if none are ready yet
+        """
+        with self._condition:
+            return self._probabilities
+
+    def stop(self):
+        """
+        stop - stops the worker once it has finished any update it is part way through
+        """
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+
+    def _run(self):
+        heatmap = None
+
+        while True:
+            with self._condition:
+                while self._pending is None and not self._stopped:
+                    self._condition.wait()
+                if self._stopped:
+                    return
+                game = self._pending
+                self._pending = None
+
+            if heatmap is None:
+                heatmap = Heatmap(game, **self._options)
+            else:
+                heatmap.update(game)
+            probabilities = heatmap.probabilities()
+
+            with self._condition:
+                self._probabilities = probabilities
+
+            if self._ready is not None:
+                self._ready()
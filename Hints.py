@@ -0,0 +1,114 @@
+"""
+Hints - ranks the edge squares a player could fire from next by the information each is expected
+to give about where the atoms are.
+
+Every layout still consistent with the game so far is taken to be equally likely, so firing from
+an edge is expected to give the entropy of its outcome over those layouts - nothing if every
+layout agrees on it, and most when its possible outcomes split them evenly. The layouts are held
+by a Belief, which the engine keeps in step with the game by reading only the actions added to
+the game's log since it last looked.
+
+    engine = Hints.HintEngine(game)
+    engine.rank()    # [((row, column), expected bits), ...] best first
+
+Needs NumPy.
+"""
+import ActionLog
+import Belief
+import Tracer
+
+
+class HintEngine():
+    """
+    HintEngine - the belief about one game's atoms, and the hints drawn from it
+    """
+    def __init__(self, game, sample_size=Belief.SAMPLE_SIZE, rng=None, table=None):
+        """
+        __init__ - initializes an engine for a game, taking in any actions already made
+
+        :param game: the game to give hints for
+        :type game: Object(BlackBoxGame)
+        :param sample_size: see Belief.Belief
+        :type sample_size: int
+        :param rng: the source of randomness the belief samples layouts with
+        :type rng: random.Random
+        :param table: the signature table the belief finds layouts in (see Belief.Belief)
+        :type table: Object(SignatureFile.SignatureFile) or None or False
+        """
+        board = game.get_board()
+        self._game = game
+        self._belief = Belief.Belief(board.get_atom_count(), board.get_size(), sample_size, rng, table)
+
+        # the position in the game's log after the actions already taken into the belief
+        self._seen = 0
+        self._fired = set()
+
+        self.update()
+
+    def get_belief(self):
+        return self._belief
+
+    def update(self, game=None):
+        """
+        update - takes the results of any shots and guesses made since the last update into the
+        belief
+
+        :param game: a later copy of the engine's game (see BlackBoxGame.clone) to follow from now
+                     on, for an engine kept off the thread the game is played on
+        :type game: Object(BlackBoxGame)
+        """
+        if game is not None:
+            self._game = game
+        game = self._game
+        board = game.get_board()
+        size = board.get_size()
+        cells = board.get_cells()
+        log = game.get_log()
+
+        for kind, row, column in log.actions(self._seen):
+            index = row * size + column
+
+            if kind == ActionLog.GUESS:
+                # the player learns whether the square holds an atom either way
+                self._belief.add_guess(row, column, cells[index] & Tracer.ATOM)
+                continue
+
+            if not cells[index] & Tracer.EDGE or index in self._fired:
+                continue
+            self._fired.add(index)
+
+            outcome, terminus, _ = game.get_exit(row, column)
+            self._belief.add_ray(row, column, None if outcome == Tracer.HIT else terminus)
+
+        self._seen = log.get_end()
+
+    def rank(self):
+        """
+        rank - returns every edge square not yet fired from with the information a ray from it is
+        expected to give, best first
+
+        :return: [((row, column), expected information in bits), ...]
+        :rtype: List[tuple(tuple(int, int), float)]
+        """
+        self.update()
+        size = self._belief.get_size()
+        entropies = self._belief.outcome_entropy()
+
+        ranking = [(divmod(int(edge), size), float(bits))
+                   for edge, bits in zip(self._belief.get_edges(), entropies) if int(edge) not in self._fired]
+        ranking.sort(key=lambda hint: -hint[1])
+
+        return ranking
+
+    def best(self):
+        """
+        best - returns the edge square a ray is expected to tell the most from, or None if none
+        is expected to tell anything
+
+        :rtype: tuple(int, int) or None
+        """
+        ranking = self.rank()
+        if not ranking or ranking[0][1] <= 0:
+            return None
+
+        return ranking[0][0]
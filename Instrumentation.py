@@ -0,0 +1,191 @@
+"""
+Instrumentation - optional counters and timers for the hot paths of the game.
+
+Instrumentation is off unless enable is called (or the BLACKBOX_STATS environment variable names a
+file to dump to), and while it is off the instrumented code only checks that `active` is None.
+When on, a single process wide Stats object counts the work done tracing rays (rays, steps,
+deflections, reflections, absorptions), board square lookups, and times game actions, rendering
+and input handling. Its snapshot can be queried at any time and is appended to a JSON-lines file
+every interval seconds.
+
+The ray counters count the rays the engine traces, not the shots fired. A game traces an edge the
+first time it is shot and answers every later shot from it out of its exit table (see
+BlackBoxGame.get_exit), so repeated shots add nothing to rays_traced, ray_steps and the rest. The
+count of the shoot_ray timing is the number of shots.
+"""
+import os
+import time
+
+import Tracer
+
+# the Stats being recorded to, or None when instrumentation is off
+active = None
+
+
+def enable(dump_path=None, interval=60.0):
+    """
+    enable - turns instrumentation on, starting from empty statistics
+
+    :param dump_path: a file to append a JSON line of statistics to every interval seconds
+    :type dump_path: String
+    :param interval: seconds between dumps
+    :type interval: float
+    :return: the statistics being recorded
+    :rtype: Object(Stats)
+    """
+    global active
+    active = Stats(dump_path, interval)
+
+    return active
+
+
+def disable():
+    """
+    disable - turns instrumentation off, writing a final dump if one is configured
+    """
+    global active
+    if active is not None:
+        active.dump()
+    active = None
+
+
+def get_stats():
+    """
+    get_stats - returns the statistics being recorded, or None when instrumentation is off
+    """
+    return active
+
+
+def enable_from_environment():
+    """
+    enable_from_environment - turns instrumentation on if the BLACKBOX_STATS environment variable
+    names a dump file (BLACKBOX_STATS_INTERVAL optionally giving the seconds between dumps)
+    """
+    path = os.environ.get("BLACKBOX_STATS")
+    if path:
+        return enable(path, float(os.environ.get("BLACKBOX_STATS_INTERVAL", 60.0)))
+
+    return None
+
+
+class Stats():
+    """
+    Stats - counters, a histogram of ray lengths and timings of named operations
+    """
+    def __init__(self, dump_path=None, interval=60.0):
+        # imported here (as json is in dump) so that the engine, which imports this module, does
+        # not pay for them at start up while instrumentation is off
+        import collections
+
+        self._dump_path = dump_path
+        self._interval = interval
+        self._started = time.time()
+        self._next_dump = time.monotonic() + interval
+
+        self._counters = collections.Counter()
+        # the number of rays traced which took each number of steps
+        self._steps = collections.Counter()
+        # [count, total seconds, fastest, slowest] for each timed operation
+        self._timings = {}
+
+    def increment(self, name, amount=1):
+        """
+        increment - adds to a named counter
+        """
+        self._counters[name] += amount
+
+    def record_time(self, name, seconds):
+        """
+        record_time - records how long one run of a named operation took
+        """
+        timing = self._timings.get(name)
+        if timing is None:
+            self._timings[name] = [1, seconds, seconds, seconds]
+        else:
+            timing[0] += 1
+            timing[1] += seconds
+            if seconds < timing[2]:
+                timing[2] = seconds
+            if seconds > timing[3]:
+                timing[3] = seconds
+
+        if self._dump_path is not None and time.monotonic() >= self._next_dump:
+            self.dump()
+
+    def record_trace(self, outcome, terminus, path):
+        """
+        record_trace - records a ray traced by the Tracer engine
+
+        Every deflection changes the ray's direction and is followed by a step in its new direction,
+        so deflections are counted as the changes of direction along its path (and into the atom
+        it strikes, if any).
+
+        :param outcome: Tracer.HIT, Tracer.REFLECTION or Tracer.EXIT
+        :param terminus: flat index of the atom struck or edge left by
+        :param path: flat indices of the cells the ray travelled through
+        """
+        counters = self._counters
+        counters["rays_traced"] += 1
+        steps = len(path) - 1
+        counters["ray_steps"] += steps
+        self._steps[steps] += 1
+
+        cells = path if path[-1] == terminus else path + [terminus]
+        deflections = 0
+        step = None
+        for index in range(1, len(cells)):
+            next_step = cells[index] - cells[index - 1]
+            if step is not None and next_step != step:
+                deflections += 1
+            step = next_step
+        counters["deflections"] += deflections
+
+        if outcome == Tracer.HIT:
+            counters["absorptions"] += 1
+        elif outcome == Tracer.REFLECTION:
+            counters["reflections"] += 1
+        else:
+            counters["exits"] += 1
+
+    def snapshot(self):
+        """
+        snapshot - returns the statistics recorded so far
+
+        :rtype: dict
+        """
+        rays = self._counters["rays_traced"]
+        timings = {}
+        for name, (count, total, fastest, slowest) in self._timings.items():
+            timings[name] = {"count": count, "total_seconds": total, "mean_seconds": total / count,
+                             "min_seconds": fastest, "max_seconds": slowest}
+
+        return {
+            "time": time.time(),
+            "uptime_seconds": time.time() - self._started,
+            "counters": dict(self._counters),
+            "mean_steps_per_ray": self._counters["ray_steps"] / rays if rays else 0.0,
+            "max_steps_per_ray": max(self._steps) if self._steps else 0,
+            "timings": timings,
+        }
+
+    def dump(self, path=None):
+        """
+        dump - appends the current snapshot as one JSON line to path (or the configured dump file)
+        """
+        path = path or self._dump_path
+        self._next_dump = time.monotonic() + self._interval
+        if path is None:
+            return
+
+        import json
+
+        with open(path, "a") as dump_file:
+            dump_file.write(json.dumps(self.snapshot()) + "\n")
+
+    def reset(self):
+        """
+        reset - clears every statistic
+        """
+        self._counters.clear()
+        self._steps.clear()
+        self._timings.clear()
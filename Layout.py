@@ -0,0 +1,89 @@
+class BoardLayout():
+    """
+    BoardLayout - the geometry of the board as drawn on screen, shared by the renderer (which asks
+    where each square is drawn) and the input handler (which asks which square a pixel is in).
+
+    Squares are laid out in a grid with a margin between them, rows running across the screen and
+    columns down it. Both questions are answered with arithmetic alone, so neither depends on
+    the number of squares on the board.
+    """
+    def __init__(self, board_size, square_width, square_height, margin, origin=(0, 0)):
+        """
+        __init__ - initializes a layout
+
+        :param board_size: the number of rows (and columns) of the board
+        :type board_size: int
+        :param square_width: the width of a square in pixels
+        :type square_width: float
+        :param square_height: the height of a square in pixels
+        :type square_height: float
+        :param margin: the space between squares (and before the first one) in pixels
+        :type margin: float
+        :param origin: the pixel the layout starts from
+        :type origin: tuple(int, int)
+        """
+        self._board_size = board_size
+        self._square_width = square_width
+        self._square_height = square_height
+        self._margin = margin
+        self._origin = origin
+
+        # the distance from the start of one square to the start of the next
+        self._pitch = margin + square_width
+
+    @classmethod
+    def fit(cls, board_size, width, height):
+        """
+        fit - returns the layout spreading a board across the width of a width x height window,
+        with the remaining margin shared out between the squares
+
+        :rtype: Object(BoardLayout)
+        """
+        square_width = width / (board_size + 1)
+        square_height = height / (board_size + 2)
+        margin = (width - board_size * square_width) / (board_size + 1)
+
+        return cls(board_size, square_width, square_height, margin)
+
+    def get_board_size(self):
+        return self._board_size
+
+    def square_rect(self, row, column):
+        """
+        square_rect - returns the rectangle a square is drawn in
+
+        :return: (x, y, width, height) in whole pixels
+        :rtype: tuple(int, int, int, int)
+        """
+        x_draw = self._origin[0] + self._pitch * row + self._margin
+        y_draw = self._origin[1] + self._pitch * column + self._margin
+
+        return (int(x_draw), int(y_draw), int(self._square_width), int(self._square_height))
+
+    def square_at(self, x, y):
+        """
+        square_at - returns the square drawn at a pixel
+
+        :return: (row, column), or None if the pixel is in a margin or off the board
+        :rtype: tuple(int, int) or None
+        """
+        # squares start at whole pixels rounded down, so a pixel up to one before a square's
+        # exact start may already be inside it
+        row = int((x + 1 - self._origin[0] - self._margin) // self._pitch)
+        column = int((y + 1 - self._origin[1] - self._margin) // self._pitch)
+
+        if not (0 <= row < self._board_size and 0 <= column < self._board_size):
+            return None
+
+        # the point may still be in the margin after the square
+        rect_x, rect_y, rect_width, rect_height = self.square_rect(row, column)
+        if rect_x <= x < rect_x + rect_width and rect_y <= y < rect_y + rect_height:
+            return (row, column)
+
+        return None
+
+    def board_bottom(self):
+        """
+        board_bottom - returns the first pixel row below the board
+        """
+        return int(self._origin[1] + self._pitch * self._board_size + self._margin)
@@ -0,0 +1,280 @@
+"""
+LayoutSearch - finds every atom layout consistent with a game's shots and guesses by scanning the
+ranked layout space across a pool of worker processes, for grading archived games.
+
+The observations first fix what they force (see Solver.get_known): the cell in front of every ray
+which was not a hit is empty, and so on. What is left is C(free cells, atoms not yet fixed)
+layouts - at most the C(64, k) of a ten by ten board - ranked as in Layouts and split into ranges
+of chunk_size ranks. Each worker deposits the bits of a rank into the free cells with a table a
+byte at a time and traces the observed rays across the result, keeping the layouts which agree.
+
+Ranges are handed out a few per worker at a time and their layouts streamed back in rank order,
+so memory stays bounded however many layouts agree, and stopping early (after a limit, or by
+closing the generator) stops handing them out without scanning the rest:
+
+    rays, guesses = LayoutSearch.observations(game)
+    for mask in LayoutSearch.search(4, rays, guesses, limit=2):
+        ...
+
+A search starts a pool of its own unless given one. Searching many games, start one pool and pass
+it to every search - each range is sent with its game's plan, so the workers serve any game:
+
+    with multiprocessing.Pool(8) as pool:
+        counts = [sum(1 for _ in LayoutSearch.search(4, *observations, workers=8, pool=pool))
+                  for observations in games]
+
+    python LayoutSearch.py games.bbl --workers 8    # how many archived games had one answer
+"""
+import collections
+import math
+import multiprocessing
+import os
+import time
+
+import Layouts
+import Solver
+import Tracer
+
+# ranks scanned by a worker at a time
+CHUNK_SIZE = 50000
+
+# ranges waiting or being scanned per worker, bounding the layouts held before they are consumed
+CHUNKS_PER_WORKER = 2
+
+
+def observations(game):
+    """
+    observations - returns the shots and guesses made in a game, as search takes them
+
+    :param game: the game
+    :type game: Object(BlackBoxGame)
+    :return: (rays, guesses) - [(row, column, result of shoot_ray)], [(row, column, result of guess_atom)]
+    :rtype: tuple(List[tuple(int, int, tuple(int, int) or None)], List[tuple(int, int, Bool)])
+    """
+    board = game.get_board()
+    size = board.get_size()
+
+    rays = []
+    for index in board.get_originating_rays():
+        row, column = divmod(index, size)
+        outcome, terminus, _ = game.get_exit(row, column)
+        rays.append((row, column, None if outcome == Tracer.HIT else tuple(terminus)))
+
+    cells = board.get_cells()
+    guesses = [(row, column, bool(cells[row * size + column] & Tracer.ATOM)) for row, column in game.get_guesses()]
+
+    return (rays, guesses)
+
+
+def plan(atom_count, rays, guesses=(), size=10):
+    """
+    plan - works out the space left to scan once the observations have fixed what they force
+
+    :return: None if the observations contradict each other, otherwise (size, rays as (origin,
+             terminus or None for a hit) flat indices, bitboard of the atoms fixed, number of
+             atoms left to place, number of free cells, deposit tables) - the tables map each
+             byte of a rank's bits to the atoms it places on the board
+    :rtype: tuple or None
+    """
+    solver = Solver.Solver(atom_count, size)
+    try:
+        for row, column, result in rays:
+            solver.add_ray(row, column, result)
+        for row, column, result in guesses:
+            solver.add_guess(row, column, result)
+    except Solver.Contradiction:
+        return None
+
+    known = solver.get_known()
+    free = [index for index, state in enumerate(known) if state == Solver.UNKNOWN]
+    placed = 0
+    for index, state in enumerate(known):
+        if state == Solver.ATOM:
+            placed |= 1 << index
+    remaining = atom_count - bin(placed).count("1")
+    if not 0 <= remaining <= len(free):
+        return None
+
+    tables = []
+    for start in range(0, len(free), 8):
+        cells = free[start:start + 8]
+        # each bit doubles the table: the bytes with it set place its cell on top of those without
+        table = [0]
+        for cell in cells:
+            table += [atoms | (1 << cell) for atoms in table]
+        tables.append(table)
+
+    traced = [(row * size + column, None if result is None else result[0] * size + result[1])
+              for row, column, result in rays]
+    # rays which left by another edge are checked first, then reflections and hits last - few
+    # layouts send a ray out of one particular edge, but many have it strike some atom
+    traced.sort(key=lambda ray: (ray[1] is None, ray[1] == ray[0]))
+
+    return (size, traced, placed, remaining, len(free), tables)
+
+
+def scan(search_plan, start, stop):
+    """
+    scan - returns the layouts ranked from start up to (not including) stop which agree with
+    every observed ray
+
+    :return: the agreeing layouts as bitboards, in rank order
+    :rtype: List[int]
+    """
+    size, rays, placed, remaining, free_count, tables = search_plan
+    trace_mask = Tracer.trace_mask
+    hit = Tracer.HIT
+    found = []
+
+    for bits in Layouts.iter_bits(remaining, free_count, start, stop):
+        mask = placed
+        table = 0
+        while bits:
+            mask |= tables[table][bits & 255]
+            bits >>= 8
+            table += 1
+
+        for origin, terminus in rays:
+            outcome, end, _ = trace_mask(mask, size, origin)
+            if (outcome == hit) != (terminus is None) or (terminus is not None and end != terminus):
+                break
+        else:
+            found.append(mask)
+
+    return found
+
+
+def _scan_range(task):
+    return scan(*task)
+
+
+def search(atom_count, rays, guesses=(), size=10, workers=None, chunk_size=CHUNK_SIZE, limit=None, pool=None):
+    """
+    search - yields every layout consistent with the observations, in rank order (which is
+    ascending order of their bitboards), scanning ranges of ranks across a pool of workers
+
+    :param atom_count: the number of atoms on the board
+    :type atom_count: int
+    :param rays: (row, column, result of BlackBoxGame.shoot_ray) of each ray fired
+    :param guesses: (row, column, result of BlackBoxGame.guess_atom) of each guess made
+    :param workers: the number of worker processes - every core if None, and the search runs in
+                    this process if 1. With a pool, the number of processes it has.
+    :type workers: int
+    :param chunk_size: the number of ranks scanned by a worker at a time
+    :type chunk_size: int
+    :param limit: the number of layouts after which to stop - all of them if None
+    :type limit: int
+    :param pool: a pool to scan across, left running afterwards for the next search - otherwise
+                 one is started for this search and terminated when it ends. Ranges already
+                 handed to a pool given when the search stops early are still scanned, and their
+                 layouts dropped.
+    :type pool: Object(multiprocessing.pool.Pool)
+    :return: generator of layouts as bitboards (bit row * size + column set for each atom)
+    :rtype: generator[int]
+    """
+    search_plan = plan(atom_count, rays, guesses, size)
+    if search_plan is None or limit == 0:
+        return
+
+    total = math.comb(search_plan[4], search_plan[3])
+    ranges = ((start, min(start + chunk_size, total)) for start in range(0, total, chunk_size))
+    workers = workers or os.cpu_count() or 1
+
+    if pool is not None:
+        yield from _scan_across(pool, workers, search_plan, ranges, limit)
+        return
+
+    if workers == 1:
+        found = 0
+        for start, stop in ranges:
+            for mask in scan(search_plan, start, stop):
+                yield mask
+                found += 1
+                if found == limit:
+                    return
+        return
+
+    # leaving the with block - when the limit is reached, or the caller stops early - terminates
+    # the workers, abandoning the ranges they were scanning
+    with multiprocessing.Pool(workers) as pool:
+        yield from _scan_across(pool, workers, search_plan, ranges, limit)
+
+
+def _scan_across(pool, workers, search_plan, ranges, limit):
+    """
+    _scan_across - yields the layouts found by scanning ranges across a pool, in rank order, with
+    CHUNKS_PER_WORKER ranges per worker handed out at a time
+    """
+    found = 0
+    pending = collections.deque()
+    for start, stop in ranges:
+        pending.append(pool.apply_async(_scan_range, ((search_plan, start, stop),)))
+        if len(pending) < workers * CHUNKS_PER_WORKER:
+            continue
+
+        for mask in pending.popleft().get():
+            yield mask
+            found += 1
+            if found == limit:
+                return
+
+    while pending:
+        for mask in pending.popleft().get():
+            yield mask
+            found += 1
+            if found == limit:
+                return
+
+
+def is_ambiguous(atom_count, rays, guesses=(), size=10, workers=None):
+    """
+    is_ambiguous - returns whether more than one layout is consistent with the observations,
+    stopping the search as soon as a second is found
+    """
+    return len(list(search(atom_count, rays, guesses, size, workers, limit=2))) > 1
+
+
+def main(argv=None):
+    # imported here so that searches started from other modules do not pay for them
+    import argparse
+
+    import ActionLog
+    import BlackBoxGame_Controller as BlackBoxGame
+
+    parser = argparse.ArgumentParser(description="Count the layouts consistent with each game in an archive.")
+    parser.add_argument("archive", help="file of action logs (see ActionLog)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: every core)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="ranks scanned by a worker at a time")
+    parser.add_argument("--limit", type=int, default=2,
+                        help="layouts to find before a game is counted as ambiguous (0 counts them all)")
+    args = parser.parse_args(argv)
+
+    workers = args.workers or os.cpu_count() or 1
+    # one pool serves every game - starting one per game costs more than most searches take
+    pool = multiprocessing.Pool(workers) if workers > 1 else None
+
+    started = time.perf_counter()
+    games = 0
+    unique = 0
+    try:
+        for log in ActionLog.read_archive(args.archive):
+            game = BlackBoxGame.BlackBoxGame.replay(log)
+            rays, guesses = observations(game)
+            count = sum(1 for _ in search(log.get_atom_count(), rays, guesses, log.get_size(), workers,
+                                          args.chunk_size, args.limit or None, pool))
+            games += 1
+            unique += count == 1
+            print(f"game {games}: {len(rays)} rays, {len(guesses)} guesses - "
+                  f"{count}{'+' if count == args.limit and args.limit > 1 else ''} consistent layouts")
+    finally:
+        if pool is not None:
+            pool.terminate()
+    elapsed = time.perf_counter() - started
+
+    print(f"searched {games} games in {elapsed:.2f}s")
+    if games:
+        print(f"{unique} ({unique / games:.1%}) had a single consistent layout")
+
+
+if __name__ == "__main__":
+    main()
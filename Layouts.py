@@ -0,0 +1,198 @@
+"""
+Layouts - seeded generation and streaming of atom layouts.
+
+A layout is an interior layout mask (bit (row - 1) * (size - 2) + (column - 1) set for each atom, as
+used by the signature tables), so it always has exactly its number of atoms, all distinct, and
+millions can be streamed as plain ints without building a Board or a list for each one.
+
+The layouts of k atoms are ranked 0 .. C(cells, k) - 1 in colexicographic order, which is also the
+ascending order of their masks: unrank jumps straight to any rank, and iter_layouts steps from one
+layout to the next with a handful of integer operations. A board is built from a layout with
+
+    Board.Board(atom_count, size, Layouts.positions(layout, size))
+"""
+import math
+import random
+
+
+def interior_size(size=10):
+    """
+    interior_size - returns the number of cells atoms can be placed in on a board
+    """
+    return (size - 2) * (size - 2)
+
+
+def layout_count(atom_count, size=10):
+    """
+    layout_count - returns the number of distinct layouts of atom_count atoms
+    """
+    return math.comb(interior_size(size), atom_count)
+
+
+def _check(atom_count, size):
+    if not 1 <= atom_count <= interior_size(size):
+        raise ValueError(f"a {size}x{size} board holds between 1 and {interior_size(size)} atoms")
+
+
+def rank(layout):
+    """
+    rank - returns the colexicographic rank of a layout among those with the same number of atoms
+
+    :param layout: interior layout mask
+    :type layout: int
+    :rtype: int
+    """
+    position = 0
+    chosen = 0
+    layout = int(layout)
+    while layout:
+        low = layout & -layout
+        chosen += 1
+        position += math.comb(low.bit_length() - 1, chosen)
+        layout ^= low
+
+    return position
+
+
+def unrank(position, atom_count, size=10):
+    """
+    unrank - returns the layout of atom_count atoms with the given colexicographic rank
+
+    :param position: rank of the layout, from 0 to layout_count(atom_count, size) - 1
+    :type position: int
+    :rtype: int
+    """
+    _check(atom_count, size)
+    if not 0 <= position < layout_count(atom_count, size):
+        raise ValueError(f"rank {position} is out of range for {atom_count} atoms")
+
+    return unrank_bits(position, atom_count, interior_size(size))
+
+
+def iter_layouts(atom_count, size=10, start=0, stop=None):
+    """
+    iter_layouts - streams the layouts of atom_count atoms ranked from start up to (not including)
+    stop, in rank order
+
+    :param stop: the rank to stop at - every remaining layout if None
+    :type stop: int
+    :return: generator of interior layout masks
+    :rtype: generator[int]
+    """
+    _check(atom_count, size)
+
+    return iter_bits(atom_count, interior_size(size), start, stop)
+
+
+def unrank_bits(position, count, width):
+    """
+    unrank_bits - returns the int of count bits set out of the lowest width with the given
+    colexicographic rank - unrank for any number of cells, not only a board's interior
+
+    :rtype: int
+    """
+    if not 0 <= position < math.comb(width, count):
+        raise ValueError(f"rank {position} is out of range for {count} of {width} bits")
+
+    bits = 0
+    cell = width
+    for chosen in range(count, 0, -1):
+        # the highest cell still free whose count of lower ranked layouts fits in what is left
+        cell -= 1
+        while math.comb(cell, chosen) > position:
+            cell -= 1
+        position -= math.comb(cell, chosen)
+        bits |= 1 << cell
+
+    return bits
+
+
+def iter_bits(count, width, start=0, stop=None):
+    """
+    iter_bits - streams the ints of count bits set out of the lowest width ranked from start up to
+    (not including) stop, in rank order - iter_layouts for any number of cells
+
+    :rtype: generator[int]
+    """
+    total = math.comb(width, count)
+    stop = total if stop is None else min(stop, total)
+    if start >= stop:
+        return
+
+    bits = unrank_bits(start, count, width)
+    for _ in range(stop - start - 1):
+        yield bits
+        # the next larger int with the same number of bits set
+        low = bits & -bits
+        ripple = bits + low
+        bits = (((ripple ^ bits) >> 2) // low) | ripple
+    yield bits
+
+
+def _draw(uniform, cells, atom_count):
+    """
+    _draw - returns a uniformly random layout of atom_count of cells, drawing cells one at a time
+    and redrawing any already chosen - or drawing the empty cells instead when over half are atoms
+    """
+    chosen_count = min(atom_count, cells - atom_count)
+    chosen = 0
+    drawn = 0
+    while drawn < chosen_count:
+        bit = 1 << int(uniform() * cells)
+        if not chosen & bit:
+            chosen |= bit
+            drawn += 1
+
+    if chosen_count == atom_count:
+        return chosen
+
+    return ((1 << cells) - 1) ^ chosen
+
+
+def random_layout(rng, atom_count, size=10):
+    """
+    random_layout - returns a uniformly random layout of exactly atom_count distinct atoms
+
+    :param rng: the source of randomness - a random.Random, or the random module itself
+    :rtype: int
+    """
+    _check(atom_count, size)
+
+    return _draw(rng.random, interior_size(size), atom_count)
+
+
+def random_layouts(atom_count, size=10, seed=None, count=None):
+    """
+    random_layouts - streams random layouts, the same ones every time for a given seed
+
+    :param count: the number of layouts - endless if None
+    :type count: int
+    :return: generator of interior layout masks
+    :rtype: generator[int]
+    """
+    _check(atom_count, size)
+    uniform = random.Random(seed).random
+    cells = interior_size(size)
+
+    generated = 0
+    while count is None or generated < count:
+        yield _draw(uniform, cells, atom_count)
+        generated += 1
+
+
+def positions(layout, size=10):
+    """
+    positions - returns the atoms of a layout as the [row, column] pairs Board takes
+
+    :rtype: List[[int, int]]
+    """
+    inner = size - 2
+    atoms = []
+    layout = int(layout)
+    while layout:
+        low = layout & -layout
+        row, column = divmod(low.bit_length() - 1, inner)
+        atoms.append([row + 1, column + 1])
+        layout ^= low
+
+    return atoms
@@ -1,174 +1,261 @@
 # required external libraries
-import pygame, sys, math
+import pygame, sys, math, time
 
 # import of primary class
 import BlackBoxGame_Controller as BlackBoxGame
+import Instrumentation
+import Layout
 
-def main(atoms):
+# the colors the board is drawn in
+WHITE = 255, 255, 255
+BLACK = 0, 0, 0
+GREY = 160, 160, 160
+
+# the color a square certain to hold an atom is shaded in by the heatmap, and the number of shades
+# between it and white
+HEAT = 220, 40, 40
+HEAT_LEVELS = 32
+
+# posted by the heatmap worker when it has new probabilities ready
+HEATMAP_READY = pygame.USEREVENT
+
+def main(atoms, board_size=10):
     pygame.init()
 
     # instantiate an instance of the game controller which will create a board
-    new_game = BlackBoxGame.BlackBoxGame(atoms)
+    new_game = BlackBoxGame.BlackBoxGame(atoms, board_size)
 
-    # pull the board from the game instance 
+    # pull the board from the game instance
     new_board = new_game.get_board()
     # Setup Drawing of Board
     size = width, height = 1200, 1300
-    white = 255, 255, 255
-    black = 0, 0, 0
-    grey = 160, 160, 160
-    square_width = (width / 11)
-    square_height = (height / 12)
-    margin = 10
     screen = pygame.display.set_mode(size)
     pygame.display.set_caption("Black Box")
 
-    # dictionary to track the current board
-    board_tracker = {}
+    # the heatmap worker and its latest probabilities while the overlay is shown - toggled with H
+    heatmap_worker = None
+    heatmap = None
 
-    # the main loop 
-    while True:
-        pygame.display.flip() 
-
-        # insert a delay so changes are viewable by humans
-        pygame.time.delay(100)
-
-        
-        # draw the board
-        for row in  new_board.get_board():
-            for square in row:
-                # get the square's position on the board
-                x_position, y_position = square.get_position()
-
-                # calculate the coordinates where the square will be drawn
-                x_draw =  (margin + square_width) * x_position + margin
-                y_draw =  (margin + square_width) * y_position + margin
-
-                # save a copy of each game square as a dictionary in the 
-                # board tracker containing pygame Rect objects mapped to its 
-                # coordinates so that the board detect actions within where it
-                # is drawn
-                rect_dimension = (x_draw, y_draw, square_width, square_height)
-                board_tracker[int(x_position), int(y_position)] = pygame.Rect(rect_dimension)
-
-                # draw the square's color according to its position and status
-                if square.is_edge():
-                    # if the square is the origin or terminus of a ray represent that
-                     if square.get_originating_ray() == False and square.get_terminating_ray() == False:
-                         pygame.draw.rect(screen, grey, rect_dimension)
-                     else:
-                         if square.get_originating_ray() != False:
-                             ray = square.get_originating_ray()
-                             color = ray.get_color()
-                             pygame.draw.rect(screen, color, rect_dimension)
-                         if square.get_terminating_ray() != False:
-                             # draw in same color or mark with characters of originating ray? 
-                             ray = square.get_terminating_ray()
-                             color = ray.get_color()
-                             pygame.draw.rect(screen, color, rect_dimension)
-
-              
-                else:
-                    if not square.is_edge():
-                        if square.is_selected():
-                            pygame.draw.rect(screen, black, rect_dimension)
-                        else:
-                            pygame.draw.rect(screen, white, rect_dimension)
+    # where each square is drawn - used both to draw the squares and to find the
+    # square under a click
+    layout = Layout.BoardLayout.fit(board_size, width, height)
+    all_squares = [(row, column) for row in range(board_size) for column in range(board_size)]
 
+    # filled surfaces for each color a square can be drawn in, made the first time they are needed
+    square_surfaces = {}
 
-        # let the player know their score (if playing actively) or whether they have won or lost
-        if new_game.get_score() <= 0:
-            game_over()
-            
-        # if you guess the location of all the atoms you won
-        if new_game.atoms_left() == 0:
-            you_win()
+    # the squares which have changed since they were last drawn - all of them to begin with
+    dirty_squares = set(all_squares)
 
-        else:
-            # draw the score
-            score_text = f"Score: {str(new_game.get_score())}"
+    score_rect = pygame.Rect(12, layout.board_bottom(), 400, height - layout.board_bottom())
+    font = pygame.font.Font(pygame.font.get_default_font(), 36)
+    drawn_score = None
+    finished = False
 
-        pygame.draw.rect(screen, black, (15, 1200, 400, 4000))
-        font = pygame.font.Font(pygame.font.get_default_font(), 36)
-        text_surface = font.render(score_text, True, white)
-        screen.blit(text_surface, dest=(12, 1200)) 
+    # the main loop
+    while True:
 
-        # updates the screem so the redrawn squares are visible
-        pygame.display.update()
+        # render and input timings are recorded when instrumentation is on (see Instrumentation)
+        stats = Instrumentation.active
+        if stats is not None:
+            started = time.perf_counter()
 
-        # instantiate the actual game loop
-        for event in pygame.event.get():
+        # draw the squares which have changed - the rectangles of the screen redrawn this iteration
+        updated_rects = draw_squares(screen, new_board, layout, dirty_squares, square_surfaces, heatmap)
+        dirty_squares.clear()
 
-            # quits python execution if the user quits 
-            if event.type == pygame.QUIT:
-                sys.exit()
+        # let the player know their score (if playing actively) or whether they have won or lost
+        if not finished and new_game.get_score() <= 0:
+            game_over(screen)
+            finished = True
+            updated_rects = [screen.get_rect()]
 
-            # otherwise check the squares to see if they have been clicked
-            if event.type == pygame.MOUSEBUTTONUP:
+        # if you guess the location of all the atoms you won
+        elif not finished and new_game.atoms_left() == 0:
+            you_win(screen)
+            finished = True
+            updated_rects = [screen.get_rect()]
 
-                # loops through the dictionary of game tiles we've 
-                # created and takes the coordinates of each (the keys)
-                # and the actual objects (the values) to work with each
-                for coordinates, square_object in board_tracker.items():
+        elif not finished and new_game.get_score() != drawn_score:
+            # draw the score
+            drawn_score = new_game.get_score()
+            score_text = f"Score: {str(drawn_score)}"
 
-                    # check if the mouse event took place within the boundaries of a game tile
-                    if square_object.collidepoint(pygame.mouse.get_pos()):
-                        row = coordinates[0]
-                        column = coordinates[1]
+            pygame.draw.rect(screen, BLACK, score_rect)
+            text_surface = font.render(score_text, True, WHITE)
+            screen.blit(text_surface, dest=score_rect.topleft)
+            updated_rects.append(score_rect)
 
-                        # pull a game tile object to check the properties of and act on accordingly
-                        active_game_tile = new_board.get_board_square((row, column))
+        # updates the parts of the screen which were redrawn so they are visible
+        if updated_rects:
+            pygame.display.update(updated_rects)
 
-                        # secondary not-corner check necessary
-                        if not active_game_tile.is_edge() and not active_game_tile.is_corner():
+        if stats is not None:
+            stats.record_time("render", time.perf_counter() - started)
 
-                            # A click on a non-edge square constitutes a guess
-                            guess = new_game.guess_atom(row, column)
+        # block until something happens, then take anything else already queued - nothing on the
+        # screen moves by itself, so an idle game uses next to no CPU
+        events = [pygame.event.wait()] + pygame.event.get()
 
-                            if guess:
-                                active_game_tile.toggle_selected()
+        if stats is not None:
+            started = time.perf_counter()
 
-                            pygame.display.update()
+        # instantiate the actual game loop
+        for event in events:
 
-                        if active_game_tile.is_edge():
-                            # a click on an edge square constitutes shooting a ray
-                            new_game.shoot_ray(row, column)
+            # quits python execution if the user quits
+            if event.type == pygame.QUIT:
+                if heatmap_worker is not None:
+                    heatmap_worker.stop()
+                Instrumentation.disable()
+                sys.exit()
 
+            # redraw everything if the window's contents were lost
+            if event.type == pygame.VIDEOEXPOSE:
+                if finished:
+                    pygame.display.update()
+                else:
+                    dirty_squares.update(all_squares)
+                    drawn_score = None
+
+            # show or hide the atom probability of each square - not once the end screen covers
+            # the board, which redrawing the squares would paint over
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_h and not finished:
+                if heatmap_worker is None:
+                    # imported here so that the game can be played without NumPy
+                    import Heatmap
+                    heatmap_worker = Heatmap.HeatmapWorker(
+                        new_game.clone(), ready=lambda: pygame.event.post(pygame.event.Event(HEATMAP_READY)))
+                else:
+                    heatmap_worker.stop()
+                    heatmap_worker = None
+                    heatmap = None
+                    dirty_squares.update(all_squares)
 
-def game_over():
-    pygame.init()
+            # redraw the squares with the probabilities the heatmap worker has just finished
+            if event.type == HEATMAP_READY and heatmap_worker is not None and not finished:
+                heatmap = heatmap_worker.probabilities()
+                dirty_squares.update(all_squares)
 
-    # Setup Drawing of Board
-    size = width, height = 1200, 1300
-    white = 255, 255, 255
-    black = 0, 0, 0
-    grey = 160, 160, 160
-    screen = pygame.display.set_mode(size)
-    pygame.display.set_caption("Game Over")
-    
-    display_text = "Game Over"
-    pygame.draw.rect(screen, black, (0,0, width, height))
-    font = pygame.font.Font(pygame.font.get_default_font(), 64)
-    text_surface = font.render(display_text, True, white)
-    screen.blit(text_surface, dest=(height/2,width/2)) 
+            # otherwise check the squares to see if they have been clicked
+            if event.type == pygame.MOUSEBUTTONUP and not finished:
 
-def you_win():
-    pygame.init()
+                # find the game tile (if any) the mouse event took place within
+                coordinates = layout.square_at(*event.pos)
+                if coordinates is None:
+                    continue
+                row, column = coordinates
+
+                # pull a game tile object to check the properties of and act on accordingly
+                active_game_tile = new_board.get_board_square((row, column))
 
-    # Setup Drawing of Board
-    size = width, height = 1200, 1300
-    white = 255, 255, 255
-    black = 0, 0, 0
-    grey = 160, 160, 160
-    screen = pygame.display.set_mode(size)
-    pygame.display.set_caption("You Win!")
+                # secondary not-corner check necessary
+                if not active_game_tile.is_edge() and not active_game_tile.is_corner():
+
+                    # A click on a non-edge square constitutes a guess
+                    guess = new_game.guess_atom(row, column)
+
+                    if guess:
+                        active_game_tile.toggle_selected()
+                        dirty_squares.add(coordinates)
+
+                    # a wrong guess rules the square out just as a right one rules it in
+                    if heatmap_worker is not None:
+                        heatmap_worker.submit(new_game.clone())
+
+                if active_game_tile.is_edge():
+                    # a click on an edge square constitutes shooting a ray - the square
+                    # it is shot from and the one it leaves by (if any) change color
+                    terminus = new_game.shoot_ray(row, column)
+                    dirty_squares.add(coordinates)
+                    if terminus:
+                        dirty_squares.add(terminus)
+                    if heatmap_worker is not None:
+                        heatmap_worker.submit(new_game.clone())
+
+        if stats is not None:
+            stats.record_time("input", time.perf_counter() - started)
+
+
+def draw_squares(screen, board, layout, squares, square_surfaces, heatmap=None):
+    """
+    draw_squares - draws squares of the board onto the screen
+
+    :param squares: the (row, column) of each square to draw
+    :param square_surfaces: filled surfaces for each color a square is drawn in, added to as
+                            new colors are needed
+    :param heatmap: the probability of each square holding an atom, indexed by [row, column], to
+                    shade the squares by (see Heatmap)
+    :return: the rectangles drawn over
+    :rtype: List[pygame.Rect]
+    """
+    drawn_rects = []
+
+    for coordinates in squares:
+        probability = None if heatmap is None else heatmap[coordinates]
+        color = square_color(board.get_board_square(coordinates), probability)
+        rect = pygame.Rect(layout.square_rect(*coordinates))
+
+        surface = square_surfaces.get(color)
+        if surface is None:
+            surface = pygame.Surface(rect.size)
+            surface.fill(color)
+            square_surfaces[color] = surface
+
+        screen.blit(surface, rect)
+        drawn_rects.append(rect)
+
+    return drawn_rects
+
+
+def square_color(square, probability=None):
+    """
+    square_color - returns the color a square is drawn in according to its position and status,
+    and for an interior square not yet guessed the probability of it holding an atom if given
+    """
+    if square.is_edge():
+        # if the square is the origin or terminus of a ray represent that - in the color
+        # of the ray that terminates there if there is one
+        if square.get_terminating_ray() != False:
+            return square.get_terminating_ray().get_color()
+
+        if square.get_originating_ray() != False:
+            return square.get_originating_ray().get_color()
+
+        return GREY
+
+    if square.is_selected():
+        return BLACK
+
+    if probability is not None:
+        # a few shades only, so the surfaces made for them can be reused
+        heat = round(probability * HEAT_LEVELS) / HEAT_LEVELS
+        return tuple(round(white + (hot - white) * heat) for white, hot in zip(WHITE, HEAT))
+
+    return WHITE
+
+
+def game_over(screen):
+    end_screen(screen, "Game Over")
+
+def you_win(screen):
+    end_screen(screen, "You Win!")
+
+def end_screen(screen, display_text):
+    """
+    end_screen - covers the board with a message once the game has finished. It only draws on
+    the existing screen, the caller updates the display.
+    """
+    width, height = screen.get_size()
+    pygame.display.set_caption(display_text)
 
-    display_text = "You Win!"
-    pygame.draw.rect(screen, black, (0,0, width, height))
+    pygame.draw.rect(screen, BLACK, (0,0, width, height))
     font = pygame.font.Font(pygame.font.get_default_font(), 64)
-    text_surface = font.render(display_text, True, white)
-    screen.blit(text_surface, dest=(height/2,width/2)) 
+    text_surface = font.render(display_text, True, WHITE)
+    screen.blit(text_surface, dest=(height/2,width/2))
 
 if __name__ == "__main__": #TODO - Implement Random Atom Generation
+    # BLACKBOX_STATS=stats.jsonl records where the time goes while playing
+    Instrumentation.enable_from_environment()
     atoms = int(input("Enter the number of atoms to be placed on the board: "))
     main(atoms)
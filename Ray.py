@@ -1,5 +1,32 @@
 import random
 
+
+def random_color(rng=random):
+    """
+    random_color - returns a random RGB color for a ray
+
+    :param rng: the source of randomness - a random.Random, or the random module itself
+    :rtype: tuple(int, int, int)
+    """
+    return rng.randint(0, 255), rng.randint(0, 255), rng.randint(0, 255)
+
+
+def seeded_color(seed, number):
+    """
+    seeded_color - returns the color of the number-th ray fired in a game with the given seed. It
+    is a hash (splitmix64) of the two rather than drawn from a generator, so any ray's color is
+    known without drawing those of the rays before it.
+
+    :rtype: tuple(int, int, int)
+    """
+    value = (seed + (number + 1) * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & 0xFFFFFFFFFFFFFFFF
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & 0xFFFFFFFFFFFFFFFF
+    value ^= value >> 31
+
+    return (value >> 16) & 0xFF, (value >> 8) & 0xFF, value & 0xFF
+
+
 class Ray():
     """
     Ray - a class representing a ray shot from an edge of a board in the game
@@ -11,7 +38,11 @@ class Ray():
     information based on the parts of the board it is currently interacting with).
 
     """
-    def __init__(self, origin_row, origin_column):
+    # a game keeps every ray fired, and a server hosts many games
+    __slots__ = ("_board_size", "_origin_row", "_origin_column", "_direction", "_current_row", "_current_column",
+                 "_terminal_row", "_terminal_column", "_atom_terminus", "_ray_color")
+
+    def __init__(self, origin_row, origin_column, board_size=10, color=None):
         """
         __init__ - initializes a Ray object
 
@@ -19,7 +50,12 @@ class Ray():
         :type origin_row: int
         :param origin_column: The column from which it originates
         :type origin_column: int
+        :param board_size: The number of rows (and columns) of the board it is fired across
+        :type board_size: int
+        :param color: the ray's RGB color - generated randomly if None
+        :type color: tuple(int, int, int)
         """
+        self._board_size = board_size
 
         # Set the ray's point of origination
         self._origin_row = origin_row
@@ -40,18 +76,14 @@ class Ray():
         self._atom_terminus = False
 
         # a color for display on the game board
-        self._ray_color = self.generate_color()
+        self._ray_color = self.generate_color() if color is None else color
 
     def generate_color(self):
         """generate_color - generates a random color for the ray
 
         @return: A three digit RGB value
         """
-        color_one = random.randint(0,255)
-        color_two = random.randint(0,255)
-        color_three = random.randint(0,255)
-
-        return int(color_one), int(color_two),  int(color_three)
+        return random_color()
 
     def get_color(self):
         """
@@ -117,6 +149,17 @@ class Ray():
             return None
         return (self._terminal_row, self._terminal_column)
 
+    def get_terminus(self):
+        """
+        get_terminus - returns the square the ray stopped on - the atom it struck if it hit one
+
+        :return: (row, column) or None if it has not stopped
+        :rtype: tuple(int, int) or None
+        """
+        if self._terminal_row is None:
+            return None
+        return (self._terminal_row, self._terminal_column)
+
     def set_terminal_location(self, location):
         """
         set_terminal_location - set's a node's terminal location
@@ -160,13 +203,13 @@ class Ray():
         if self._origin_row == 0:
             return "DOWN"
 
-        if self._origin_row == 9:
+        if self._origin_row == self._board_size - 1:
             return "UP"
 
         if self._origin_column== 0:
             return "RIGHT"
 
-        if self._origin_column== 9:
+        if self._origin_column== self._board_size - 1:
             return "LEFT"
 
     def get_next_location(self):
@@ -0,0 +1,414 @@
+"""
+Server - hosts many games of Black Box at once over TCP, for players who are not sitting at a
+pygame window. Games are played by the same BlackBoxGame rules code the pygame client uses.
+
+Clients send one JSON object per line and get one back per line, in the order sent, so requests
+can be pipelined. A request's "id" (if any) is echoed in its response.
+
+    {"command": "new", "atoms": 4}                              {"ok": true, "session": 1, "size": 10, ...}
+    {"command": "shoot", "session": 1, "row": 0, "column": 3}   {"ok": true, "exit": [9, 3], "score": 23}
+    {"command": "guess", "session": 1, "row": 4, "column": 4}   {"ok": true, "atom": false, "score": 18, ...}
+    {"command": "score", "session": 1}                          {"ok": true, "score": 18, "atoms_left": 4, ...}
+    {"command": "state", "session": 1}                          every ray fired and guess made as well
+    {"command": "end", "session": 1}                            {"ok": true}
+
+A shot's exit is null when the ray hits an atom. Failed requests get {"ok": false, "error": ...}.
+Sessions belong to the connection which made them and end when it closes. Idle sessions are kept
+on disk once more than a set number are open (see SessionStore).
+
+    python Server.py serve --port 8765 --live-games 10000
+    python Server.py load --port 8765 --sessions 2000 --connections 100
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import time
+
+import BlackBoxGame_Controller as BlackBoxGame
+import Layouts
+import SessionStore
+import Tracer
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# the largest board a session may be played on
+MAX_SIZE = 32
+
+# the longest request line accepted - a connection sending a longer one is closed
+MAX_LINE = 4096
+
+# responses are written without waiting for the client to read them until this many bytes are
+# waiting to be sent
+WRITE_BUFFER_LIMIT = 64 * 1024
+
+
+class GameServer():
+    """
+    GameServer - the sessions hosted by a server and the commands which act on them
+    """
+    def __init__(self, store=None):
+        """
+        __init__ - initializes a server with no sessions
+
+        :param store: where the game of every session is kept, keyed by session number - a
+                      SessionStore with its default limit of live games if None
+        :type store: Object(SessionStore.SessionStore)
+        """
+        self._sessions = store if store is not None else SessionStore.SessionStore()
+        self._session_numbers = itertools.count(1)
+
+        self._commands = {
+            "new": self._new,
+            "shoot": self._shoot,
+            "guess": self._guess,
+            "score": self._score,
+            "state": self._state,
+            "end": self._end,
+        }
+
+    def session_count(self):
+        return len(self._sessions)
+
+    def get_store(self):
+        return self._sessions
+
+    def handle(self, request, owned):
+        """
+        handle - carries out one request
+
+        :param request: the decoded request
+        :type request: dict
+        :param owned: the sessions of the connection the request came in on, added to and removed
+                      from by new and end
+        :type owned: set(int)
+        :return: the response
+        :rtype: dict
+        """
+        if not isinstance(request, dict):
+            return {"ok": False, "error": "requests must be JSON objects"}
+
+        command = self._commands.get(request.get("command"))
+        try:
+            if command is None:
+                raise ValueError(f"unknown command {request.get('command')!r} - use one of "
+                                 f"{', '.join(self._commands)}")
+            response = command(request, owned)
+        except ValueError as error:
+            response = {"ok": False, "error": str(error)}
+        except Exception as error:
+            # anything else is answered too, so that one bad request cannot take down the
+            # connection (and the sessions on it) - RecursionError from a deeply nested value, say
+            response = {"ok": False, "error": f"the request could not be carried out ({type(error).__name__})"}
+
+        if "id" in request:
+            response["id"] = request["id"]
+
+        return response
+
+    def close_sessions(self, owned):
+        """
+        close_sessions - ends every session of a connection which has closed
+        """
+        for session in owned:
+            self._sessions.remove(session)
+        owned.clear()
+
+    def _game(self, request, owned):
+        session = request.get("session")
+        if type(session) is not int or session not in owned:
+            raise ValueError(f"no session {session!r} on this connection")
+
+        return self._sessions.get(session)
+
+    def _square(self, request, game):
+        size = game.get_board().get_size()
+        row = request.get("row")
+        column = request.get("column")
+        for value in (row, column):
+            if type(value) is not int or not 0 <= value < size:
+                raise ValueError(f"row and column must be whole numbers from 0 to {size - 1}")
+
+        return row, column
+
+    def _playing(self, request, owned):
+        game = self._game(request, owned)
+        if _finished(game):
+            raise ValueError("the game is over")
+
+        return game
+
+    def _new(self, request, owned):
+        atoms = request.get("atoms", 4)
+        size = request.get("size", 10)
+        if type(size) is not int or not 3 <= size <= MAX_SIZE:
+            raise ValueError(f"size must be a whole number from 3 to {MAX_SIZE}")
+        if type(atoms) is not int or not 1 <= atoms <= Layouts.interior_size(size):
+            raise ValueError(f"atoms must be a whole number from 1 to {Layouts.interior_size(size)}")
+
+        session = next(self._session_numbers)
+        game = BlackBoxGame.BlackBoxGame(atoms, size)
+        self._sessions.add(session, game)
+        owned.add(session)
+
+        return {"ok": True, "session": session, "size": size, "atoms": atoms, "score": game.get_score()}
+
+    def _shoot(self, request, owned):
+        game = self._playing(request, owned)
+        row, column = self._square(request, game)
+
+        terminus = game.shoot_ray(row, column)
+        if terminus is False:
+            raise ValueError("rays can only be fired from edge squares")
+
+        return {"ok": True, "exit": None if terminus is None else list(terminus), "score": game.get_score()}
+
+    def _guess(self, request, owned):
+        game = self._playing(request, owned)
+        row, column = self._square(request, game)
+
+        last = game.get_board().get_size() - 1
+        if not (0 < row < last and 0 < column < last):
+            raise ValueError("only squares inside the edges can be guessed")
+
+        atom = game.guess_atom(row, column)
+
+        return {"ok": True, "atom": atom, "score": game.get_score(), "atoms_left": game.atoms_left()}
+
+    def _score(self, request, owned):
+        game = self._game(request, owned)
+
+        return {"ok": True, "score": game.get_score(), "atoms_left": game.atoms_left(),
+                "finished": _finished(game)}
+
+    def _state(self, request, owned):
+        game = self._game(request, owned)
+        board = game.get_board()
+        size = board.get_size()
+        cells = board.get_cells()
+
+        rays = []
+        for index, ray in board.get_originating_rays().items():
+            origin = divmod(index, size)
+            outcome, terminus, _ = game.get_exit(*origin)
+            rays.append({"origin": list(origin), "exit": None if outcome == Tracer.HIT else list(terminus),
+                         "color": list(ray.get_color())})
+
+        guesses = [{"square": list(guess), "atom": bool(cells[guess[0] * size + guess[1]] & Tracer.ATOM)}
+                   for guess in game.get_guesses()]
+
+        return {"ok": True, "size": size, "score": game.get_score(), "atoms_left": game.atoms_left(),
+                "finished": _finished(game), "rays": rays, "guesses": guesses}
+
+    def _end(self, request, owned):
+        self._game(request, owned)
+        session = request["session"]
+        self._sessions.remove(session)
+        owned.discard(session)
+
+        return {"ok": True}
+
+    async def serve_connection(self, reader, writer):
+        """
+        serve_connection - answers the requests of one connection until it closes
+        """
+        owned = set()
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (ValueError, ConnectionError):
+                    # a line over MAX_LINE, or the client went away
+                    break
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+
+                try:
+                    request = json.loads(line)
+                except (ValueError, RecursionError):
+                    response = {"ok": False, "error": "requests must be JSON"}
+                else:
+                    response = self.handle(request, owned)
+
+                try:
+                    encoded = json.dumps(response, separators=(",", ":")).encode()
+                except (ValueError, RecursionError):
+                    # an echoed id nested too deeply to write back
+                    encoded = json.dumps({"ok": False, "error": "the request id cannot be echoed"}).encode()
+                writer.write(encoded + b"\n")
+                if writer.transport.get_write_buffer_size() > WRITE_BUFFER_LIMIT:
+                    await writer.drain()
+        finally:
+            self.close_sessions(owned)
+            writer.close()
+
+    async def serve(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        """
+        serve - accepts connections until cancelled
+        """
+        server = await asyncio.start_server(self.serve_connection, host, port, limit=MAX_LINE)
+        async with server:
+            await server.serve_forever()
+
+
+def _finished(game):
+    """
+    _finished - returns whether a game has been lost or won, after which it takes no more actions
+    """
+    return game.get_score() <= 0 or game.atoms_left() == 0
+
+
+class LoadClient():
+    """
+    LoadClient - one connection of the load generator, matching responses to requests by id so
+    that many sessions can share it
+    """
+    def __init__(self, reader, writer):
+        self._reader = reader
+        self._writer = writer
+        self._waiting = {}
+        self._ids = itertools.count()
+        self._receiver = asyncio.ensure_future(self._receive())
+
+    @classmethod
+    async def connect(cls, host, port):
+        reader, writer = await asyncio.open_connection(host, port)
+
+        return cls(reader, writer)
+
+    async def request(self, **request):
+        """
+        request - sends a request and waits for its response
+        """
+        request["id"] = next(self._ids)
+        response = asyncio.get_running_loop().create_future()
+        self._waiting[request["id"]] = response
+        self._writer.write(json.dumps(request, separators=(",", ":")).encode() + b"\n")
+
+        return await response
+
+    async def _receive(self):
+        while True:
+            line = await self._reader.readline()
+            if not line:
+                break
+            response = json.loads(line)
+            self._waiting.pop(response["id"]).set_result(response)
+
+    async def close(self):
+        self._receiver.cancel()
+        self._writer.close()
+        await self._writer.wait_closed()
+
+
+async def _play(client, rng, atoms, actions, latencies):
+    """
+    _play - plays one session of the load generator: a new game and then up to actions random
+    shots, guesses and score and state requests, recording the latency of each
+    """
+    async def timed(**request):
+        started = time.perf_counter()
+        response = await client.request(**request)
+        latencies.append(time.perf_counter() - started)
+        return response
+
+    game = await timed(command="new", atoms=atoms)
+    session = game["session"]
+    last = game["size"] - 1
+
+    for _ in range(actions):
+        choice = rng.random()
+        if choice < 0.6:
+            side = rng.randrange(4)
+            position = rng.randrange(1, last)
+            row, column = [(0, position), (last, position), (position, 0), (position, last)][side]
+            response = await timed(command="shoot", session=session, row=row, column=column)
+        elif choice < 0.8:
+            response = await timed(command="guess", session=session,
+                                   row=rng.randrange(1, last), column=rng.randrange(1, last))
+        elif choice < 0.9:
+            response = await timed(command="score", session=session)
+        else:
+            response = await timed(command="state", session=session)
+
+        if not response["ok"]:
+            break
+
+    await timed(command="end", session=session)
+
+
+async def load(host=DEFAULT_HOST, port=DEFAULT_PORT, sessions=1000, connections=100, atoms=4, actions=20,
+               seed=0):
+    """
+    load - plays sessions concurrently against a server, spread over a number of connections
+
+    :return: the latency of every request in seconds, and the time taken in all
+    :rtype: tuple(List[float], float)
+    """
+    clients = [await LoadClient.connect(host, port) for _ in range(connections)]
+    latencies = []
+
+    started = time.perf_counter()
+    await asyncio.gather(*(_play(clients[number % connections], random.Random(seed * sessions + number), atoms,
+                                 actions, latencies)
+                           for number in range(sessions)))
+    elapsed = time.perf_counter() - started
+
+    for client in clients:
+        await client.close()
+
+    return latencies, elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Host games of Black Box over TCP, or load test a server.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve = commands.add_parser("serve", help="host games until interrupted")
+    serve.add_argument("--host", default=DEFAULT_HOST, help="address to listen on")
+    serve.add_argument("--port", type=int, default=DEFAULT_PORT, help="port to listen on")
+    serve.add_argument("--live-games", type=int, default=SessionStore.LIVE_LIMIT,
+                       help="most games kept in memory, the rest are kept on disk until played again")
+    serve.add_argument("--session-dir", help="directory for games kept on disk (default: a temporary one)")
+
+    load_test = commands.add_parser("load", help="play many concurrent sessions against a server")
+    load_test.add_argument("--host", default=DEFAULT_HOST, help="address of the server")
+    load_test.add_argument("--port", type=int, default=DEFAULT_PORT, help="port of the server")
+    load_test.add_argument("--sessions", type=int, default=1000, help="number of concurrent sessions")
+    load_test.add_argument("--connections", type=int, default=100, help="connections the sessions share")
+    load_test.add_argument("--atoms", type=int, default=4, help="number of atoms on each board")
+    load_test.add_argument("--actions", type=int, default=20, help="requests each session makes after new")
+    load_test.add_argument("--seed", type=int, default=0, help="seed the sessions' actions are drawn from")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        store = SessionStore.SessionStore(args.session_dir, args.live_games)
+        print(f"serving on {args.host}:{args.port}")
+        try:
+            asyncio.run(GameServer(store).serve(args.host, args.port))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            store.close()
+        return
+
+    latencies, elapsed = asyncio.run(load(args.host, args.port, args.sessions, args.connections, args.atoms,
+                                          args.actions, args.seed))
+    latencies.sort()
+
+    def percentile(fraction):
+        return latencies[min(len(latencies) - 1, int(fraction * len(latencies)))] * 1000
+
+    print(f"{len(latencies)} requests from {args.sessions} sessions in {elapsed:.2f}s "
+          f"({len(latencies) / elapsed:.0f}/s)")
+    print(f"latency ms: median {percentile(0.5):.2f}, p95 {percentile(0.95):.2f}, "
+          f"p99 {percentile(0.99):.2f}, max {latencies[-1] * 1000:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""
+SessionStore - holds many games at once within a memory budget, for a long-lived process hosting
+them (see Server).
+
+The games touched most recently are kept live, up to a set number. Past that the least recently
+used is evicted to a fixed-size record on disk - its snapshot (atoms, guesses, score, the
+outcome of every ray and the game's log, see BlackBoxGame.snapshot), a few hundred bytes on a
+ten by ten board against a few kilobytes live - and rebuilt from it the next time it is asked for.
+
+Records of boards of each size are kept in a file of their own, in slots all the same length, so
+a record is read or written with one seek and a slot freed by a finished game is reused by the
+next evicted.
+
+    store = SessionStore.SessionStore(live_limit=10000)
+    store.add(session, game)
+    game = store.get(session)    # live again if it had been evicted
+"""
+import collections
+import os
+import shutil
+import struct
+import tempfile
+
+import ActionLog
+import BlackBoxGame_Controller as BlackBoxGame
+import Layouts
+
+# the number of games kept live by default
+LIVE_LIMIT = 10000
+
+# each record is the length of its snapshot followed by the snapshot, padded to the record size
+RECORD_LENGTH = struct.Struct("<H")
+
+
+def record_size(size):
+    """
+    record_size - returns the length of the records of games on a board of a size - long enough for
+    a ray from every edge square and for guesses at every atom and as many wrong guesses again as
+    the starting score allows before the game is lost, and for a log of as many actions as can be
+    taken before then (every shot and wrong guess costs at least a point)
+    """
+    guess_count = Layouts.interior_size(size) + 25 // 5
+    ray_count = 4 * (size - 2)
+    action_count = Layouts.interior_size(size) + 25
+
+    return RECORD_LENGTH.size + BlackBoxGame.snapshot_size(size, guess_count, ray_count,
+                                                           ActionLog.log_length(size, action_count))
+
+
+class SessionStore():
+    """
+    SessionStore - games keyed by session, the least recently used of them kept on disk
+    """
+    def __init__(self, directory=None, live_limit=LIVE_LIMIT):
+        """
+        __init__ - initializes an empty store
+
+        :param directory: the directory to keep records in - a temporary one, removed by close,
+                          if None
+        :type directory: String
+        :param live_limit: the most games kept live at once
+        :type live_limit: int
+        """
+        if live_limit < 1:
+            raise ValueError("at least one game must be kept live")
+
+        self._temporary = directory is None
+        self._directory = tempfile.mkdtemp(prefix="blackbox-sessions-") if directory is None else directory
+        os.makedirs(self._directory, exist_ok=True)
+        self._live_limit = live_limit
+
+        # the live games, least recently used first
+        self._live = collections.OrderedDict()
+        # the (board size, slot) of the record of each evicted game
+        self._evicted = {}
+
+        # for each board size, its open record file, the number of slots in it and those free
+        self._files = {}
+        self._slot_counts = {}
+        self._free_slots = {}
+
+    def __len__(self):
+        return len(self._live) + len(self._evicted)
+
+    def __contains__(self, session):
+        return session in self._live or session in self._evicted
+
+    def live_count(self):
+        return len(self._live)
+
+    def evicted_count(self):
+        return len(self._evicted)
+
+    def add(self, session, game):
+        """
+        add - adds a game to the store as its most recently used
+
+        :param session: the key the game is found by
+        :type session: hashable
+        :type game: Object(BlackBoxGame)
+        """
+        if session in self:
+            raise ValueError(f"session {session!r} is already in the store")
+
+        self._live[session] = game
+        self._evict()
+
+    def get(self, session):
+        """
+        get - returns a session's game, rebuilding it from its record if it had been evicted, and
+        marks it most recently used. The game returned may be changed freely until the next call
+        to add or get.
+
+        :raises KeyError: if the session is not in the store
+        :rtype: Object(BlackBoxGame)
+        """
+        game = self._live.get(session)
+        if game is not None:
+            self._live.move_to_end(session)
+            return game
+
+        size, slot = self._evicted.pop(session)
+        game = BlackBoxGame.BlackBoxGame.restore(self._read(size, slot))
+        self._free_slots[size].append(slot)
+
+        self._live[session] = game
+        self._evict()
+
+        return game
+
+    def remove(self, session):
+        """
+        remove - drops a session's game from the store
+
+        :raises KeyError: if the session is not in the store
+        """
+        if self._live.pop(session, None) is not None:
+            return
+
+        size, slot = self._evicted.pop(session)
+        self._free_slots[size].append(slot)
+
+    def close(self):
+        """
+        close - closes the record files, removing them (and every evicted game) if the store made
+        its own directory
+        """
+        for records in self._files.values():
+            records.close()
+        self._files.clear()
+
+        if self._temporary:
+            shutil.rmtree(self._directory, ignore_errors=True)
+
+    def _evict(self):
+        """
+        _evict - writes the least recently used games to disk until no more than live_limit are
+        live. A game whose snapshot no longer fits a record (one played on long after it was lost)
+        is kept live instead.
+        """
+        attempts = len(self._live)
+        while len(self._live) > self._live_limit and attempts > 0:
+            attempts -= 1
+            session, game = self._live.popitem(last=False)
+            snapshot = game.snapshot()
+            size = game.get_board().get_size()
+
+            if RECORD_LENGTH.size + len(snapshot) > record_size(size):
+                self._live[session] = game
+                continue
+
+            self._evicted[session] = (size, self._write(size, snapshot))
+
+    def _records(self, size):
+        """
+        _records - returns the record file of a board size, creating it the first time
+        """
+        records = self._files.get(size)
+        if records is None:
+            path = os.path.join(self._directory, f"sessions-{size}x{size}.bbs")
+            records = open(path, "w+b", buffering=0)
+            self._files[size] = records
+            self._slot_counts[size] = 0
+            self._free_slots[size] = []
+
+        return records
+
+    def _write(self, size, snapshot):
+        """
+        _write - writes a snapshot to a free slot of its board size's file
+
+        :return: the slot written
+        :rtype: int
+        """
+        records = self._records(size)
+        free = self._free_slots[size]
+        if free:
+            slot = free.pop()
+        else:
+            slot = self._slot_counts[size]
+            self._slot_counts[size] += 1
+
+        length = record_size(size)
+        record = RECORD_LENGTH.pack(len(snapshot)) + snapshot
+        records.seek(slot * length)
+        records.write(record.ljust(length, b"\0"))
+
+        return slot
+
+    def _read(self, size, slot):
+        """
+        _read - returns the snapshot in a slot of a board size's file
+        """
+        records = self._files[size]
+        length = record_size(size)
+        records.seek(slot * length)
+        record = records.read(length)
+        (snapshot_length,) = RECORD_LENGTH.unpack_from(record)
+
+        return record[RECORD_LENGTH.size:RECORD_LENGTH.size + snapshot_length]
@@ -0,0 +1,311 @@
+"""
+SignatureFile - a compact binary file of precomputed layout signatures which is memory-mapped and
+binary searched in place, so that any process can query it without loading or unpickling anything.
+
+A file holds a fixed size header followed by two columns of fixed width records, and then the
+keys again a column per edge:
+
+    header   magic, format version, board size, atom count, signature length, record count
+    keys     record count signatures of signature length bytes each, sorted
+    layouts  record count little-endian uint64 interior layout masks, in the same order
+    columns  for each edge in turn, one byte per record: the signature byte of that edge
+
+Lookups binary search the keys, reading one contiguous signature per probe. The columns are for
+filtering every record by the results of a few rays (see Belief), which scans one contiguous
+column per ray instead of every signature; they make a ten by ten board's file about 80% larger.
+Version 1 files, written before the columns were added, can still be read - filtering them scans
+the keys.
+
+Signatures and layouts are encoded as by Tracer.signature and Tracer.mask_to_layout. Files are
+written from a SignatureIndex (which needs NumPy) but read with nothing but mmap and struct.
+
+    python SignatureFile.py build --atoms 4
+    python SignatureFile.py info tables/signatures-10x10-4.bbx
+"""
+import argparse
+import mmap
+import os
+import struct
+import time
+
+import Tracer
+
+MAGIC = b"BBXSIG\r\n"
+VERSION = 3
+# the versions which can be read - version 1 has no key columns, and version 2 (which had only the
+# columns, so that every lookup read a signature strided across the whole file) is not read at all
+READABLE_VERSIONS = (1, 3)
+HEADER = struct.Struct("<8sHHHHQ")
+LAYOUT = struct.Struct("<Q")
+
+# where tables are written and looked for by default
+TABLE_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tables")
+
+# tables already opened by this process, by (atom count, size)
+_open_tables = {}
+
+
+def table_path(atom_count, size=10, directory=None):
+    """
+    table_path - returns the default path of the table for an atom count and board size
+    """
+    return os.path.join(directory or TABLE_DIRECTORY, f"signatures-{size}x{size}-{atom_count}.bbx")
+
+
+def write(index, path):
+    """
+    write - writes a SignatureIndex to path, replacing any existing file only once it is complete
+
+    :param index: the index to write
+    :type index: Object(SignatureIndex)
+    :param path: where to write it
+    :type path: String
+    """
+    signatures = index.get_signatures()
+    layouts = index.get_layouts()
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as table:
+        table.write(HEADER.pack(MAGIC, VERSION, index.get_size(), index.get_atom_count(),
+                                signatures.shape[1], len(layouts)))
+        table.write(signatures.tobytes())
+        table.write(layouts.astype("<u8").tobytes())
+        table.write(signatures.T.tobytes())
+    os.replace(temporary, path)
+
+
+def open_table(atom_count, size=10, directory=None):
+    """
+    open_table - returns the table for an atom count and board size, opening it once per process
+
+    :return: the table, or None if it has not been built
+    :rtype: Object(SignatureFile) or None
+    """
+    key = (atom_count, size, directory)
+
+    if key not in _open_tables:
+        path = table_path(atom_count, size, directory)
+        _open_tables[key] = SignatureFile(path) if os.path.exists(path) else None
+
+    return _open_tables[key]
+
+
+class SignatureFile():
+    """
+    SignatureFile - a read only view of a signature table file, memory-mapped so that opening it
+    costs the same however large it is and its pages are shared between processes.
+    """
+    def __init__(self, path):
+        """
+        __init__ - opens and maps a table file
+
+        :param path: the file to open
+        :type path: String
+        """
+        self._path = path
+        with open(path, "rb") as table:
+            self._map = mmap.mmap(table.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, size, atom_count, signature_length, count = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version not in READABLE_VERSIONS:
+            self._map.close()
+            raise ValueError(f"{path} is not a version 1 or {VERSION} signature table")
+
+        self._size = size
+        self._atom_count = atom_count
+        self._signature_length = signature_length
+        self._count = count
+        self._keys_offset = HEADER.size
+        self._layouts_offset = HEADER.size + count * signature_length
+        # the start of the key columns, or None in a version 1 file
+        self._columns_offset = None if version == 1 else self._layouts_offset + count * LAYOUT.size
+        length = self._layouts_offset + count * LAYOUT.size + (0 if version == 1 else count * signature_length)
+
+        if len(self._map) != length:
+            self._map.close()
+            raise ValueError(f"{path} is truncated")
+
+    def close(self):
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception):
+        self.close()
+
+    def __len__(self):
+        return self._count
+
+    def get_size(self):
+        return self._size
+
+    def get_atom_count(self):
+        return self._atom_count
+
+    def get_path(self):
+        return self._path
+
+    def _key(self, position):
+        """
+        _key - returns the signature of the record at position
+        """
+        start = self._keys_offset + position * self._signature_length
+        return self._map[start:start + self._signature_length]
+
+    def _layout(self, position):
+        """
+        _layout - returns the interior layout mask of the record at position
+        """
+        return LAYOUT.unpack_from(self._map, self._layouts_offset + position * LAYOUT.size)[0]
+
+    def _bounds(self, signature):
+        """
+        _bounds - binary searches the keys for the records with the given signature
+
+        :return: (first, last + 1) positions of the matching records
+        :rtype: tuple(int, int)
+        """
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if self._key(middle) < signature:
+                low = middle + 1
+            else:
+                high = middle
+
+        start = low
+        high = self._count
+        while low < high:
+            middle = (low + high) // 2
+            if self._key(middle) <= signature:
+                low = middle + 1
+            else:
+                high = middle
+
+        return (start, low)
+
+    def lookup(self, signature):
+        """
+        lookup - returns the layouts with exactly the given signature
+
+        :param signature: one byte per edge
+        :type signature: bytes
+        :return: interior layout masks
+        :rtype: List[int]
+        """
+        start, end = self._bounds(bytes(signature))
+
+        return [self._layout(position) for position in range(start, end)]
+
+    def count(self, signature):
+        """
+        count - returns the number of layouts with the given signature
+        """
+        start, end = self._bounds(bytes(signature))
+
+        return end - start
+
+    def ambiguity(self, atom_mask):
+        """
+        ambiguity - returns how many layouts (including this one) give the same signature as the
+        layout of a board - 1 when the layout can be told apart from every other
+
+        :param atom_mask: bitboard of the layout, as Board.get_atom_mask
+        :type atom_mask: int
+        :rtype: int
+        """
+        return self.count(Tracer.signature(atom_mask, self._size))
+
+    def columns(self):
+        """
+        columns - returns the key and layout columns as NumPy arrays viewing the mapped file
+
+        :return: (signatures of shape (records, signature length) - a view of the key columns, so
+                 each edge's bytes are contiguous, or of the keys in a version 1 file - and layouts
+                 of shape (records,))
+        :rtype: tuple(np.ndarray[uint8], np.ndarray[uint64])
+        """
+        import numpy as np
+
+        if self._columns_offset is None:
+            keys = np.frombuffer(self._map, dtype=np.uint8, count=self._count * self._signature_length,
+                                 offset=self._keys_offset).reshape(self._count, self._signature_length)
+        else:
+            keys = np.frombuffer(self._map, dtype=np.uint8, count=self._count * self._signature_length,
+                                 offset=self._columns_offset).reshape(self._signature_length, self._count).T
+        layouts = np.frombuffer(self._map, dtype="<u8", count=self._count, offset=self._layouts_offset)
+
+        return keys, layouts
+
+    def candidates(self, observations):
+        """
+        candidates - returns the layouts consistent with a partial set of observations, by a scan of
+        the key columns (vectorized when NumPy is available)
+
+        :param observations: {(origin_row, origin_column): result of BlackBoxGame.shoot_ray}
+        :type observations: dict
+        :return: interior layout masks
+        :rtype: List[int]
+        """
+        size = self._size
+        numbers = {index: number for number, index in
+                   enumerate(index for index in range(size * size) if Tracer.edge_cells(size)[index])}
+        columns = []
+        codes = []
+        for (row, column), result in observations.items():
+            columns.append(numbers[row * size + column])
+            codes.append(Tracer.HIT_CODE if result is None else numbers[result[0] * size + result[1]])
+
+        try:
+            import numpy as np
+        except ImportError:
+            np = None
+
+        if np is not None:
+            keys, layouts = self.columns()
+            matches = np.all(keys[:, columns] == np.array(codes, dtype=np.uint8), axis=1)
+            return [int(layout) for layout in layouts[matches]]
+
+        return [self._layout(position) for position in range(self._count)
+                if all(self._key(position)[column] == code for column, code in zip(columns, codes))]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build and inspect memory-mapped signature tables.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build = commands.add_parser("build", help="trace every layout of an atom count and write its table")
+    build.add_argument("--atoms", type=int, required=True, help="number of atoms on the board")
+    build.add_argument("--size", type=int, default=10, help="rows (and columns) of the board, edges included")
+    build.add_argument("--output", help=f"file to write (default: {table_path('N')})")
+
+    info = commands.add_parser("info", help="describe a table")
+    info.add_argument("path", help="table file")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        # building needs NumPy, reading does not
+        import SignatureIndex
+
+        started = time.perf_counter()
+        index = SignatureIndex.SignatureIndex.build(args.atoms, args.size)
+        path = args.output or table_path(args.atoms, args.size)
+        write(index, path)
+        print(f"wrote {len(index)} layouts to {path} in {time.perf_counter() - started:.2f}s")
+        return
+
+    started = time.perf_counter()
+    with SignatureFile(args.path) as table:
+        opened = time.perf_counter() - started
+        print(f"{table.get_path()}: {len(table)} layouts of {table.get_atom_count()} atoms on a "
+              f"{table.get_size()}x{table.get_size()} board, opened in {opened * 1000:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
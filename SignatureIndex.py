@@ -0,0 +1,245 @@
+"""
+SignatureIndex - maps the full edge-ray signature of every layout of a given number of atoms to
+the layouts that produce it.
+
+A signature holds one byte per edge square (in BatchTracer.edge_origins order), encoded as by
+Tracer.signature: the number of the edge square the ray fired from it leaves by (its own number
+for a reflection) or HIT_CODE when it strikes an atom. Layouts are held as the bitmask of their
+interior cells (bit (row - 1) * (size - 2) + (column - 1) for each atom) so that a layout of a
+standard board fits in a uint64. Layouts are enumerated and traced in chunks with BatchTracer, and the index itself
+is two flat arrays sorted by signature, so no Board or Square objects are ever created.
+
+    python SignatureIndex.py --atoms 4
+"""
+import argparse
+import itertools
+import time
+
+import numpy as np
+
+import BatchTracer
+import Tracer
+
+# the signature byte of a ray which strikes an atom
+HIT_CODE = Tracer.HIT_CODE
+
+
+# the layout encodings are shared with the pure Python readers of signature tables
+layout_to_mask = Tracer.layout_to_mask
+mask_to_layout = Tracer.mask_to_layout
+
+
+def observation_codes(observations, size=10):
+    """
+    observation_codes - converts shoot_ray results to signature columns and bytes
+
+    :param observations: {(origin_row, origin_column): result of BlackBoxGame.shoot_ray}
+    :type observations: dict
+    :return: (columns, codes) - the signature column of each edge fired from and its expected byte
+    :rtype: tuple(np.ndarray[int64], np.ndarray[uint8])
+    """
+    edge_numbers = BatchTracer.edge_numbers(size)
+    columns = []
+    codes = []
+    for (row, column), result in observations.items():
+        columns.append(edge_numbers[row * size + column])
+        codes.append(HIT_CODE if result is None else edge_numbers[result[0] * size + result[1]])
+
+    return np.array(columns, dtype=np.int64), np.array(codes, dtype=np.uint8)
+
+
+def iter_signatures(atom_count, size=10, chunk_size=65536):
+    """
+    iter_signatures - streams every layout of atom_count atoms with its signature, in chunks
+
+    :param atom_count: the number of atoms on the board
+    :type atom_count: int
+    :param size: the number of rows (and columns) of the board - its interior must fit in 64 bits
+    :type size: int
+    :param chunk_size: the number of layouts traced at a time
+    :type chunk_size: int
+    :return: generator of (layouts, signatures) of shapes (L,) uint64 and (L, 4 * (size - 2)) uint8
+    :rtype: generator[tuple(np.ndarray, np.ndarray)]
+    """
+    inner = size - 2
+    if inner * inner > 64:
+        raise ValueError("the interior of the board must have 64 cells or fewer")
+
+    cells = BatchTracer.interior_cells(size)
+    edge_numbers = BatchTracer.edge_numbers(size)
+    combinations = itertools.combinations(range(inner * inner), atom_count)
+
+    while True:
+        chosen = np.fromiter(itertools.chain.from_iterable(itertools.islice(combinations, chunk_size)),
+                             dtype=np.int64)
+        if len(chosen) == 0:
+            return
+        chosen = chosen.reshape(-1, atom_count)
+        count = len(chosen)
+
+        boards = np.zeros((count, size * size), dtype=bool)
+        boards[np.arange(count)[:, None], cells[chosen]] = True
+        outcomes, termini = BatchTracer.trace_batch(boards.reshape(count, size, size))
+
+        signatures = np.where(outcomes == BatchTracer.HIT, HIT_CODE, edge_numbers[termini]).astype(np.uint8)
+        layouts = np.bitwise_or.reduce(np.left_shift(np.uint64(1), chosen.astype(np.uint64)), axis=1)
+
+        yield layouts, signatures
+
+
+class SignatureIndex():
+    """
+    SignatureIndex - the layouts of one atom count sorted by their signature, answering which
+    layouts give a signature, which layouts share their signature with another, and which layouts
+    match a partial set of observations.
+    """
+    def __init__(self, atom_count, size, layouts, signatures):
+        """
+        __init__ - initializes an index from layouts and their signatures
+
+        :param atom_count: the number of atoms in each layout
+        :type atom_count: int
+        :param size: the number of rows (and columns) of the board
+        :type size: int
+        :param layouts: interior layout masks
+        :type layouts: np.ndarray[uint64]
+        :param signatures: one row of signature bytes per layout
+        :type signatures: np.ndarray[uint8]
+        """
+        self._atom_count = atom_count
+        self._size = size
+
+        order = np.argsort(_keys(signatures), kind="stable")
+        self._layouts = np.ascontiguousarray(layouts[order])
+        self._signatures = np.ascontiguousarray(signatures[order])
+        self._keys = _keys(self._signatures)
+
+        # the first row of each run of equal signatures, and the length of each run
+        starts = np.ones(len(self._keys), dtype=bool)
+        starts[1:] = self._keys[1:] != self._keys[:-1]
+        self._group_starts = np.flatnonzero(starts)
+        self._group_sizes = np.diff(np.append(self._group_starts, len(self._keys)))
+
+    @classmethod
+    def build(cls, atom_count, size=10, chunk_size=65536):
+        """
+        build - enumerates and traces every layout of atom_count atoms and indexes them
+
+        :rtype: Object(SignatureIndex)
+        """
+        layouts = []
+        signatures = []
+        for chunk_layouts, chunk_signatures in iter_signatures(atom_count, size, chunk_size):
+            layouts.append(chunk_layouts)
+            signatures.append(chunk_signatures)
+
+        return cls(atom_count, size, np.concatenate(layouts), np.concatenate(signatures))
+
+    def get_atom_count(self):
+        return self._atom_count
+
+    def get_size(self):
+        return self._size
+
+    def get_layouts(self):
+        """
+        get_layouts - returns every layout, sorted by signature
+        """
+        return self._layouts
+
+    def get_signatures(self):
+        """
+        get_signatures - returns the signature of every layout, in the same order as get_layouts
+        """
+        return self._signatures
+
+    def __len__(self):
+        return len(self._layouts)
+
+    def distinct_signatures(self):
+        """
+        distinct_signatures - returns the number of different signatures
+        """
+        return len(self._group_starts)
+
+    def lookup(self, signature):
+        """
+        lookup - returns the layouts with exactly the given signature
+
+        :param signature: one byte per edge
+        :type signature: bytes or np.ndarray[uint8]
+        :rtype: np.ndarray[uint64]
+        """
+        key = _keys(np.frombuffer(bytes(signature), dtype=np.uint8).reshape(1, -1))[0]
+        start = np.searchsorted(self._keys, key, side="left")
+        end = np.searchsorted(self._keys, key, side="right")
+
+        return self._layouts[start:end]
+
+    def ambiguous_layouts(self):
+        """
+        ambiguous_layouts - returns the layouts whose signature some other layout shares
+
+        :rtype: np.ndarray[uint64]
+        """
+        shared = np.repeat(self._group_sizes > 1, self._group_sizes)
+
+        return self._layouts[shared]
+
+    def ambiguity_histogram(self):
+        """
+        ambiguity_histogram - returns how many signatures are shared by each number of layouts
+
+        :return: {layouts sharing a signature: number of such signatures}
+        :rtype: dict[int, int]
+        """
+        sizes, counts = np.unique(self._group_sizes, return_counts=True)
+
+        return {int(size): int(count) for size, count in zip(sizes, counts)}
+
+    def match(self, observations):
+        """
+        match - returns the layouts consistent with a partial set of observations
+
+        :param observations: {(origin_row, origin_column): result of BlackBoxGame.shoot_ray}
+        :type observations: dict
+        :rtype: np.ndarray[uint64]
+        """
+        columns, codes = observation_codes(observations, self._size)
+        if len(columns) == 0:
+            return self._layouts
+
+        matches = np.all(self._signatures[:, columns] == codes, axis=1)
+
+        return self._layouts[matches]
+
+
+def _keys(signatures):
+    """
+    _keys - views each row of signature bytes as a single sortable value
+    """
+    signatures = np.ascontiguousarray(signatures)
+
+    return signatures.view(np.dtype((np.void, signatures.shape[1]))).reshape(-1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Index the edge-ray signature of every layout of a number of atoms.")
+    parser.add_argument("--atoms", type=int, default=3, help="number of atoms on the board")
+    parser.add_argument("--size", type=int, default=10, help="rows (and columns) of the board, edges included")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    index = SignatureIndex.build(args.atoms, args.size)
+    elapsed = time.perf_counter() - started
+
+    ambiguous = len(index.ambiguous_layouts())
+    print(f"{len(index)} layouts of {args.atoms} atoms traced and indexed in {elapsed:.2f}s")
+    print(f"{index.distinct_signatures()} distinct signatures, "
+          f"{ambiguous} layouts ({ambiguous / len(index):.1%}) share theirs with another layout")
+    for layouts, signatures in sorted(index.ambiguity_histogram().items()):
+        print(f"  {signatures} signatures given by {layouts} layouts")
+
+
+if __name__ == "__main__":
+    main()
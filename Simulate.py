@@ -0,0 +1,249 @@
+"""
+Simulate - plays large numbers of games of Black Box headlessly (without pygame) and reports
+aggregate statistics, spreading the games across every core with a process pool.
+
+    python Simulate.py --games 100000 --atoms 4 --strategy random
+
+Strategies are chosen by name from Strategies.STRATEGIES or given as module:Class for any
+subclass of Strategies.Strategy importable from the current directory.
+"""
+import argparse
+import collections
+import importlib
+import json
+import multiprocessing
+import os
+import random
+import time
+
+import BlackBoxGame_Controller as BlackBoxGame
+import Strategies
+
+
+def load_strategy(name):
+    """
+    load_strategy - returns the strategy class called name
+
+    :param name: a key of Strategies.STRATEGIES or module:Class
+    :type name: String
+    :return: the strategy class
+    :rtype: type
+    """
+    if name in Strategies.STRATEGIES:
+        return Strategies.STRATEGIES[name]
+
+    module_name, _, class_name = name.partition(":")
+    if not class_name:
+        raise ValueError(f"Unknown strategy {name!r} - use one of "
+                         f"{', '.join(Strategies.STRATEGIES)} or module:Class")
+
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def play_game(game, strategy):
+    """
+    play_game - plays a game to its end with a strategy
+
+    :param game: a freshly created game
+    :type game: Object(BlackBoxGame)
+    :param strategy: the player
+    :type strategy: Object(Strategies.Strategy)
+    :return: (final score, rays fired, guesses made, whether every atom was found)
+    :rtype: tuple(int, int, int, Bool)
+    """
+    rays = 0
+    guesses = 0
+    strategy.new_game(game)
+
+    while game.get_score() > 0 and game.atoms_left() > 0:
+        action = strategy.next_action(game)
+        if action is None:
+            break
+
+        kind, row, column = action
+        if kind == Strategies.SHOOT:
+            result = game.shoot_ray(row, column)
+            rays += 1
+        else:
+            result = game.guess_atom(row, column)
+            guesses += 1
+
+        strategy.observe(action, result)
+
+    return (game.get_score(), rays, guesses, game.atoms_left() == 0)
+
+
+def run_chunk(job):
+    """
+    run_chunk - plays one chunk of games in a worker process
+
+    Every chunk seeds its own randomness from the run's seed and the chunk's number so that a run
+    gives the same statistics however many workers it is spread across.
+
+    :param job: (seed, chunk number, games, atoms, board size, strategy name)
+    :type job: tuple
+    :return: counters of final scores, rays per game and guesses per game, and the number of wins
+    :rtype: tuple(Counter, Counter, Counter, int)
+    """
+    seed, chunk, games, atoms, size, strategy_name = job
+
+    random.seed(f"{seed}:{chunk}")
+    strategy = load_strategy(strategy_name)(random.Random(f"{seed}:{chunk}:strategy"))
+
+    scores = collections.Counter()
+    rays = collections.Counter()
+    guesses = collections.Counter()
+    wins = 0
+
+    for _ in range(games):
+        score, game_rays, game_guesses, won = play_game(BlackBoxGame.BlackBoxGame(atoms, size), strategy)
+        scores[score] += 1
+        rays[game_rays] += 1
+        guesses[game_guesses] += 1
+        wins += won
+
+    return (scores, rays, guesses, wins)
+
+
+def summarize(counter):
+    """
+    summarize - returns the mean, extremes, quartiles and histogram of a distribution
+
+    :param counter: the number of games with each value
+    :type counter: Counter
+    :return: summary statistics
+    :rtype: dict
+    """
+    total = sum(counter.values())
+    values = sorted(counter)
+
+    def percentile(fraction):
+        rank = fraction * (total - 1)
+        seen = 0
+        for value in values:
+            seen += counter[value]
+            if seen > rank:
+                return value
+
+    return {
+        "mean": sum(value * count for value, count in counter.items()) / total,
+        "min": values[0],
+        "p25": percentile(0.25),
+        "median": percentile(0.5),
+        "p75": percentile(0.75),
+        "max": values[-1],
+        "histogram": {str(value): counter[value] for value in values},
+    }
+
+
+def simulate(games, atoms, size=10, strategy="random", workers=None, seed=0, chunk_size=250):
+    """
+    simulate - plays games across a pool of worker processes and aggregates the results
+
+    :param games: the number of games to play
+    :type games: int
+    :param atoms: the number of atoms on each board
+    :type atoms: int
+    :param size: the number of rows (and columns) of each board
+    :type size: int
+    :param strategy: the name of the strategy playing (see load_strategy)
+    :type strategy: String
+    :param workers: the number of worker processes - every core if None
+    :type workers: int
+    :param seed: the seed the games are generated from
+    :type seed: int
+    :param chunk_size: the number of games handed to a worker at a time
+    :type chunk_size: int
+    :return: aggregate statistics of the run
+    :rtype: dict
+    """
+    if games < 1:
+        raise ValueError(f"cannot simulate {games} games - play at least one")
+    if chunk_size < 1:
+        raise ValueError(f"cannot hand workers chunks of {chunk_size} games")
+
+    # fail on an unknown strategy before starting any workers
+    load_strategy(strategy)
+    workers = workers or os.cpu_count() or 1
+
+    jobs = []
+    for chunk, start in enumerate(range(0, games, chunk_size)):
+        jobs.append((seed, chunk, min(chunk_size, games - start), atoms, size, strategy))
+
+    scores = collections.Counter()
+    rays = collections.Counter()
+    guesses = collections.Counter()
+    wins = 0
+
+    started = time.perf_counter()
+    with multiprocessing.Pool(workers) as pool:
+        for chunk_scores, chunk_rays, chunk_guesses, chunk_wins in pool.imap_unordered(run_chunk, jobs):
+            scores.update(chunk_scores)
+            rays.update(chunk_rays)
+            guesses.update(chunk_guesses)
+            wins += chunk_wins
+    elapsed = time.perf_counter() - started
+
+    return {
+        "games": games,
+        "atoms": atoms,
+        "size": size,
+        "strategy": strategy,
+        "seed": seed,
+        "workers": workers,
+        "wins": wins,
+        "win_rate": wins / games,
+        "score": summarize(scores),
+        "rays_per_game": summarize(rays),
+        "guesses_per_game": summarize(guesses),
+        "seconds": elapsed,
+        "games_per_second": games / elapsed,
+        "games_per_second_per_core": games / elapsed / workers,
+    }
+
+
+def print_report(stats):
+    """
+    print_report - prints the statistics of a run in a human readable form
+    """
+    print(f"{stats['games']} games of {stats['atoms']} atoms on a {stats['size']}x{stats['size']} board "
+          f"played by '{stats['strategy']}' (seed {stats['seed']})")
+    print(f"won {stats['wins']} ({stats['win_rate']:.1%})")
+
+    for key, label in (("score", "final score"), ("rays_per_game", "rays per game"),
+                       ("guesses_per_game", "guesses per game")):
+        summary = stats[key]
+        print(f"{label}: mean {summary['mean']:.2f}, min {summary['min']}, p25 {summary['p25']}, "
+              f"median {summary['median']}, p75 {summary['p75']}, max {summary['max']}")
+
+    print(f"{stats['seconds']:.2f}s on {stats['workers']} workers - {stats['games_per_second']:.0f} games/s, "
+          f"{stats['games_per_second_per_core']:.0f} games/s per core")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play games of Black Box headlessly and report statistics.")
+    parser.add_argument("--games", type=int, default=10000, help="number of games to play")
+    parser.add_argument("--atoms", type=int, default=4, help="number of atoms on each board")
+    parser.add_argument("--size", type=int, default=10, help="rows (and columns) of each board, edges included")
+    parser.add_argument("--strategy", default="random",
+                        help=f"one of {', '.join(Strategies.STRATEGIES)} or module:Class")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: every core)")
+    parser.add_argument("--seed", type=int, default=0, help="seed the games are generated from")
+    parser.add_argument("--chunk-size", type=int, default=250, help="games handed to a worker at a time")
+    parser.add_argument("--json", action="store_true", help="print the statistics as JSON")
+    args = parser.parse_args(argv)
+    if args.games < 1:
+        parser.error("--games must be at least 1")
+    if args.chunk_size < 1:
+        parser.error("--chunk-size must be at least 1")
+
+    stats = simulate(args.games, args.atoms, args.size, args.strategy, args.workers, args.seed, args.chunk_size)
+
+    if args.json:
+        print(json.dumps(stats, indent=2))
+    else:
+        print_report(stats)
+
+
+if __name__ == "__main__":
+    main()
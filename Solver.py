@@ -0,0 +1,414 @@
+"""
+Solver - finds the atom layouts consistent with the rays fired (and guesses made) in a game.
+
+Rather than enumerating every layout and tracing every ray across each of them, the solver
+traces the observed rays over a partially known board, where each interior cell is UNKNOWN,
+EMPTY or an ATOM. A ray is followed until it reads an UNKNOWN cell, and the search only ever
+branches on a cell some ray is waiting for, so a wrong choice is usually caught by the very
+next step of that ray. Once every ray is resolved the cells none of them read cannot affect
+any outcome and the remaining atoms may be placed among them in any combination.
+
+Before searching, the facts that follow directly from an observation are filled in: a guess
+fixes its cell, a ray that was not a hit passed through the cell in front of its origin, and a
+ray that left the board by another edge also passed the cells diagonal to its first step and
+the cell in front of the edge it left by.
+"""
+import itertools
+import math
+
+import Tracer
+
+# what is known about each cell during the search
+UNKNOWN = 0
+EMPTY = 1
+ATOM = 2
+
+
+class Contradiction(Exception):
+    """
+    Contradiction - raised when the observations given to a Solver cannot all be true
+    """
+    pass
+
+
+def advance(known, size, origin, position, direction):
+    """
+    advance - walks a ray over a partially known board by the rules of Tracer.trace until it
+    either finishes or needs to know a cell which is still UNKNOWN
+
+    :param known: UNKNOWN, EMPTY or ATOM for every cell (edges are EMPTY)
+    :type known: bytearray
+    :param size: the number of rows (and columns) of the board
+    :type size: int
+    :param origin: flat index of the edge cell the ray was fired from
+    :type origin: int
+    :param position: flat index of the ray's current cell
+    :type position: int
+    :param direction: the ray's current direction
+    :type direction: int
+    :return: (outcome, terminus, position, direction) - outcome is None if the ray is waiting on
+             the UNKNOWN cell terminus, position and direction being where it stopped
+    :rtype: tuple(String or None, int, int, int)
+    """
+    steps = (-size, 1, size, -1)
+    last = size - 1
+
+    while True:
+        next_position = position + steps[direction]
+        state = known[next_position]
+
+        if state == UNKNOWN:
+            return (None, next_position, position, direction)
+
+        if state == ATOM:
+            return (Tracer.HIT, next_position, position, direction)
+
+        row, column = divmod(next_position, size)
+        if row == 0 or row == last or column == 0 or column == last:
+            outcome = Tracer.REFLECTION if next_position == origin else Tracer.EXIT
+            return (outcome, next_position, position, direction)
+
+        side = size if direction & 1 else 1
+        ccw_state = known[next_position - side]
+        cw_state = known[next_position + side]
+
+        # on the first move a single atom diagonal is enough to reflect the ray
+        if position == origin and (ccw_state == ATOM or cw_state == ATOM):
+            return (Tracer.REFLECTION, origin, position, direction)
+
+        if ccw_state == UNKNOWN:
+            return (None, next_position - side, position, direction)
+        if cw_state == UNKNOWN:
+            return (None, next_position + side, position, direction)
+
+        if ccw_state == ATOM or cw_state == ATOM:
+            if ccw_state == ATOM and cw_state == ATOM:
+                direction ^= 2
+            elif ccw_state == ATOM:
+                direction = Tracer.DOWN if direction & 1 else Tracer.RIGHT
+            else:
+                direction = Tracer.UP if direction & 1 else Tracer.LEFT
+
+            next_position = position + steps[direction]
+            state = known[next_position]
+
+            # the turn is remembered, so the ray resumes from here on its new trajectory
+            if state == UNKNOWN:
+                return (None, next_position, position, direction)
+
+            if state == ATOM:
+                return (Tracer.HIT, next_position, position, direction)
+
+            row, column = divmod(next_position, size)
+            if row == 0 or row == last or column == 0 or column == last:
+                outcome = Tracer.REFLECTION if next_position == origin else Tracer.EXIT
+                return (outcome, next_position, position, direction)
+
+        position = next_position
+
+
+class Solver():
+    """
+    Solver - collects the results of rays fired and atoms guessed on a board of known size and
+    atom count, and produces the atom layouts consistent with all of them.
+
+    Layouts are produced as bitboards, the same encoding as Board.get_atom_mask.
+    """
+    def __init__(self, atom_count, size=10):
+        """
+        __init__ - initializes a solver with nothing yet observed
+
+        :param atom_count: the number of (distinct) atoms on the board
+        :type atom_count: int
+        :param size: the number of rows (and columns) of the board, edges included
+        :type size: int
+        """
+        self._atom_count = atom_count
+        self._size = size
+
+        # what the observations force, before any searching
+        last = size - 1
+        self._known = bytearray(size * size)
+        for index in range(size * size):
+            row, column = divmod(index, size)
+            if row in (0, last) or column in (0, last):
+                self._known[index] = EMPTY
+
+        # (origin, outcome, terminus) of each ray fired - terminus is None for hits - and
+        # (index, atom) of each guess
+        self._rays = []
+        self._guesses = []
+
+        # the groups of layouts (see partitions) consistent with the observations made up to the
+        # last search, and the numbers of rays and guesses it took in - later observations narrow
+        # the groups rather than searching again from scratch
+        self._partitions = None
+        self._searched_rays = 0
+        self._searched_guesses = 0
+
+    def get_atom_count(self):
+        """
+        get_atom_count - returns the number of atoms the solver places
+        """
+        return self._atom_count
+
+    def get_size(self):
+        """
+        get_size - returns the number of rows (and columns) of the board
+        """
+        return self._size
+
+    def get_known(self):
+        """
+        get_known - returns what the observations so far force about each cell, before any searching
+
+        :return: UNKNOWN, EMPTY or ATOM for every cell (edges are EMPTY)
+        :rtype: bytes
+        """
+        return bytes(self._known)
+
+    def add_ray(self, origin_row, origin_column, result):
+        """
+        add_ray - records the result of a ray fired from an edge square
+
+        :param origin_row: the row the ray was fired from
+        :type origin_row: int
+        :param origin_column: the column the ray was fired from
+        :type origin_column: int
+        :param result: the return value of BlackBoxGame.shoot_ray - None for a hit, the origin
+                       for a reflection and the exit square otherwise
+        :type result: tuple(int, int) or None
+        """
+        size = self._size
+        origin = origin_row * size + origin_column
+        direction = Tracer.initial_direction(origin, size)
+        steps = (-size, 1, size, -1)
+        first = origin + steps[direction]
+        side = size if direction & 1 else 1
+
+        if result is None:
+            self._rays.append((origin, Tracer.HIT, None))
+            return
+
+        terminus = result[0] * size + result[1]
+
+        # a ray which is not a hit passed through the cell in front of its origin
+        self._force(first, EMPTY)
+
+        if terminus == origin:
+            self._rays.append((origin, Tracer.REFLECTION, terminus))
+            return
+
+        # and unless it was reflected nothing was diagonal to that first step, and it passed
+        # through the cell in front of the edge it left by
+        self._force(first - side, EMPTY)
+        self._force(first + side, EMPTY)
+        self._force(terminus + steps[Tracer.initial_direction(terminus, size)], EMPTY)
+
+        self._rays.append((origin, Tracer.EXIT, terminus))
+
+    def add_guess(self, row, column, result):
+        """
+        add_guess - records the result of guessing an atom
+
+        :param row: the row guessed
+        :type row: int
+        :param column: the column guessed
+        :type column: int
+        :param result: the return value of BlackBoxGame.guess_atom
+        :type result: Bool
+        """
+        self._force(row * self._size + column, ATOM if result else EMPTY)
+        self._guesses.append((row * self._size + column, bool(result)))
+
+    def _force(self, index, state):
+        """
+        _force - records a fact about a cell, raising Contradiction if it conflicts with another
+        """
+        if self._known[index] not in (UNKNOWN, state):
+            raise Contradiction(f"cell {divmod(index, self._size)} cannot be both empty and an atom")
+
+        self._known[index] = state
+
+    def solutions(self):
+        """
+        solutions - yields every atom layout consistent with the observations
+
+        :return: generator of layouts as bitboards (bit row * size + column set for each atom)
+        :rtype: generator[int]
+        """
+        for placed_mask, free_cells, remaining in self.partitions():
+            if remaining == 0:
+                yield placed_mask
+                continue
+
+            for chosen in itertools.combinations(free_cells, remaining):
+                mask = placed_mask
+                for index in chosen:
+                    mask |= 1 << index
+                yield mask
+
+    def partitions(self):
+        """
+        partitions - yields the consistent layouts in groups without producing them: each group is
+        every way of placing a number of atoms among some free cells alongside a set of atoms
+        already placed. The groups do not overlap, and a group holds
+        math.comb(len(free cells), atoms left) layouts.
+
+        The groups are kept, and the next call only narrows them by the observations made since.
+
+        :return: generator of (placed bitboard, free cell indices, atoms left to place)
+        :rtype: generator[tuple(int, List[int], int)]
+        """
+        if self._partitions is None:
+            self._partitions = [(placed_mask, [index for index, state in enumerate(known) if state == UNKNOWN],
+                                 self._atom_count - placed)
+                                for known, placed_mask, placed, free in self._search()]
+        else:
+            self._narrow()
+        self._searched_rays = len(self._rays)
+        self._searched_guesses = len(self._guesses)
+
+        yield from self._partitions
+
+    def count(self):
+        """
+        count - returns the number of atom layouts consistent with the observations without
+        producing them
+
+        :rtype: int
+        """
+        return sum(math.comb(len(free_cells), remaining) for _, free_cells, remaining in self.partitions())
+
+    def _narrow(self):
+        """
+        _narrow - splits the groups of the last search by the guesses made since, then searches
+        within each group for the layouts which agree with the rays fired since. The rays of the
+        earlier observations never read a group's free cells, so they cannot disagree.
+        """
+        partitions = self._partitions
+
+        for index, atom in self._guesses[self._searched_guesses:]:
+            bit = 1 << index
+            narrowed = []
+            for placed_mask, free_cells, remaining in partitions:
+                if index not in free_cells:
+                    if bool(placed_mask & bit) == atom:
+                        narrowed.append((placed_mask, free_cells, remaining))
+                    continue
+
+                others = [cell for cell in free_cells if cell != index]
+                if atom and remaining > 0:
+                    narrowed.append((placed_mask | bit, others, remaining - 1))
+                elif not atom and len(others) >= remaining:
+                    narrowed.append((placed_mask, others, remaining))
+            partitions = narrowed
+
+        new_rays = self._rays[self._searched_rays:]
+        if new_rays:
+            size = self._size
+            rays = [(origin, outcome, terminus, origin, Tracer.initial_direction(origin, size), None)
+                    for origin, outcome, terminus in new_rays]
+            narrowed = []
+            for placed_mask, free_cells, remaining in partitions:
+                # every interior cell of a group is an atom placed, free, or read as empty
+                known = bytearray([EMPTY]) * (size * size)
+                for index in free_cells:
+                    known[index] = UNKNOWN
+                mask = placed_mask
+                while mask:
+                    low = mask & -mask
+                    known[low.bit_length() - 1] = ATOM
+                    mask ^= low
+
+                placed = self._atom_count - remaining
+                for known, mask, _, _ in self._branch(known, rays, placed_mask, placed, len(free_cells)):
+                    narrowed.append((mask, [index for index in free_cells if known[index] == UNKNOWN],
+                                     self._atom_count - bin(mask).count("1")))
+            partitions = narrowed
+
+        self._partitions = partitions
+
+    def _search(self):
+        """
+        _search - runs the backtracking search over the cells the observed rays read, yielding
+        a (known, placed mask, atoms placed, unknown cells) for each point where every ray
+        has been resolved. known is shared with the search and only valid until the next yield.
+        """
+        known = bytearray(self._known)
+        size = self._size
+
+        placed_mask = 0
+        placed = 0
+        for index, state in enumerate(known):
+            if state == ATOM:
+                placed_mask |= 1 << index
+                placed += 1
+        free = known.count(UNKNOWN)
+
+        if placed > self._atom_count or placed + free < self._atom_count:
+            return
+
+        # each ray waits at (position, direction) on the UNKNOWN cell blocked
+        rays = [(origin, outcome, terminus, origin, Tracer.initial_direction(origin, size), None)
+                for origin, outcome, terminus in self._rays]
+
+        yield from self._branch(known, rays, placed_mask, placed, free)
+
+    def _branch(self, known, rays, placed_mask, placed, free):
+        """
+        _branch - advances every ray that can move, then branches on the cell the first one
+        still waiting needs
+        """
+        size = self._size
+        waiting = []
+
+        for ray in rays:
+            origin, outcome, terminus, position, direction, blocked = ray
+
+            # a ray whose cell is still unknown cannot have moved
+            if blocked is not None and known[blocked] == UNKNOWN:
+                waiting.append(ray)
+                continue
+
+            result, cell, position, direction = advance(known, size, origin, position, direction)
+
+            if result is None:
+                waiting.append((origin, outcome, terminus, position, direction, cell))
+                continue
+
+            if result != outcome or (terminus is not None and cell != terminus):
+                return
+
+        if not waiting:
+            yield (known, placed_mask, placed, free)
+            return
+
+        cell = waiting[0][5]
+
+        # the cell is empty if there are enough unknown cells left for the rest of the atoms
+        if placed + free - 1 >= self._atom_count:
+            known[cell] = EMPTY
+            yield from self._branch(known, waiting, placed_mask, placed, free - 1)
+
+        # and an atom if there are atoms left to place
+        if placed < self._atom_count:
+            known[cell] = ATOM
+            yield from self._branch(known, waiting, placed_mask | (1 << cell), placed + 1, free - 1)
+
+        known[cell] = UNKNOWN
+
+
+def positions_from_mask(mask, size=10):
+    """
+    positions_from_mask - converts a layout bitboard to the [row, column] of each atom
+
+    :rtype: List[[int, int]]
+    """
+    positions = []
+    while mask:
+        low = mask & -mask
+        positions.append(list(divmod(low.bit_length() - 1, size)))
+        mask ^= low
+
+    return positions
@@ -0,0 +1,266 @@
+"""
+SparseBoard - traces rays on boards far too large to build, for research into how the game scales.
+
+Board keeps a flag for every cell, so a 100,000 x 100,000 board would need ten billion of them, and
+Tracer walks a ray one cell at a time. A SparseBoard keeps only the atoms - the columns of the
+atoms in each row and the rows of the atoms in each column, sorted - and jumps a ray straight to
+the next cell it could be turned at: the nearest ahead with an atom in it or diagonal to it. From
+there it follows exactly the step rules of Tracer.trace (and so of BlackBoxGame.move_ray and
+Ray.recalculate_trajectory), including the single step taken after a turn without looking at that
+cell's diagonals. A trace costs time in the number of turns the ray makes, not the cells it crosses.
+
+    board = SparseBoard.SparseBoard.random(100000, 2000, random.Random(1))
+    outcome, terminus, turns = board.trace(origin, full_path=False)
+"""
+import bisect
+
+import Layouts
+import Tracer
+
+
+class SparseBoard():
+    """
+    SparseBoard - the atoms of a board indexed by row and by column, without its cells
+    """
+    def __init__(self, size, atom_positions=()):
+        """
+        :param size: the number of rows (and columns) of the board, edges included
+        :type size: int
+        :param atom_positions: where the atoms are
+        :type atom_positions: List[[row, column]]
+        :raises ValueError: if an atom is not inside the edges
+        """
+        if size < 3:
+            raise ValueError("a board has a size of three or more")
+
+        self._size = size
+        # flat indices (row * size + column) of the atoms, and the sorted columns of the atoms in
+        # each row and rows of the atoms in each column
+        self._atoms = set()
+        self._rows = {}
+        self._columns = {}
+
+        for row, column in atom_positions:
+            self.set_atom(row, column, True)
+
+    @classmethod
+    def from_board(cls, board):
+        """
+        from_board - returns a sparse copy of a Board's atoms
+        """
+        return cls(board.get_size(), board.get_atoms())
+
+    @classmethod
+    def random(cls, size, atom_count, rng):
+        """
+        random - returns a board with atom_count atoms placed at random, without building the
+        layout mask (which has a bit for every interior cell)
+
+        :param rng: the source of randomness
+        :type rng: random.Random
+        """
+        inner = size - 2
+        if not 1 <= atom_count <= Layouts.interior_size(size):
+            raise ValueError(f"a {size}x{size} board holds between 1 and {Layouts.interior_size(size)} atoms")
+
+        cells = rng.sample(range(Layouts.interior_size(size)), atom_count)
+
+        return cls(size, [(cell // inner + 1, cell % inner + 1) for cell in cells])
+
+    def get_size(self):
+        return self._size
+
+    def get_atom_count(self):
+        return len(self._atoms)
+
+    def get_atoms(self):
+        """
+        get_atoms - returns the positions of the atoms, in row major order
+
+        :rtype: List[[row, column]]
+        """
+        return [list(divmod(index, self._size)) for index in sorted(self._atoms)]
+
+    def is_atom(self, row, column):
+        return row * self._size + column in self._atoms
+
+    def set_atom(self, row, column, status):
+        """
+        set_atom - adds or removes the atom of an interior square
+
+        :raises ValueError: if the square is not inside the edges
+        """
+        size = self._size
+        if not (0 < row < size - 1 and 0 < column < size - 1):
+            raise ValueError(f"atoms can only be placed inside the edges, not at ({row}, {column})")
+
+        index = row * size + column
+        if status == (index in self._atoms):
+            return
+
+        if status:
+            self._atoms.add(index)
+            bisect.insort(self._rows.setdefault(row, []), column)
+            bisect.insort(self._columns.setdefault(column, []), row)
+        else:
+            self._atoms.discard(index)
+            for lines, line, offset in ((self._rows, row, column), (self._columns, column, row)):
+                offsets = lines[line]
+                del offsets[bisect.bisect_left(offsets, offset)]
+                if not offsets:
+                    del lines[line]
+
+    def _distance_ahead(self, row, column, direction):
+        """
+        _distance_ahead - returns how many steps ahead the nearest cell with an atom in it or
+        diagonal to it is, or None if the ray reaches the edge first
+        """
+        if direction & 1:
+            lines, line, offset = self._rows, row, column
+        else:
+            lines, line, offset = self._columns, column, row
+        forward = direction in (Tracer.RIGHT, Tracer.DOWN)
+
+        nearest = None
+        for near_line in (line - 1, line, line + 1):
+            offsets = lines.get(near_line)
+            if not offsets:
+                continue
+
+            if forward:
+                found = bisect.bisect_right(offsets, offset)
+                if found < len(offsets):
+                    distance = offsets[found] - offset
+                else:
+                    continue
+            else:
+                found = bisect.bisect_left(offsets, offset)
+                if found > 0:
+                    distance = offset - offsets[found - 1]
+                else:
+                    continue
+
+            if nearest is None or distance < nearest:
+                nearest = distance
+
+        return nearest
+
+    def trace(self, origin, position=None, direction=None, full_path=True):
+        """
+        trace - walks a ray fired from origin until it strikes an atom or leaves the board, with
+        the same arguments and results as Tracer.trace
+
+        :param full_path: whether to return every cell the ray travelled through, as Tracer.trace
+                          does - otherwise only the cells it started from, turned at and ended at
+                          are returned (see expand_path), so that the trace costs nothing per cell
+        :type full_path: Bool
+        :return: (outcome, terminus, path) - flat indices, as from Tracer.trace
+        :rtype: tuple(String, int, list[int])
+        """
+        size = self._size
+        last = size - 1
+        atoms = self._atoms
+        if position is None:
+            position = origin
+        if direction is None:
+            direction = Tracer.initial_direction(origin, size)
+
+        # the change in flat index, row and column for a step in each direction
+        steps = (-size, 1, size, -1)
+        row_steps = (-1, 0, 1, 0)
+        column_steps = (0, 1, 0, -1)
+        row, column = divmod(position, size)
+        turns = [position]
+
+        def finish(outcome, terminus):
+            if turns[-1] != position:
+                turns.append(position)
+            return (outcome, terminus, self.expand_path(turns) if full_path else turns)
+
+        while True:
+            # the steps to the edge ahead, and to the nearest cell which could stop or turn the ray
+            if direction == Tracer.UP:
+                to_edge = row
+            elif direction == Tracer.RIGHT:
+                to_edge = last - column
+            elif direction == Tracer.DOWN:
+                to_edge = last - row
+            else:
+                to_edge = column
+            ahead = self._distance_ahead(row, column, direction)
+
+            if ahead is None or ahead >= to_edge:
+                # nothing stands in the way - the ray runs straight out of the board
+                row += row_steps[direction] * to_edge
+                column += column_steps[direction] * to_edge
+                position = row * size + column
+                return finish(Tracer.REFLECTION if position == origin else Tracer.EXIT, position)
+
+            # the ray runs up to the cell before it
+            row += row_steps[direction] * (ahead - 1)
+            column += column_steps[direction] * (ahead - 1)
+            position = row * size + column
+            next_position = position + steps[direction]
+
+            if next_position in atoms:
+                return finish(Tracer.HIT, next_position)
+
+            # the diagonals of the next cell lie beside it across the direction of travel
+            side = size if direction & 1 else 1
+            ccw_atom = next_position - side in atoms
+            cw_atom = next_position + side in atoms
+
+            # atoms diagonal to the first move reflect the ray straight back out
+            if position == origin:
+                return finish(Tracer.REFLECTION, origin)
+
+            # otherwise the ray turns away from them (or back on itself if both are atoms)
+            if ccw_atom and cw_atom:
+                direction ^= 2
+            elif ccw_atom:
+                direction = Tracer.DOWN if direction & 1 else Tracer.RIGHT
+            else:
+                direction = Tracer.UP if direction & 1 else Tracer.LEFT
+
+            if turns[-1] != position:
+                turns.append(position)
+
+            # one step on the new trajectory, without looking at the diagonals of the cell it enters
+            next_position = position + steps[direction]
+
+            if next_position in atoms:
+                return finish(Tracer.HIT, next_position)
+
+            row += row_steps[direction]
+            column += column_steps[direction]
+            position = next_position
+            if row in (0, last) or column in (0, last):
+                return finish(Tracer.REFLECTION if position == origin else Tracer.EXIT, position)
+
+    def expand_path(self, turns):
+        """
+        expand_path - returns every cell of a path given by the cells it starts at, turns at and
+        ends at (as traced with full_path=False)
+
+        :type turns: list[int]
+        :rtype: list[int]
+        """
+        size = self._size
+        path = [turns[0]]
+
+        for start, end in zip(turns, turns[1:]):
+            step = 1 if start // size == end // size else size
+            if end < start:
+                step = -step
+            path.extend(range(start + step, end + step, step))
+
+        return path
+
+    def path_length(self, turns):
+        """
+        path_length - returns the number of cells in a path given by its turns, without expanding it
+        """
+        size = self._size
+
+        return 1 + sum(abs(end - start) // (1 if start // size == end // size else size)
+                       for start, end in zip(turns, turns[1:]))
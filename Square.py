@@ -1,7 +1,14 @@
+import Tracer
+
 class Square():
     """
     Square - a class representing an individual cell on the board. All that is needed to
-    instantiate an instance of square is a set of row and column coordinates.
+    instantiate an instance of square is a set of row and column coordinates and the board
+    it belongs to.
+
+    A square is a lightweight view onto its cell of the Board, which keeps the state of every
+    cell in a flat grid, so squares are only created when they are asked for and any number of
+    squares looking at the same cell agree with one another.
 
     Although a square does not need to know anything other than its placement when intiated
     it will interact with rays and the board frequently and as a result it will be able to
@@ -16,7 +23,9 @@ class Square():
 
 
     """
-    def __init__(self, row, column):
+    __slots__ = ("_row", "_column", "_board", "_index")
+
+    def __init__(self, row, column, board):
         """
         __init__ initiates an instance of the Square Class
 
@@ -24,24 +33,15 @@ class Square():
         :type row: int
         :param column: an integer representing a column
         :type column: int
+        :param board: the board holding the state of the square
+        :type board: Object(Board)
         """
         self._row = row
         self._column = column
-        self._selected = False
-
-        # Whether the square is an "edge" from which a ray can be launched
-        self._edge = self.is_edge()
-
-        #  Whether or not an atom is placed on the square
-        self._atom = False
-
-        # Whether or not a ray has originated from the square
-        # False if no - points towards Ray object if yes
-        self._originating_ray = False
+        self._board = board
 
-        # Whether or not a ray has terminated on the square. Defaults to False
-        # Contains tuple of origin of the terminating ray if one exists.
-        self._terminating_ray = False
+        # the square's position in the board's flat grid of cells
+        self._index = row * board.get_size() + column
 
     def get_position(self):
         """
@@ -51,23 +51,23 @@ class Square():
         :rtype: list[int, int]
         """
         return [self._row, self._column]
-    
+
     def get_originating_ray(self):
         """get_originating_ray - returns the ray (if any) which originated from this location"""
-        return self._originating_ray
+        return self._board.get_originating_rays().get(self._index, False)
 
     def set_originating_ray(self, ray):
         """set_originating_ray - sets the set_originating_ray property"""
 
-        self._originating_ray = ray
-        
+        self._board.get_originating_rays()[self._index] = ray
+
     def get_terminating_ray(self):
         """
         get_terminating_ray - returns the origin of any ray terminating at the square
         :return: a tuple repsenting the origin of a terminating ray
         :rtype: tuple(int, int)
         """
-        return self._terminating_ray
+        return self._board.get_terminating_rays().get(self._index, False)
 
     def set_terminating_ray(self, location):
         """
@@ -76,7 +76,7 @@ class Square():
         :param location: tuple containing the location parameters
         :type location: tuple(int, int)
         """
-        self._terminating_ray = location
+        self._board.get_terminating_rays()[self._index] = location
 
     def is_edge(self):
         """
@@ -85,27 +85,13 @@ class Square():
 
         :return: Bool
         """
-        if self._row == 0 or self._row == 9 or self._column == 0 or self._column == 9:
-            # check that the edge is not actually a corner square
-            if not self.is_corner():
-                # If not a corner and in a border row return True
-                return True
+        return bool(self._board.get_cells()[self._index] & Tracer.EDGE)
 
-        return False
-    
     def is_corner(self):
         # supplemental check  to make sure that origin square is not a corner square
-        if self._row == 0 and self._column == 0:
-            return True
-
-        if self._row == 0 and self._column == 9:
-            return True
+        last = self._board.get_size() - 1
 
-        if self._row == 9 and self._column == 0:
-            return True
-
-        if self._row == 9 and self._column == 9:
-            return True
+        return self._row in (0, last) and self._column in (0, last)
 
     def set_atom(self, status):
         """
@@ -113,7 +99,7 @@ class Square():
 
         :param status: Bool
         """
-        self._atom = status
+        self._board.set_flag(self._index, Tracer.ATOM, status)
 
     def is_atom(self):
         """
@@ -121,19 +107,19 @@ class Square():
 
         :return: Bool
         """
-        return self._atom
-    
+        return bool(self._board.get_cells()[self._index] & Tracer.ATOM)
+
     def is_selected(self):
         """
         is_selected - returns whether or not a square is currently selected
 
         :return: Bool
         """
-        return self._selected
+        return bool(self._board.get_cells()[self._index] & Tracer.SELECTED)
 
     def toggle_selected(self):
         """
         toggle_selected - toggles the current value of a square's _selected property
         """
 
-        self._selected = not self._selected
+        self._board.set_flag(self._index, Tracer.SELECTED, not self.is_selected())
@@ -0,0 +1,133 @@
+import abc
+import random
+
+# the actions a strategy can take
+SHOOT = "SHOOT"
+GUESS = "GUESS"
+
+
+class Strategy(abc.ABC):
+    """
+    Strategy - the base class for automated players of BlackBoxGame, used by the headless
+    simulation runner.
+
+    A strategy is asked for one action at a time by next_action and is told the result of each
+    action through observe, so it only ever learns about the board what a human player would.
+    """
+    def __init__(self, rng=None):
+        """
+        __init__ - initializes a strategy
+
+        :param rng: the source of randomness for the strategy's choices
+        :type rng: random.Random
+        """
+        self._rng = rng if rng is not None else random.Random()
+
+    def new_game(self, game):
+        """
+        new_game - called before the strategy's first action in a game
+
+        :param game: the game about to be played
+        :type game: Object(BlackBoxGame)
+        """
+        pass
+
+    @abc.abstractmethod
+    def next_action(self, game):
+        """
+        next_action - returns the strategy's next action, which every strategy must define
+
+        :param game: the game being played
+        :type game: Object(BlackBoxGame)
+        :return: (SHOOT or GUESS, row, column) or None to stop playing
+        :rtype: tuple(String, int, int) or None
+        """
+
+    def observe(self, action, result):
+        """
+        observe - tells the strategy the result of its last action
+
+        :param action: the action as returned by next_action
+        :type action: tuple(String, int, int)
+        :param result: the return value of shoot_ray or guess_atom
+        """
+        pass
+
+
+class RandomStrategy(Strategy):
+    """
+    RandomStrategy - fires a fixed number of rays from random edges it has not fired from and
+    then guesses random interior squares it has not guessed until the game ends.
+    """
+    def __init__(self, rng=None, rays=6):
+        """
+        __init__ - initializes a RandomStrategy
+
+        :param rng: the source of randomness for the strategy's choices
+        :type rng: random.Random
+        :param rays: the number of rays to fire before guessing
+        :type rays: int
+        """
+        super().__init__(rng)
+        self._rays = rays
+        self._edges = []
+        self._interior = []
+
+    def new_game(self, game):
+        board = game.get_board()
+        last = board.get_size() - 1
+
+        self._edges = board.get_edges()
+        self._rng.shuffle(self._edges)
+        self._edges = self._edges[:self._rays]
+
+        self._interior = [(row, column) for row in range(1, last) for column in range(1, last)]
+        self._rng.shuffle(self._interior)
+
+    def next_action(self, game):
+        if self._edges:
+            return (SHOOT,) + self._edges.pop()
+
+        if self._interior:
+            return (GUESS,) + self._interior.pop()
+
+        return None
+
+
+class InformationStrategy(Strategy):
+    """
+    InformationStrategy - fires the ray the hint engine expects to tell it the most until it
+    is certain of an atom's square (or no ray could tell it anything more), then guesses the
+    square most likely to hold an atom. Needs NumPy.
+    """
+    def new_game(self, game):
+        # imported here so that the other strategies do not need NumPy
+        import Hints
+
+        self._hints = Hints.HintEngine(game, rng=random.Random(self._rng.getrandbits(64)))
+        self._guessed = set()
+
+    def next_action(self, game):
+        belief = self._hints.get_belief()
+        best = self._hints.best()
+
+        atoms = belief.get_atoms()
+        if len(atoms) == 0:
+            return None
+        probabilities = belief.marginals()
+        for index in self._guessed:
+            probabilities[index] = -1
+        cell = int(probabilities.argmax())
+
+        if best is not None and probabilities[cell] < 1:
+            return (SHOOT,) + best
+
+        self._guessed.add(cell)
+        return (GUESS,) + divmod(cell, belief.get_size())
+
+
+# strategies which can be chosen by name from the command line
+STRATEGIES = {
+    "random": RandomStrategy,
+    "information": InformationStrategy,
+}
@@ -0,0 +1,366 @@
+"""
+Terminal - plays Black Box in a terminal, for players without a display of their own (over ssh, say).
+
+Only the game engine is imported - never pygame - so it starts in a fraction of the time Main
+takes to import pygame and open its window (see the cold start benchmark in Benchmark.py):
+
+    python Terminal.py --atoms 4            # full screen, with curses
+    python Terminal.py --atoms 4 --plain    # a line at a time, with ANSI colors
+    python Terminal.py --atoms 4 --edit     # design a puzzle (see Editor)
+
+Full screen, move with the arrow keys (or w, a, s, d) and press space or enter to fire a ray from
+the edge square under the cursor or guess the interior one; q quits. A line at a time, enter the
+row and column of the square to act on. When editing, acting on an interior square adds or
+removes an atom and every edge shows the ray fired from it.
+
+The board is drawn a row of squares to a line. Rays are marked on their edge squares: H for one
+which hit an atom, R for one reflected back out where it came in, and a letter or digit shared by
+the two ends of one which passed through. Guessed squares show O if they hold an atom and x if not.
+"""
+import argparse
+import sys
+
+import BlackBoxGame_Controller as BlackBoxGame
+import Editor
+import Tracer
+
+# the marks of rays which pass through the board, in the order rays are fired - none of them
+# mistakable for the other marks
+EXIT_MARKS = "123456789abcdefghijklmnopqrstuvwyzABCDEFGIJKLMNPQSTUVWXYZ"
+
+HIT_MARK = "H"
+REFLECTION_MARK = "R"
+
+# ANSI escape sequences for the line at a time frontend
+ANSI_RESET = "\x1b[0m"
+ANSI_BOLD = "\x1b[1m"
+ANSI_RED = "\x1b[31m"
+ANSI_GREEN = "\x1b[32m"
+ANSI_YELLOW = "\x1b[33m"
+ANSI_CYAN = "\x1b[36m"
+ANSI_DIM = "\x1b[2m"
+
+# the color each character of the board is drawn in - exit marks are drawn in ANSI_CYAN
+ANSI_COLORS = {
+    HIT_MARK: ANSI_RED,
+    REFLECTION_MARK: ANSI_YELLOW,
+    "O": ANSI_GREEN,
+    "x": ANSI_RED,
+    "-": ANSI_DIM,
+    "|": ANSI_DIM,
+    ".": ANSI_DIM,
+    " ": "",
+}
+
+
+def ray_marks(outcomes):
+    """
+    ray_marks - returns the mark of each edge square a ray has been fired from or left by
+
+    :param outcomes: the origin, outcome and terminus of each ray, in the order they were fired
+    :type outcomes: iterable of tuple(tuple(int, int), String, tuple(int, int))
+    :return: {(row, column): mark}
+    :rtype: dict[tuple(int, int), String]
+    """
+    marks = {}
+    exits = 0
+
+    for origin, outcome, terminus in outcomes:
+        if origin in marks:
+            continue
+
+        if outcome == Tracer.HIT:
+            marks[origin] = HIT_MARK
+        elif outcome == Tracer.REFLECTION:
+            marks[origin] = REFLECTION_MARK
+        else:
+            # a ray from the terminus of an earlier one retraces it, so this one is new
+            marks[origin] = marks[terminus] = EXIT_MARKS[exits % len(EXIT_MARKS)]
+            exits += 1
+
+    return marks
+
+
+def edge_text(marks, row, column, size):
+    """
+    edge_text - returns the character an edge square (or corner) is drawn as
+    """
+    last = size - 1
+    if row in (0, last) and column in (0, last):
+        return " "
+
+    return marks.get((row, column), "-" if row in (0, last) else "|")
+
+
+class GameView():
+    """
+    GameView - a game being played, as the frontends draw and act on it
+    """
+    def __init__(self, game):
+        self._game = game
+        self._size = game.get_board().get_size()
+        self._marks = {}
+
+    def get_size(self):
+        return self._size
+
+    def refresh(self):
+        """
+        refresh - brings the marks of the rays up to date before the board is drawn
+        """
+        game = self._game
+        size = self._size
+        outcomes = []
+        for index in game.get_board().get_originating_rays():
+            origin = divmod(index, size)
+            outcome, terminus, _ = game.get_exit(*origin)
+            outcomes.append((origin, outcome, terminus))
+        self._marks = ray_marks(outcomes)
+
+    def square_text(self, row, column):
+        """
+        square_text - returns the character a square is drawn as
+        """
+        size = self._size
+        if not (0 < row < size - 1 and 0 < column < size - 1):
+            return edge_text(self._marks, row, column, size)
+
+        if [row, column] in self._game.get_guesses():
+            return "O" if self._game.get_board().get_cells()[row * size + column] & Tracer.ATOM else "x"
+
+        return "."
+
+    def act(self, row, column):
+        """
+        act - fires a ray from an edge square or guesses an interior one, as a click does in Main
+
+        :return: a description of what happened for the player
+        :rtype: String
+        """
+        game = self._game
+        last = self._size - 1
+
+        if row in (0, last) and column in (0, last):
+            return "Corners are out of play"
+
+        if row in (0, last) or column in (0, last):
+            game.shoot_ray(row, column)
+            outcome, terminus, _ = game.get_exit(row, column)
+            if outcome == Tracer.HIT:
+                return f"The ray from ({row}, {column}) hit an atom"
+            if outcome == Tracer.REFLECTION:
+                return f"The ray from ({row}, {column}) was reflected"
+            return f"The ray from ({row}, {column}) left at {terminus}"
+
+        if game.guess_atom(row, column):
+            return f"There is an atom at ({row}, {column})"
+        return f"There is no atom at ({row}, {column})"
+
+    def status(self):
+        """
+        status - returns the line shown below the board: the score, or how the game ended
+        """
+        game = self._game
+        if game.get_score() <= 0:
+            return f"Game Over - score {game.get_score()}"
+        if game.atoms_left() == 0:
+            return f"You Win! - score {game.get_score()}"
+
+        return f"Score: {game.get_score()}   Atoms left: {game.atoms_left()}"
+
+    def finished(self):
+        return self._game.get_score() <= 0 or self._game.atoms_left() == 0
+
+    def farewell(self):
+        """
+        farewell - returns what is printed once the frontend has closed, if anything
+        """
+        return None
+
+
+class EditView():
+    """
+    EditView - a puzzle being designed, as the frontends draw and act on it
+    """
+    def __init__(self, editor):
+        """
+        :param editor: the editor of the puzzle's board
+        :type editor: Object(Editor.PuzzleEditor)
+        """
+        self._editor = editor
+        self._size = editor.get_board().get_size()
+        self._marks = {}
+
+    def get_size(self):
+        return self._size
+
+    def refresh(self):
+        outcomes = [(origin, outcome, terminus) for origin, (outcome, terminus) in self._editor.get_outcomes().items()]
+        self._marks = ray_marks(outcomes)
+
+    def square_text(self, row, column):
+        size = self._size
+        if not (0 < row < size - 1 and 0 < column < size - 1):
+            return edge_text(self._marks, row, column, size)
+
+        return "O" if self._editor.get_board().get_board_square((row, column)).is_atom() else "."
+
+    def act(self, row, column):
+        """
+        act - adds or removes the atom of an interior square
+        """
+        size = self._size
+        if not (0 < row < size - 1 and 0 < column < size - 1):
+            return "Atoms go inside the edges"
+
+        retraced = self._editor.toggle_atom(row, column)
+        return f"Toggled ({row}, {column}) - {len(retraced)} rays re-traced"
+
+    def status(self):
+        outcomes = [outcome for outcome, _ in self._editor.get_outcomes().values()]
+
+        return (f"Atoms: {self._editor.get_board().get_atom_count()}   Hits: {outcomes.count(Tracer.HIT)}   "
+                f"Reflections: {outcomes.count(Tracer.REFLECTION)}   Exits: {outcomes.count(Tracer.EXIT)}")
+
+    def finished(self):
+        return False
+
+    def farewell(self):
+        """
+        farewell - returns the atoms of the puzzle, to play it with BlackBoxGame(atom_positions=...)
+        """
+        atoms = sorted(self._editor.get_board().get_atoms())
+
+        return f"{self.status()}\natom_positions = {atoms}"
+
+
+def run_curses(view):
+    """
+    run_curses - runs a view full screen until the player quits
+    """
+    # imported here so that the line at a time frontend works where curses is missing (Windows)
+    import curses
+
+    def run(screen):
+        curses.curs_set(0)
+        size = view.get_size()
+        row, column = 0, 1
+        message = "Arrows move, space acts on the square, q quits"
+        moves = {
+            curses.KEY_UP: (-1, 0), ord("w"): (-1, 0),
+            curses.KEY_DOWN: (1, 0), ord("s"): (1, 0),
+            curses.KEY_LEFT: (0, -1), ord("a"): (0, -1),
+            curses.KEY_RIGHT: (0, 1), ord("d"): (0, 1),
+        }
+
+        while True:
+            screen.erase()
+            view.refresh()
+            for square_row in range(size):
+                for square_column in range(size):
+                    attributes = curses.A_REVERSE if (square_row, square_column) == (row, column) else 0
+                    screen.addstr(square_row, square_column * 2, view.square_text(square_row, square_column),
+                                  attributes)
+            screen.addstr(size + 1, 0, view.status(), curses.A_BOLD)
+            screen.addstr(size + 2, 0, message)
+            screen.refresh()
+
+            key = screen.getch()
+            if key in (ord("q"), ord("Q")):
+                return
+            if view.finished():
+                continue
+
+            if key in moves:
+                row = min(max(row + moves[key][0], 0), size - 1)
+                column = min(max(column + moves[key][1], 0), size - 1)
+            elif key in (ord(" "), ord("\n"), curses.KEY_ENTER):
+                message = view.act(row, column)
+                if view.finished():
+                    message += " - press q to quit"
+
+    curses.wrapper(run)
+    if view.farewell() is not None:
+        print(view.farewell())
+
+
+def draw_plain(view, output, color):
+    """
+    draw_plain - writes the board with row and column numbers, then the status line
+    """
+    size = view.get_size()
+    view.refresh()
+
+    output.write("   " + " ".join(f"{column % 10}" for column in range(size)) + "\n")
+    for row in range(size):
+        squares = [view.square_text(row, column) for column in range(size)]
+        if color:
+            squares = [ANSI_COLORS.get(text, ANSI_CYAN) + text + ANSI_RESET for text in squares]
+        output.write(f"{row:2} {' '.join(squares)}\n")
+
+    line = view.status()
+    output.write((ANSI_BOLD + line + ANSI_RESET if color else line) + "\n")
+
+
+def run_plain(view, input_file=sys.stdin, output=sys.stdout):
+    """
+    run_plain - runs a view a line at a time until the game ends, the player quits or input runs out
+    """
+    color = output.isatty()
+    size = view.get_size()
+
+    while True:
+        draw_plain(view, output, color)
+        if view.finished():
+            break
+
+        output.write("row column (q quits): ")
+        output.flush()
+        line = input_file.readline()
+        if not line or line.strip().lower() in ("q", "quit"):
+            output.write("\n")
+            break
+
+        try:
+            row, column = (int(value) for value in line.replace(",", " ").split())
+        except ValueError:
+            output.write("Enter a row and a column, e.g. 0 3\n")
+            continue
+        if not (0 <= row < size and 0 <= column < size):
+            output.write(f"Rows and columns run from 0 to {size - 1}\n")
+            continue
+
+        output.write(view.act(row, column) + "\n")
+
+    if view.farewell() is not None:
+        output.write(view.farewell() + "\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play Black Box in a terminal.")
+    parser.add_argument("--atoms", type=int, default=4, help="number of atoms on the board")
+    parser.add_argument("--size", type=int, default=10, help="rows (and columns) of the board, edges included")
+    parser.add_argument("--seed", type=int, help="seed the board is drawn from")
+    parser.add_argument("--plain", action="store_true",
+                        help="play a line at a time rather than full screen (always when not at a terminal)")
+    parser.add_argument("--edit", action="store_true", help="design a puzzle, starting from the board drawn")
+    args = parser.parse_args(argv)
+
+    try:
+        game = BlackBoxGame.BlackBoxGame(args.atoms, args.size, seed=args.seed)
+    except ValueError as error:
+        parser.error(str(error))
+
+    if args.edit:
+        view = EditView(Editor.PuzzleEditor(game.get_board(), game))
+    else:
+        view = GameView(game)
+
+    if args.plain or not (sys.stdin.isatty() and sys.stdout.isatty()):
+        run_plain(view)
+    else:
+        run_curses(view)
+
+
+if __name__ == "__main__":
+    main()
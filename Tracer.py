@@ -0,0 +1,298 @@
+"""
+Tracer - the ray tracing engine used by BlackBoxGame.
+
+The rules are the same ones the Ray class encodes with "UP"/"DOWN" strings, but here
+a ray is walked in a single loop over a flat grid of cell flags (indexed by
+row * size + column) with its position and direction kept as small ints, so that
+tracing neither recurses nor creates objects per step.
+"""
+
+# directions - numbered clockwise so that reversing a direction is direction ^ 2
+UP = 0
+RIGHT = 1
+DOWN = 2
+LEFT = 3
+DIRECTION_NAMES = ("UP", "RIGHT", "DOWN", "LEFT")
+
+# flags stored for every cell of the flat grid (SELECTED is only used by the game's display)
+ATOM = 1
+EDGE = 2
+SELECTED = 4
+
+# boards up to this size are traced with trace_mask, larger ones (whose bitboards are too
+# long to shift cheaply at every step) with trace
+BITBOARD_MAX_SIZE = 16
+
+# the possible outcomes of a trace
+HIT = "HIT"
+REFLECTION = "REFLECTION"
+EXIT = "EXIT"
+
+
+def direction_from_name(name):
+    """
+    direction_from_name - converts one of the Ray class's direction strings to its int
+
+    :param name: "UP", "DOWN", "LEFT" or "RIGHT"
+    :type name: String
+    :return: UP, RIGHT, DOWN or LEFT
+    :rtype: int
+    """
+    return DIRECTION_NAMES.index(name)
+
+
+def initial_direction(origin, size):
+    """
+    initial_direction - returns the direction a ray fired from the edge cell origin travels in
+
+    :param origin: flat index of the edge cell the ray is fired from
+    :type origin: int
+    :param size: the number of rows (and columns) of the board
+    :type size: int
+    :return: UP, RIGHT, DOWN or LEFT
+    :rtype: int
+    """
+    row, column = divmod(origin, size)
+
+    if row == 0:
+        return DOWN
+
+    if row == size - 1:
+        return UP
+
+    if column == 0:
+        return RIGHT
+
+    return LEFT
+
+
+def trace(cells, size, origin, position=None, direction=None):
+    """
+    trace - walks a ray fired from origin until it strikes an atom or leaves the board
+
+    The ray starts at position (the origin unless a ray is being resumed part way along) moving
+    in direction (the initial direction for the origin unless given). At every step the cell ahead
+    is checked for an atom or an edge, then the two cells diagonal to it for atoms - on the first
+    move these reflect the ray, otherwise they turn it and it takes one step on its new trajectory.
+
+    :param cells: flat grid of ATOM / EDGE flags
+    :type cells: bytearray
+    :param size: the number of rows (and columns) of the board
+    :type size: int
+    :param origin: flat index of the edge cell the ray was fired from
+    :type origin: int
+    :param position: flat index of the ray's current cell
+    :type position: int
+    :param direction: the ray's current direction
+    :type direction: int
+    :return: (outcome, terminus, path) - outcome is HIT, REFLECTION or EXIT, terminus the index of
+             the atom struck or of the edge cell the ray leaves from, and path the indices of the
+             cells the ray travelled through (ending with the edge cell it leaves from)
+    :rtype: tuple(String, int, list[int])
+    """
+    if position is None:
+        position = origin
+    if direction is None:
+        direction = initial_direction(origin, size)
+
+    # the change in flat index for a step in each direction
+    steps = (-size, 1, size, -1)
+    path = [position]
+
+    while True:
+        step = steps[direction]
+        next_position = position + step
+        flags = cells[next_position]
+
+        if flags & ATOM:
+            return (HIT, next_position, path)
+
+        if flags & EDGE:
+            path.append(next_position)
+            return (REFLECTION if next_position == origin else EXIT, next_position, path)
+
+        # the diagonals of the next cell lie beside it across the direction of travel
+        side = size if direction & 1 else 1
+        ccw_atom = cells[next_position - side] & ATOM
+        cw_atom = cells[next_position + side] & ATOM
+
+        if ccw_atom or cw_atom:
+
+            # atoms diagonal to the first move reflect the ray straight back out
+            if position == origin:
+                return (REFLECTION, origin, path)
+
+            # otherwise the ray turns away from them (or back on itself if both are atoms)
+            if ccw_atom and cw_atom:
+                direction ^= 2
+            elif ccw_atom:
+                direction = DOWN if direction & 1 else RIGHT
+            else:
+                direction = UP if direction & 1 else LEFT
+
+            next_position = position + steps[direction]
+            flags = cells[next_position]
+
+            if flags & ATOM:
+                return (HIT, next_position, path)
+
+            if flags & EDGE:
+                path.append(next_position)
+                return (REFLECTION if next_position == origin else EXIT, next_position, path)
+
+        position = next_position
+        path.append(position)
+
+
+# edge cells of the boards already traced with trace_mask, for each board size
+_edge_cells = {}
+
+
+def edge_cells(size):
+    """
+    edge_cells - returns a flat grid with the EDGE flag set for each edge cell of a board of the given size
+    """
+    cells = _edge_cells.get(size)
+
+    if cells is None:
+        last = size - 1
+        cells = bytearray(size * size)
+        for index in range(size * size):
+            row, column = divmod(index, size)
+            if (row in (0, last)) != (column in (0, last)):
+                cells[index] = EDGE
+        _edge_cells[size] = cells = bytes(cells)
+
+    return cells
+
+
+def trace_mask(atom_mask, size, origin, position=None, direction=None):
+    """
+    trace_mask - trace for a layout given as a bitboard (bit row * size + column set for each atom)
+
+    The cell ahead and both of its diagonals are read with a single shift and mask: shifting the
+    layout down to the ccw diagonal puts it at bit 0, the cell ahead at bit side and the cw
+    diagonal at bit 2 * side.
+
+    :return: (outcome, terminus, path) as for trace
+    :rtype: tuple(String, int, list[int])
+    """
+    if position is None:
+        position = origin
+    if direction is None:
+        direction = initial_direction(origin, size)
+
+    edges = edge_cells(size)
+    steps = (-size, 1, size, -1)
+    # the distance to the diagonals and the bits of the cell ahead and its diagonals after shifting
+    sides = (1, size, 1, size)
+    vertical_window = 0b111
+    horizontal_window = 1 | (1 << size) | (1 << (2 * size))
+    windows = (vertical_window, horizontal_window, vertical_window, horizontal_window)
+    path = [position]
+
+    while True:
+        next_position = position + steps[direction]
+        side = sides[direction]
+        window = (atom_mask >> (next_position - side)) & windows[direction]
+
+        if not window:
+            # nothing ahead or beside it - the ray either leaves the board or moves on
+            if edges[next_position]:
+                path.append(next_position)
+                return (REFLECTION if next_position == origin else EXIT, next_position, path)
+
+            position = next_position
+            path.append(position)
+            continue
+
+        if window >> side & 1:
+            return (HIT, next_position, path)
+
+        # atoms diagonal to the first move reflect the ray straight back out
+        if position == origin:
+            return (REFLECTION, origin, path)
+
+        # otherwise the ray turns away from them (or back on itself if both are atoms)
+        ccw_atom = window & 1
+        cw_atom = window >> side
+        if ccw_atom and cw_atom:
+            direction ^= 2
+        elif ccw_atom:
+            direction = DOWN if direction & 1 else RIGHT
+        else:
+            direction = UP if direction & 1 else LEFT
+
+        next_position = position + steps[direction]
+
+        if atom_mask >> next_position & 1:
+            return (HIT, next_position, path)
+
+        if edges[next_position]:
+            path.append(next_position)
+            return (REFLECTION if next_position == origin else EXIT, next_position, path)
+
+        position = next_position
+        path.append(position)
+
+
+# the signature byte of a ray which strikes an atom
+HIT_CODE = 255
+
+
+def signature(atom_mask, size=10):
+    """
+    signature - returns the outcome of the ray fired from every edge cell of a layout, one byte per
+    edge in row major order: the number of the edge cell the ray leaves by (its own number for a
+    reflection) or HIT_CODE when it strikes an atom
+
+    :param atom_mask: bitboard of the layout (bit row * size + column set for each atom)
+    :type atom_mask: int
+    :rtype: bytes
+    """
+    cells = edge_cells(size)
+    edges = [index for index in range(size * size) if cells[index]]
+    numbers = {index: number for number, index in enumerate(edges)}
+    codes = bytearray(len(edges))
+
+    for number, origin in enumerate(edges):
+        outcome, terminus, _ = trace_mask(atom_mask, size, origin)
+        codes[number] = HIT_CODE if outcome == HIT else numbers[terminus]
+
+    return bytes(codes)
+
+
+def layout_to_mask(layout, size=10):
+    """
+    layout_to_mask - converts an interior layout mask (bit (row - 1) * (size - 2) + (column - 1)
+    set for each atom, as used by the signature tables) to a board bitboard
+
+    :rtype: int
+    """
+    inner = size - 2
+    layout = int(layout)
+    mask = 0
+    while layout:
+        low = layout & -layout
+        row, column = divmod(low.bit_length() - 1, inner)
+        mask |= 1 << ((row + 1) * size + column + 1)
+        layout ^= low
+
+    return mask
+
+
+def mask_to_layout(mask, size=10):
+    """
+    mask_to_layout - converts a board bitboard to an interior layout mask
+
+    :rtype: int
+    """
+    inner = size - 2
+    layout = 0
+    while mask:
+        low = mask & -mask
+        row, column = divmod(low.bit_length() - 1, size)
+        layout |= 1 << ((row - 1) * inner + column - 1)
+        mask ^= low
+
+    return layout
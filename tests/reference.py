@@ -0,0 +1,88 @@
+"""
+reference - the original recursive move_ray and Ray rules, kept as the reference the game's ray
+tracing (and everything built on it) is checked against.
+
+The squares and the ray are reduced to what move_ray reads of them, but every decision is made
+in the same order as the original code on a ten by ten board.
+"""
+SIZE = 10
+
+
+def _is_edge(row, column):
+    if row == 0 or row == 9 or column == 0 or column == 9:
+        return (row, column) not in ((0, 0), (0, 9), (9, 0), (9, 9))
+    return False
+
+
+def _next_location(row, column, direction):
+    if direction == "UP":
+        return (row - 1, column)
+    if direction == "DOWN":
+        return (row + 1, column)
+    if direction == "LEFT":
+        return (row, column - 1)
+    return (row, column + 1)
+
+
+def _diagonals(row, column, direction):
+    next_row, next_column = _next_location(row, column, direction)
+    if direction in ("UP", "DOWN"):
+        return ((next_row, next_column - 1), (next_row, next_column + 1))
+    return ((next_row - 1, next_column), (next_row + 1, next_column))
+
+
+def _recalculate_trajectory(direction, ccw_atom, cw_atom):
+    if cw_atom and ccw_atom:
+        return {"UP": "DOWN", "DOWN": "UP", "LEFT": "RIGHT", "RIGHT": "LEFT"}[direction]
+    if ccw_atom:
+        return "RIGHT" if direction in ("UP", "DOWN") else "DOWN"
+    return "LEFT" if direction in ("UP", "DOWN") else "UP"
+
+
+def _initial_direction(row, column):
+    if row == 0:
+        return "DOWN"
+    if row == 9:
+        return "UP"
+    if column == 0:
+        return "RIGHT"
+    return "LEFT"
+
+
+def shoot(atoms, origin_row, origin_column):
+    """
+    shoot - returns what the original shoot_ray returned for a ray fired on a ten by ten board:
+    None for a hit, otherwise the square the ray left by (its origin for a reflection)
+
+    :param atoms: the (row, column) of every atom
+    :type atoms: set[tuple(int, int)]
+    """
+    origin = (origin_row, origin_column)
+    return _move(atoms, origin, origin, _initial_direction(origin_row, origin_column))
+
+
+def _move(atoms, origin, current, direction):
+    next_location = _next_location(*current, direction)
+
+    # check_for_collision
+    if next_location in atoms:
+        return None
+    if _is_edge(*next_location):
+        return next_location
+
+    ccw_diagonal, cw_diagonal = _diagonals(*current, direction)
+    ccw_atom = ccw_diagonal in atoms
+    cw_atom = cw_diagonal in atoms
+
+    if ccw_atom or cw_atom:
+        if current == origin:
+            return origin
+
+        direction = _recalculate_trajectory(direction, ccw_atom, cw_atom)
+        next_location = _next_location(*current, direction)
+        if next_location in atoms:
+            return None
+        if _is_edge(*next_location):
+            return next_location
+
+    return _move(atoms, origin, next_location, direction)
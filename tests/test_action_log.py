@@ -0,0 +1,105 @@
+import random
+
+import pytest
+
+import ActionLog
+import BlackBoxGame_Controller as BlackBoxGame
+import Editor
+
+
+def played_game(seed, atom_positions=None):
+    rng = random.Random(seed)
+    game = BlackBoxGame.BlackBoxGame(4, 10, atom_positions, seed=None if atom_positions else seed)
+    for _ in range(12):
+        if rng.random() < 0.7:
+            game.shoot_ray(*rng.choice(game.get_board().get_edges()))
+        else:
+            game.guess_atom(rng.randint(1, 8), rng.randint(1, 8))
+
+    return game
+
+
+def test_varints_round_trip():
+    for value in (0, 1, 127, 128, 300, 2 ** 40):
+        buffer = bytearray()
+        ActionLog.write_varint(buffer, value)
+        assert ActionLog.read_varint(buffer, 0) == (value, len(buffer))
+
+
+def test_log_round_trips_through_bytes():
+    log = played_game(1).get_log()
+    copy = ActionLog.ActionLog.from_bytes(log.to_bytes())
+
+    assert list(copy.actions()) == list(log.actions())
+    assert (copy.get_size(), copy.get_atom_count(), copy.get_seed(), copy.get_layout()) == \
+        (log.get_size(), log.get_atom_count(), log.get_seed(), log.get_layout())
+
+
+def test_actions_read_from_a_position_are_those_recorded_since():
+    log = played_game(4).get_log()
+    actions = list(log.actions())
+    end = log.get_end()
+
+    assert list(log.actions(end)) == []
+    log.record(ActionLog.SHOT, 0, 3)
+    log.record(ActionLog.GUESS, 4, 5)
+    # a longer header (a layout recorded after an edit) leaves the position in place
+    log.set_layout(4, 2 ** 60)
+
+    assert list(log.actions(end)) == [(ActionLog.SHOT, 0, 3), (ActionLog.GUESS, 4, 5)]
+    assert list(log.actions()) == actions + [(ActionLog.SHOT, 0, 3), (ActionLog.GUESS, 4, 5)]
+
+
+def test_replay_rebuilds_the_game():
+    for game in (played_game(2), played_game(3, [[1, 1], [4, 5], [8, 8], [2, 7]])):
+        replayed = BlackBoxGame.BlackBoxGame.replay(game.get_log())
+
+        assert replayed.get_score() == game.get_score()
+        assert replayed.atoms_left() == game.atoms_left()
+        assert replayed.get_board().get_atom_mask() == game.get_board().get_atom_mask()
+        assert sorted(replayed.get_board().get_originating_rays()) == sorted(game.get_board().get_originating_rays())
+
+
+def test_replay_rebuilds_an_edited_board():
+    for atom_positions in (None, [[1, 1], [4, 5], [8, 8], [2, 7]]):
+        game = BlackBoxGame.BlackBoxGame(4, 10, atom_positions, seed=5)
+        game.shoot_ray(0, 3)
+        editor = Editor.PuzzleEditor(game.get_board(), game)
+        for row, column in ((3, 3), (4, 5), (6, 2)):
+            editor.toggle_atom(row, column)
+        game.shoot_ray(4, 0)
+
+        log = ActionLog.ActionLog.from_bytes(game.get_log().to_bytes())
+        replayed = BlackBoxGame.BlackBoxGame.replay(log)
+
+        assert log.get_seed() == 5
+        assert replayed.get_board().get_atom_count() == game.get_board().get_atom_count()
+        assert replayed.get_board().get_atom_mask() == game.get_board().get_atom_mask()
+        assert replayed.get_exit(4, 0) == game.get_exit(4, 0)
+
+
+def test_archive_round_trips(tmp_path):
+    path = tmp_path / "games.bbl"
+    games = [played_game(seed) for seed in range(5)]
+    for game in games:
+        ActionLog.append(path, game.get_log())
+
+    assert [log.to_bytes() for log in ActionLog.read_archive(path)] == [game.get_log().to_bytes() for game in games]
+
+
+def test_only_actions_taken_are_logged():
+    game = BlackBoxGame.BlackBoxGame(1, 10, [[4, 4]])
+
+    assert game.shoot_ray(0, 0) is False
+    assert game.shoot_ray(5, 5) is False
+    for row, column in ((-1, 3), (0, 10)):
+        with pytest.raises(IndexError):
+            game.shoot_ray(row, column)
+        with pytest.raises(IndexError):
+            game.guess_atom(row, column)
+    assert len(game.get_log()) == 0
+    assert game.get_score() == 25
+
+    game.shoot_ray(0, 4)
+    game.guess_atom(4, 4)
+    assert list(game.get_log().actions()) == [(ActionLog.SHOT, 0, 4), (ActionLog.GUESS, 4, 4)]
@@ -0,0 +1,37 @@
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import BatchTracer
+
+import reference
+
+
+def random_layouts(count, seed):
+    rng = random.Random(seed)
+    layouts = np.zeros((count, reference.SIZE, reference.SIZE), dtype=bool)
+    for layout in layouts:
+        for cell in rng.sample(range(64), rng.choice((1, 2, 3, 4, 5, 8, 12))):
+            layout[cell // 8 + 1, cell % 8 + 1] = True
+
+    return layouts
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_trace_batch_matches_recursive_move_ray(seed):
+    layouts = random_layouts(100, seed)
+    outcomes, termini = BatchTracer.trace_batch(layouts)
+    origins = BatchTracer.edge_origins(reference.SIZE)
+
+    for layout, board_outcomes, board_termini in zip(layouts, outcomes, termini):
+        atoms = set(zip(*map(list, np.nonzero(layout))))
+        for origin, outcome, terminus in zip(origins, board_outcomes, board_termini):
+            expected = reference.shoot(atoms, *divmod(int(origin), reference.SIZE))
+            if expected is None:
+                assert outcome == BatchTracer.HIT
+            else:
+                assert divmod(int(terminus), reference.SIZE) == expected
+                assert outcome == (BatchTracer.REFLECTION if terminus == origin else BatchTracer.EXIT)
+
@@ -0,0 +1,55 @@
+import pytest
+
+import BlackBoxGame_Controller as BlackBoxGame
+import Board
+
+
+@pytest.mark.parametrize("square", [(0, 10), (10, 0), (-1, 3), (3, -1), (10, 10)])
+def test_squares_off_the_board_are_rejected(square):
+    board = Board.Board(1, 10, [[4, 4]])
+
+    with pytest.raises(IndexError):
+        board.get_board_square(square)
+
+
+def test_shots_off_the_board_do_not_alias_an_edge():
+    game = BlackBoxGame.BlackBoxGame(1, 10, [[4, 4]])
+
+    with pytest.raises(IndexError):
+        game.shoot_ray(0, 10)
+    assert game.get_score() == 25
+    assert not game.get_board().get_originating_rays()
+
+
+def test_corners_and_interior_squares_cannot_be_shot_from():
+    game = BlackBoxGame.BlackBoxGame(1, 10, [[4, 4]])
+
+    assert game.shoot_ray(0, 0) is False
+    assert game.shoot_ray(5, 5) is False
+    assert game.get_score() == 25
+
+
+@pytest.mark.parametrize("atoms, size", [(0, 10), (1, 2), (65, 10), (2, 3)])
+def test_boards_which_cannot_be_built_are_rejected(atoms, size):
+    with pytest.raises(ValueError):
+        Board.Board(atoms, size)
+
+
+@pytest.mark.parametrize("atom_positions", [
+    [[4, 4], [4, 4]],       # the same square twice
+    [[0, 4], [4, 4]],       # an edge
+    [[4, 9], [4, 4]],       # the other edge
+    [[4, 10], [4, 4]],      # off the board
+    [[-1, 4], [4, 4]],      # off the board, below zero
+    [[4, 4]],               # too few
+    [[4, 4], [5, 5], [6, 6]],   # too many
+])
+def test_atom_positions_which_do_not_fit_are_rejected(atom_positions):
+    with pytest.raises(ValueError):
+        Board.Board(2, 10, atom_positions)
+
+
+def test_a_full_board_can_be_built():
+    positions = [[row, column] for row in range(1, 4) for column in range(1, 4)]
+
+    assert Board.Board(9, 5, positions).get_atoms() == positions
@@ -0,0 +1,51 @@
+import random
+
+import pytest
+
+import BlackBoxGame_Controller as BlackBoxGame
+import Editor
+import Tracer
+
+
+def fresh_exits(board):
+    """
+    fresh_exits - returns the outcome of the ray from every edge square, traced from scratch
+    """
+    size = board.get_size()
+    cells = board.get_cells()
+    exits = {}
+    for origin in range(size * size):
+        if Tracer.edge_cells(size)[origin]:
+            outcome, terminus, path = Tracer.trace(cells, size, origin)
+            exits[divmod(origin, size)] = (outcome, divmod(terminus, size), [divmod(cell, size) for cell in path])
+
+    return exits
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_toggles_keep_every_edge_current(seed):
+    rng = random.Random(seed)
+    size = rng.randint(5, 12)
+    game = BlackBoxGame.BlackBoxGame(rng.randint(1, 4), size, seed=seed)
+    board = game.get_board()
+    editor = Editor.PuzzleEditor(board, game)
+
+    for _ in range(25):
+        before = fresh_exits(board)
+        retraced = editor.toggle_atom(rng.randint(1, size - 2), rng.randint(1, size - 2))
+        after = fresh_exits(board)
+
+        assert {square: editor.get_exit(*square) for square in after} == after
+        assert editor.get_outcomes() == {square: exit[:2] for square, exit in after.items()}
+        assert editor.get_signature() == Tracer.signature(board.get_atom_mask(), size)
+        # every edge whose ray changed was re-traced
+        assert {square for square in after if after[square] != before[square]} <= set(retraced)
+        # and the game answers shots with the edited board
+        assert {square: game.get_exit(*square) for square in after} == after
+
+
+def test_atoms_must_be_inside_the_edges():
+    editor = Editor.PuzzleEditor(BlackBoxGame.BlackBoxGame(2, 8, seed=1).get_board())
+
+    with pytest.raises(ValueError):
+        editor.set_atom(0, 3, True)
@@ -0,0 +1,102 @@
+import itertools
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import ActionLog
+import BlackBoxGame_Controller as BlackBoxGame
+import Heatmap
+import SignatureFile
+import SignatureIndex
+import Tracer
+
+SIZE = 6
+ATOMS = 3
+
+
+def brute_force(game):
+    """
+    brute_force - returns the fraction of the layouts consistent with a game's shots and guesses
+    with an atom in each square, found by tracing every layout of the board
+    """
+    shots = {}
+    for kind, row, column in game.get_log().actions():
+        if kind != ActionLog.SHOT:
+            continue
+        outcome, terminus, _ = game.get_exit(row, column)
+        shots[row * SIZE + column] = None if outcome == Tracer.HIT else terminus
+    atoms = game.get_board().get_atom_mask()
+    guesses = {row * SIZE + column: bool(atoms >> (row * SIZE + column) & 1) for row, column in game.get_guesses()}
+
+    interior = [row * SIZE + column for row in range(1, SIZE - 1) for column in range(1, SIZE - 1)]
+    counts = np.zeros(SIZE * SIZE)
+    consistent = 0
+    for cells in itertools.combinations(interior, ATOMS):
+        mask = sum(1 << cell for cell in cells)
+        if any(bool(mask >> cell & 1) != atom for cell, atom in guesses.items()):
+            continue
+        if any(observe(mask, origin) != result for origin, result in shots.items()):
+            continue
+        consistent += 1
+        counts[list(cells)] += 1
+
+    return (counts / consistent).reshape(SIZE, SIZE)
+
+
+def observe(mask, origin):
+    outcome, terminus, _ = Tracer.trace_mask(mask, SIZE, origin)
+
+    return None if outcome == Tracer.HIT else divmod(terminus, SIZE)
+
+
+@pytest.fixture(scope="module")
+def table(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("tables") / "signatures.bbx")
+    SignatureFile.write(SignatureIndex.SignatureIndex.build(ATOMS, SIZE), path)
+    # left open - the beliefs hold views of its mapped keys
+    return SignatureFile.SignatureFile(path)
+
+
+@pytest.fixture(params=["solver", "table"])
+def find_layouts_with(request, table):
+    return False if request.param == "solver" else table
+
+
+@pytest.mark.parametrize("seed", range(8))
+def test_probabilities_are_the_fraction_of_consistent_layouts(seed, find_layouts_with):
+    rng = random.Random(seed)
+    game = BlackBoxGame.BlackBoxGame(ATOMS, SIZE, seed=seed)
+    heatmap = Heatmap.Heatmap(game, sample_size=4096, rng=rng, table=find_layouts_with)
+    edges = [(row, column) for row in range(SIZE) for column in range(SIZE)
+             if Tracer.edge_cells(SIZE)[row * SIZE + column]]
+    interior = [(row, column) for row in range(1, SIZE - 1) for column in range(1, SIZE - 1)]
+
+    for row, column in rng.sample(edges, 4):
+        game.shoot_ray(row, column)
+        heatmap.update()
+
+        assert np.allclose(heatmap.probabilities(), brute_force(game))
+
+    game.guess_atom(*rng.choice(interior))
+    heatmap.update()
+
+    assert heatmap.get_hints().get_belief().is_exact()
+    assert np.allclose(heatmap.probabilities(), brute_force(game))
+
+
+def test_a_wrong_guess_clears_its_square(find_layouts_with):
+    game = BlackBoxGame.BlackBoxGame(ATOMS, SIZE, [[1, 1], [2, 3], [4, 4]])
+    heatmap = Heatmap.Heatmap(game, sample_size=4096, rng=random.Random(0), table=find_layouts_with)
+    game.shoot_ray(0, 2)
+    heatmap.update()
+    before = heatmap.probabilities().copy()
+
+    assert game.guess_atom(3, 2) is False
+    heatmap.update()
+    after = heatmap.probabilities()
+
+    assert before[3, 2] > 0
+    assert after[3, 2] == 0
+    assert np.allclose(after, brute_force(game))
@@ -0,0 +1,63 @@
+import json
+
+import pytest
+
+import BlackBoxGame_Controller as BlackBoxGame
+import Instrumentation
+
+
+@pytest.fixture
+def stats():
+    yield Instrumentation.enable()
+    Instrumentation.disable()
+
+
+def test_traces_are_counted_once_per_edge(stats):
+    game = BlackBoxGame.BlackBoxGame(1, 8, [[3, 3]])
+    # deflected once by the atom at (3, 3), leaving from (2, 0) after 4 steps
+    game.shoot_ray(0, 2)
+    game.shoot_ray(0, 2)
+    # absorbed by it after 2 steps
+    game.shoot_ray(3, 0)
+    game.guess_atom(3, 3)
+
+    snapshot = stats.snapshot()
+
+    assert snapshot["counters"]["rays_traced"] == 2
+    assert snapshot["counters"]["ray_steps"] == 6
+    assert snapshot["counters"]["deflections"] == 1
+    assert snapshot["counters"]["exits"] == 1
+    assert snapshot["counters"]["absorptions"] == 1
+    assert snapshot["counters"].get("reflections", 0) == 0
+    assert snapshot["counters"]["square_lookups"] > 0
+    assert (snapshot["mean_steps_per_ray"], snapshot["max_steps_per_ray"]) == (3, 4)
+    assert snapshot["timings"]["shoot_ray"]["count"] == 3
+    assert snapshot["timings"]["guess_atom"]["count"] == 1
+
+
+def test_reflections_are_counted(stats):
+    game = BlackBoxGame.BlackBoxGame(1, 8, [[1, 3]])
+    game.shoot_ray(0, 2)
+
+    assert stats.snapshot()["counters"]["reflections"] == 1
+
+
+def test_nothing_is_counted_while_off():
+    Instrumentation.disable()
+    game = BlackBoxGame.BlackBoxGame(1, 8, [[3, 3]])
+    game.shoot_ray(0, 2)
+
+    assert Instrumentation.get_stats() is None
+
+
+def test_dumps_append_a_line_each(stats, tmp_path):
+    path = str(tmp_path / "stats.jsonl")
+    stats.increment("rays_traced", 3)
+    stats.dump(path)
+    stats.reset()
+    stats.dump(path)
+
+    with open(path) as dump_file:
+        lines = [json.loads(line) for line in dump_file]
+
+    assert [line["counters"] for line in lines] == [{"rays_traced": 3}, {}]
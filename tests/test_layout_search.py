@@ -0,0 +1,81 @@
+import itertools
+import multiprocessing
+import random
+
+import pytest
+
+import BlackBoxGame_Controller as BlackBoxGame
+import LayoutSearch
+import Tracer
+
+
+def played_game(seed, size):
+    rng = random.Random(seed)
+    game = BlackBoxGame.BlackBoxGame(rng.randint(1, 3), size, seed=seed)
+    edges = game.get_board().get_edges()
+    for _ in range(rng.randint(0, 5)):
+        game.shoot_ray(*rng.choice(edges))
+    for _ in range(rng.randint(0, 2)):
+        game.guess_atom(rng.randint(1, size - 2), rng.randint(1, size - 2))
+
+    return game
+
+
+def brute_force(atom_count, rays, guesses, size):
+    """
+    brute_force - returns every layout agreeing with the observations, in ascending order, by
+    tracing each layout of the board
+    """
+    interior = [row * size + column for row in range(1, size - 1) for column in range(1, size - 1)]
+    found = []
+    for cells in itertools.combinations(interior, atom_count):
+        mask = sum(1 << cell for cell in cells)
+        if any(bool(mask >> (row * size + column) & 1) != atom for row, column, atom in guesses):
+            continue
+        for row, column, result in rays:
+            outcome, terminus, _ = Tracer.trace_mask(mask, size, row * size + column)
+            if (None if outcome == Tracer.HIT else divmod(terminus, size)) != result:
+                break
+        else:
+            found.append(mask)
+
+    return sorted(found)
+
+
+@pytest.mark.parametrize("size", [5, 6])
+@pytest.mark.parametrize("seed", range(15))
+def test_search_finds_every_consistent_layout(seed, size):
+    game = played_game(seed, size)
+    atom_count = game.get_board().get_atom_count()
+    rays, guesses = LayoutSearch.observations(game)
+    expected = brute_force(atom_count, rays, guesses, size)
+
+    assert game.get_board().get_atom_mask() in expected
+    for chunk_size in (1, 7, LayoutSearch.CHUNK_SIZE):
+        assert list(LayoutSearch.search(atom_count, rays, guesses, size, workers=1, chunk_size=chunk_size)) == expected
+    for limit in (0, 1, 2):
+        assert list(LayoutSearch.search(atom_count, rays, guesses, size, workers=1, chunk_size=3,
+                                        limit=limit)) == expected[:limit]
+    assert LayoutSearch.is_ambiguous(atom_count, rays, guesses, size, workers=1) == (len(expected) > 1)
+
+
+def test_a_shared_pool_finds_the_same_layouts():
+    games = [played_game(seed, 6) for seed in range(6)]
+
+    with multiprocessing.Pool(2) as pool:
+        for game in games:
+            atom_count = game.get_board().get_atom_count()
+            rays, guesses = LayoutSearch.observations(game)
+            expected = brute_force(atom_count, rays, guesses, 6)
+
+            assert list(LayoutSearch.search(atom_count, rays, guesses, 6, workers=2, chunk_size=5,
+                                            pool=pool)) == expected
+            assert list(LayoutSearch.search(atom_count, rays, guesses, 6, workers=2, chunk_size=5,
+                                            limit=1, pool=pool)) == expected[:1]
+
+
+def test_contradictions_find_nothing():
+    # a hit from an edge which no layout of one atom can also send out of another edge
+    rays = [(0, 2, None), (0, 2, (2, 0))]
+
+    assert list(LayoutSearch.search(1, rays, size=5, workers=1)) == []
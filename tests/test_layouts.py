@@ -0,0 +1,47 @@
+import math
+import random
+
+import pytest
+
+import Layouts
+import Tracer
+
+
+@pytest.mark.parametrize("atom_count", [1, 2, 3])
+def test_iter_layouts_ranks_every_layout_in_order(atom_count):
+    layouts = list(Layouts.iter_layouts(atom_count, 6))
+
+    assert len(layouts) == math.comb(16, atom_count)
+    assert layouts == sorted(layouts)
+    for position, layout in enumerate(layouts):
+        assert bin(layout).count("1") == atom_count
+        assert Layouts.rank(layout) == position
+        assert Layouts.unrank(position, atom_count, 6) == layout
+
+
+def test_iter_layouts_resumes_from_any_rank():
+    assert list(Layouts.iter_layouts(4, start=1000, stop=1010)) == [Layouts.unrank(position, 4)
+                                                                    for position in range(1000, 1010)]
+
+
+def test_unrank_rejects_ranks_out_of_range():
+    with pytest.raises(ValueError):
+        Layouts.unrank(Layouts.layout_count(2), 2)
+
+
+def test_random_layouts_are_seeded():
+    first = list(Layouts.random_layouts(5, seed=3, count=20))
+
+    assert first == list(Layouts.random_layouts(5, seed=3, count=20))
+    assert all(bin(layout).count("1") == 5 for layout in first)
+
+
+def test_layout_masks_round_trip():
+    rng = random.Random(1)
+    for size in (5, 10, 20):
+        layout = Layouts.random_layout(rng, 4, size)
+        mask = Tracer.layout_to_mask(layout, size)
+
+        assert Tracer.mask_to_layout(mask, size) == layout
+        assert sorted(divmod(bit, size) for bit in range(size * size) if mask >> bit & 1) == \
+            sorted(tuple(position) for position in Layouts.positions(layout, size))
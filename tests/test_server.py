@@ -0,0 +1,43 @@
+import asyncio
+import json
+
+import Server
+
+
+def test_a_failing_command_is_answered_with_an_error():
+    server = Server.GameServer()
+
+    def fail(request, owned):
+        raise RecursionError("maximum recursion depth exceeded")
+
+    server._commands["fail"] = fail
+    try:
+        response = server.handle({"command": "fail", "id": 7}, set())
+    finally:
+        server.get_store().close()
+
+    assert response["ok"] is False
+    assert response["id"] == 7
+
+
+def test_a_deeply_nested_request_leaves_the_connection_open():
+    async def exchange():
+        server = Server.GameServer()
+        listener = await asyncio.start_server(server.serve_connection, Server.DEFAULT_HOST, 0,
+                                              limit=Server.MAX_LINE)
+        port = listener.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection(Server.DEFAULT_HOST, port)
+        try:
+            writer.write(b"[" * (Server.MAX_LINE - 10) + b"\n" + b'{"command": "new", "id": 1}\n')
+            await writer.drain()
+            return [json.loads(await reader.readline()) for _ in range(2)]
+        finally:
+            writer.close()
+            listener.close()
+            await listener.wait_closed()
+            server.get_store().close()
+
+    nested, new = asyncio.run(exchange())
+
+    assert nested == {"ok": False, "error": "requests must be JSON"}
+    assert new["ok"] is True and new["id"] == 1
@@ -0,0 +1,35 @@
+import ActionLog
+import BlackBoxGame_Controller as BlackBoxGame
+import SessionStore
+
+
+def test_evicted_games_come_back_with_their_logs():
+    store = SessionStore.SessionStore(live_limit=2)
+    games = {}
+    try:
+        for session in range(6):
+            game = BlackBoxGame.BlackBoxGame(4, 10, seed=session)
+            game.shoot_ray(0, 3)
+            game.shoot_ray(4, 0)
+            game.guess_atom(5, 5)
+            games[session] = (game.snapshot(), game.get_log().to_bytes())
+            store.add(session, game)
+        assert store.evicted_count() == 4
+
+        for session, (snapshot, log) in games.items():
+            game = store.get(session)
+            assert game.snapshot() == snapshot
+            assert game.get_log().to_bytes() == log
+            assert [kind for kind, _, _ in game.get_log().actions()] == [ActionLog.SHOT, ActionLog.SHOT,
+                                                                         ActionLog.GUESS]
+    finally:
+        store.close()
+
+
+def test_records_hold_a_game_played_until_it_is_lost():
+    game = BlackBoxGame.BlackBoxGame(4, 10, seed=1)
+    while game.get_score() > 0:
+        game.guess_atom(1, 1)
+        game.shoot_ray(0, 1)
+
+    assert len(game.snapshot()) + SessionStore.RECORD_LENGTH.size <= SessionStore.record_size(10)
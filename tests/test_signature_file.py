@@ -0,0 +1,120 @@
+import os
+import random
+import sys
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import SignatureFile
+import SignatureIndex
+import Tracer
+
+
+@pytest.fixture(scope="module")
+def index():
+    return SignatureIndex.SignatureIndex.build(2, 5)
+
+
+@pytest.fixture
+def path(index, tmp_path):
+    path = str(tmp_path / "signatures-5x5-2.bbx")
+    SignatureFile.write(index, path)
+
+    return path
+
+
+def test_columns_view_the_keys_a_column_per_edge(index, path):
+    with SignatureFile.SignatureFile(path) as table:
+        keys, layouts = table.columns()
+
+        assert np.array_equal(keys, index.get_signatures())
+        assert np.array_equal(layouts, index.get_layouts())
+        assert keys[:, 3].flags["C_CONTIGUOUS"]
+        # the views must go before the file they map can be closed
+        del keys, layouts
+
+
+def test_version_1_files_are_still_read(index, path):
+    # a version 1 file is the same header and records without the key columns after them
+    with open(path, "rb") as table:
+        data = bytearray(table.read())
+    data[8:10] = (1).to_bytes(2, "little")
+    del data[SignatureFile.HEADER.size + len(index) * (index.get_signatures().shape[1] + SignatureFile.LAYOUT.size):]
+    with open(path, "wb") as table:
+        table.write(data)
+
+    with SignatureFile.SignatureFile(path) as table:
+        keys, layouts = table.columns()
+        signature = bytes(index.get_signatures()[5])
+
+        assert np.array_equal(keys, index.get_signatures())
+        assert table.lookup(signature) == [int(layout) for layout in index.lookup(signature)]
+        del keys, layouts
+
+
+def test_lookup_and_count_match_the_index(index, path):
+    with SignatureFile.SignatureFile(path) as table:
+        assert (len(table), table.get_size(), table.get_atom_count()) == (len(index), 5, 2)
+        for signature in {bytes(signature) for signature in index.get_signatures()}:
+            layouts = sorted(int(layout) for layout in index.lookup(signature))
+
+            assert sorted(table.lookup(signature)) == layouts
+            assert table.count(signature) == len(layouts)
+        assert table.lookup(bytes(12)) == []
+
+
+def test_ambiguity_counts_the_layouts_sharing_a_signature(index, path):
+    with SignatureFile.SignatureFile(path) as table:
+        for layout, signature in zip(index.get_layouts(), index.get_signatures()):
+            assert table.ambiguity(Tracer.layout_to_mask(int(layout), 5)) == len(index.lookup(bytes(signature)))
+
+
+@pytest.mark.parametrize("numpy_available", [True, False])
+def test_candidates_match_the_index(index, path, monkeypatch, numpy_available):
+    if not numpy_available:
+        monkeypatch.setitem(sys.modules, "numpy", None)
+    rng = random.Random(9)
+    edges = [divmod(origin, 5) for origin in range(25) if Tracer.edge_cells(5)[origin]]
+
+    with SignatureFile.SignatureFile(path) as table:
+        for _ in range(20):
+            mask = Tracer.layout_to_mask(int(rng.choice(index.get_layouts())), 5)
+            observations = {}
+            for row, column in rng.sample(edges, rng.randint(1, 4)):
+                outcome, terminus, _ = Tracer.trace_mask(mask, 5, row * 5 + column)
+                observations[(row, column)] = None if outcome == Tracer.HIT else divmod(terminus, 5)
+
+            assert sorted(table.candidates(observations)) == sorted(int(layout) for layout in index.match(observations))
+
+
+def test_open_table_opens_a_built_table_once(index, tmp_path, monkeypatch):
+    monkeypatch.setattr(SignatureFile, "_open_tables", {})
+    directory = str(tmp_path)
+
+    assert SignatureFile.open_table(2, 5, directory) is None
+    SignatureFile._open_tables.clear()
+    SignatureFile.write(index, SignatureFile.table_path(2, 5, directory))
+    table = SignatureFile.open_table(2, 5, directory)
+
+    assert table.get_path() == SignatureFile.table_path(2, 5, directory)
+    assert SignatureFile.open_table(2, 5, directory) is table
+    table.close()
+
+
+@pytest.mark.parametrize("version", [2, SignatureFile.VERSION + 1])
+def test_other_versions_are_refused(path, version):
+    with open(path, "r+b") as table:
+        table.seek(8)
+        table.write(version.to_bytes(2, "little"))
+
+    with pytest.raises(ValueError):
+        SignatureFile.SignatureFile(path)
+
+
+def test_truncated_files_are_refused(path):
+    with open(path, "r+b") as table:
+        table.truncate(os.path.getsize(path) - 1)
+
+    with pytest.raises(ValueError):
+        SignatureFile.SignatureFile(path)
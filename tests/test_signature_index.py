@@ -0,0 +1,65 @@
+import itertools
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import BatchTracer
+import SignatureIndex
+import Tracer
+
+
+@pytest.fixture(scope="module")
+def index():
+    return SignatureIndex.SignatureIndex.build(2, 5)
+
+
+def test_every_layout_is_indexed_by_its_signature(index):
+    layouts = [int(layout) for layout in index.get_layouts()]
+
+    assert sorted(layouts) == sorted(sum(1 << cell for cell in cells) for cells in itertools.combinations(range(9), 2))
+    for layout, signature in zip(layouts, index.get_signatures()):
+        assert bytes(signature) == Tracer.signature(Tracer.layout_to_mask(layout, 5), 5)
+
+
+def test_lookup_and_ambiguity_agree_with_the_signatures(index):
+    by_signature = {}
+    for layout, signature in zip(index.get_layouts(), index.get_signatures()):
+        by_signature.setdefault(bytes(signature), []).append(int(layout))
+
+    assert index.distinct_signatures() == len(by_signature)
+    for signature, layouts in by_signature.items():
+        assert sorted(int(layout) for layout in index.lookup(signature)) == sorted(layouts)
+    assert sorted(int(layout) for layout in index.ambiguous_layouts()) == \
+        sorted(layout for layouts in by_signature.values() if len(layouts) > 1 for layout in layouts)
+    assert sum(size * count for size, count in index.ambiguity_histogram().items()) == len(index)
+
+
+def observe(layout, origins):
+    mask = Tracer.layout_to_mask(layout, 5)
+    observations = {}
+    for row, column in origins:
+        outcome, terminus, _ = Tracer.trace_mask(mask, 5, row * 5 + column)
+        observations[(row, column)] = None if outcome == Tracer.HIT else divmod(terminus, 5)
+    return observations
+
+
+def test_match_keeps_the_layouts_consistent_with_some_rays(index):
+    rng = random.Random(4)
+    layouts = [int(layout) for layout in index.get_layouts()]
+    edges = [divmod(int(origin), 5) for origin in BatchTracer.edge_origins(5)]
+    for _ in range(20):
+        observations = observe(rng.choice(layouts), rng.sample(edges, rng.randint(1, 4)))
+        expected = [layout for layout in layouts if observe(layout, observations) == observations]
+
+        assert sorted(int(layout) for layout in index.match(observations)) == sorted(expected)
+
+
+def test_edge_and_interior_numberings():
+    origins = BatchTracer.edge_origins(5)
+    numbers = BatchTracer.edge_numbers(5)
+
+    assert list(numbers[origins]) == list(range(len(origins)))
+    assert (numbers >= 0).sum() == len(origins) == 12
+    assert list(BatchTracer.interior_cells(5)) == [row * 5 + column for row in range(1, 4) for column in range(1, 4)]
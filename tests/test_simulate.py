@@ -0,0 +1,42 @@
+import pytest
+
+import Simulate
+import Strategies
+
+# the statistics of a run which do not depend on how long it took or how many workers played it
+TOTALS = ("games", "wins", "score", "rays_per_game", "guesses_per_game")
+
+
+@pytest.mark.parametrize("strategy", ["random", "information"])
+def test_a_seeded_run_gives_the_same_totals_across_workers(strategy):
+    single = Simulate.simulate(24, 3, 8, strategy, workers=1, seed=5, chunk_size=5)
+    double = Simulate.simulate(24, 3, 8, strategy, workers=2, seed=5, chunk_size=5)
+
+    assert {key: single[key] for key in TOTALS} == {key: double[key] for key in TOTALS}
+    assert sum(single["score"]["histogram"].values()) == 24
+
+
+def test_a_different_seed_plays_different_games():
+    first = Simulate.simulate(24, 3, 8, workers=1, seed=5, chunk_size=5)
+    second = Simulate.simulate(24, 3, 8, workers=1, seed=6, chunk_size=5)
+
+    assert first["score"] != second["score"]
+
+
+def test_strategies_must_choose_actions():
+    class Idle(Strategies.Strategy):
+        pass
+
+    with pytest.raises(TypeError):
+        Idle()
+
+
+@pytest.mark.parametrize("games, chunk_size", [(0, 5), (5, 0)])
+def test_empty_runs_are_refused(games, chunk_size):
+    with pytest.raises(ValueError):
+        Simulate.simulate(games, 3, 8, workers=1, chunk_size=chunk_size)
+
+
+def test_unknown_strategies_are_refused():
+    with pytest.raises(ValueError):
+        Simulate.simulate(5, 3, 8, "nobody", workers=1)
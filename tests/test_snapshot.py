@@ -0,0 +1,77 @@
+import random
+
+import pytest
+
+import BlackBoxGame_Controller as BlackBoxGame
+
+
+def played_game(seed, size=10, atoms=4):
+    rng = random.Random(seed)
+    game = BlackBoxGame.BlackBoxGame(atoms, size, seed=seed)
+    for row, column in rng.sample(game.get_board().get_edges(), 6):
+        game.shoot_ray(row, column)
+    for _ in range(2):
+        game.guess_atom(rng.randint(1, size - 2), rng.randint(1, size - 2))
+    game.get_board().get_board_square((2, 3)).toggle_selected()
+
+    return game
+
+
+def state(game):
+    board = game.get_board()
+    size = board.get_size()
+    rays = {index: (ray.get_terminal_location(), ray.get_color())
+            for index, ray in board.get_originating_rays().items()}
+
+    return (game.get_score(), game.atoms_left(), board.get_atom_mask(),
+            [board.get_board_square(divmod(index, size)).is_selected() for index in range(size * size)],
+            rays, game.get_seed())
+
+
+@pytest.mark.parametrize("seed,size", [(seed, 10) for seed in range(10)] + [(1, 20), (2, 300)])
+def test_snapshot_round_trips(seed, size):
+    game = played_game(seed, size)
+    data = game.snapshot()
+    restored = BlackBoxGame.BlackBoxGame.restore(data)
+
+    assert state(restored) == state(game)
+    assert restored.snapshot() == data
+    assert len(data) == BlackBoxGame.snapshot_size(size, len(game.get_guesses()),
+                                                   len(game.get_board().get_originating_rays()),
+                                                   len(game.get_log().to_bytes()))
+
+
+def test_restore_keeps_the_log():
+    game = played_game(4)
+    restored = BlackBoxGame.BlackBoxGame.restore(game.snapshot())
+
+    assert restored.get_log().to_bytes() == game.get_log().to_bytes()
+    assert len(restored.get_log()) == len(game.get_log()) == 8
+    assert state(BlackBoxGame.BlackBoxGame.replay(restored.get_log()))[:3] == state(game)[:3]
+
+
+def test_restored_game_plays_on_identically():
+    game = played_game(3)
+    restored = BlackBoxGame.BlackBoxGame.restore(game.snapshot())
+
+    for row, column in game.get_board().get_edges():
+        assert restored.shoot_ray(row, column) == game.shoot_ray(row, column)
+    assert state(restored) == state(game)
+
+
+def test_restore_rejects_other_versions():
+    data = bytearray(played_game(0).snapshot())
+    data[0] += 1
+
+    with pytest.raises(ValueError):
+        BlackBoxGame.BlackBoxGame.restore(bytes(data))
+
+
+def test_snapshot_sizes_are_as_documented():
+    game = BlackBoxGame.BlackBoxGame(4, 10, seed=2 ** 62)
+    fresh = len(game.snapshot())
+    for row, column in game.get_board().get_edges()[:12]:
+        game.shoot_ray(row, column)
+
+    assert fresh <= 55
+    assert 12 * 6 <= len(game.snapshot()) - fresh <= 12 * 7
@@ -0,0 +1,91 @@
+import itertools
+import random
+
+import pytest
+
+import BlackBoxGame_Controller as BlackBoxGame
+import Solver
+import Tracer
+
+
+def brute_force(atom_count, size, rays, guesses):
+    """
+    brute_force - every layout of atom_count atoms, traced ray by ray
+    """
+    interior = [row * size + column for row in range(1, size - 1) for column in range(1, size - 1)]
+    found = []
+    for cells in itertools.combinations(interior, atom_count):
+        mask = sum(1 << cell for cell in cells)
+        if any(bool(mask >> (row * size + column) & 1) != result for row, column, result in guesses):
+            continue
+
+        for row, column, result in rays:
+            outcome, terminus, _ = Tracer.trace_mask(mask, size, row * size + column)
+            if (None if outcome == Tracer.HIT else divmod(terminus, size)) != result:
+                break
+        else:
+            found.append(mask)
+
+    return sorted(found)
+
+
+@pytest.mark.parametrize("seed", range(25))
+def test_solutions_match_brute_force(seed):
+    rng = random.Random(seed)
+    atom_count = rng.choice((1, 2, 3))
+    size = 6
+    interior = [row * size + column for row in range(1, size - 1) for column in range(1, size - 1)]
+    atoms = sum(1 << cell for cell in rng.sample(interior, atom_count))
+    edges = [(row, column) for row in range(size) for column in range(size)
+             if (row in (0, size - 1)) != (column in (0, size - 1))]
+
+    rays = []
+    for row, column in rng.sample(edges, rng.randint(1, 6)):
+        outcome, terminus, _ = Tracer.trace_mask(atoms, size, row * size + column)
+        rays.append((row, column, None if outcome == Tracer.HIT else divmod(terminus, size)))
+    guesses = [(row, column, bool(atoms >> (row * size + column) & 1))
+               for row, column in ((rng.randint(1, 4), rng.randint(1, 4)) for _ in range(rng.randint(0, 2)))]
+
+    solver = Solver.Solver(atom_count, size)
+    for ray in rays:
+        solver.add_ray(*ray)
+    for guess in guesses:
+        solver.add_guess(*guess)
+
+    solutions = sorted(solver.solutions())
+    assert solutions == brute_force(atom_count, size, rays, guesses)
+    assert solver.count() == len(solutions)
+    assert atoms in solutions
+
+
+def test_contradictory_guesses_raise():
+    solver = Solver.Solver(1)
+    solver.add_guess(3, 3, True)
+
+    with pytest.raises(Solver.Contradiction):
+        solver.add_guess(3, 3, False)
+
+
+@pytest.mark.parametrize("seed", range(15))
+def test_partitions_narrowed_between_observations_match_a_fresh_search(seed):
+    rng = random.Random(seed)
+    atom_count = rng.choice((2, 3, 4))
+    game = BlackBoxGame.BlackBoxGame(atom_count, 8, seed=seed)
+    solver = Solver.Solver(atom_count, 8)
+    observations = []
+
+    for _ in range(6):
+        if rng.random() < 0.75:
+            row, column = rng.choice(game.get_board().get_edges())
+            observations.append(("ray", row, column, game.shoot_ray(row, column)))
+            solver.add_ray(row, column, observations[-1][3])
+        else:
+            row, column = rng.randint(1, 6), rng.randint(1, 6)
+            observations.append(("guess", row, column, game.guess_atom(row, column)))
+            solver.add_guess(row, column, observations[-1][3])
+
+        fresh = Solver.Solver(atom_count, 8)
+        for kind, row, column, result in observations:
+            (fresh.add_ray if kind == "ray" else fresh.add_guess)(row, column, result)
+        assert sorted(solver.solutions()) == sorted(fresh.solutions())
+        assert solver.count() == fresh.count()
@@ -0,0 +1,50 @@
+import random
+
+import pytest
+
+import Board
+import SparseBoard
+import Tracer
+
+
+def random_board(seed):
+    rng = random.Random(seed)
+    size = rng.randint(4, 14)
+    atom_count = rng.randint(1, min(12, (size - 2) ** 2))
+
+    return SparseBoard.SparseBoard.random(size, atom_count, rng)
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_trace_matches_tracer(seed):
+    sparse = random_board(seed)
+    size = sparse.get_size()
+    cells = Board.Board(sparse.get_atom_count(), size, sparse.get_atoms()).get_cells()
+
+    for origin in range(size * size):
+        if not Tracer.edge_cells(size)[origin]:
+            continue
+        expected = Tracer.trace(cells, size, origin)
+        outcome, terminus, turns = sparse.trace(origin, full_path=False)
+
+        assert sparse.trace(origin) == expected
+        assert (outcome, terminus, sparse.expand_path(turns)) == expected
+        assert sparse.path_length(turns) == len(expected[2])
+
+
+def test_moving_atoms_keeps_the_index_in_step():
+    rng = random.Random(7)
+    sparse = SparseBoard.SparseBoard(8)
+    for _ in range(200):
+        row, column = rng.randint(1, 6), rng.randint(1, 6)
+        sparse.set_atom(row, column, not sparse.is_atom(row, column))
+    cells = Board.Board(sparse.get_atom_count(), 8, sparse.get_atoms()).get_cells()
+
+    for origin in range(64):
+        if Tracer.edge_cells(8)[origin]:
+            assert sparse.trace(origin) == Tracer.trace(cells, 8, origin)
+
+
+def test_atoms_must_be_inside_the_edges():
+    with pytest.raises(ValueError):
+        SparseBoard.SparseBoard(8, [(0, 3)])
@@ -0,0 +1,72 @@
+import random
+
+import pytest
+
+import BlackBoxGame_Controller as BlackBoxGame
+import Board
+import Tracer
+
+import reference
+
+
+def edges(size=10):
+    """
+    edges - the (row, column) of every edge square of a board, corners excluded
+    """
+    last = size - 1
+    return [(row, column) for row in range(size) for column in range(size)
+            if (row in (0, last)) != (column in (0, last))]
+
+
+def random_game(seed):
+    random.seed(seed)
+    return BlackBoxGame.BlackBoxGame(random.choice((1, 2, 3, 4, 5, 8, 12)))
+
+
+@pytest.mark.parametrize("seed", range(300))
+def test_shoot_ray_matches_recursive_move_ray(seed):
+    game = random_game(seed)
+    atoms = {tuple(atom) for atom in game.get_board().get_atoms()}
+
+    for row, column in edges():
+        assert game.shoot_ray(row, column) == reference.shoot(atoms, row, column)
+
+
+@pytest.mark.parametrize("seed", range(300, 400))
+def test_trace_matches_recursive_move_ray(seed):
+    board = random_game(seed).get_board()
+    atoms = {tuple(atom) for atom in board.get_atoms()}
+
+    for row, column in edges():
+        origin = row * 10 + column
+        outcome, terminus, _ = Tracer.trace(board.get_cells(), 10, origin)
+
+        expected = reference.shoot(atoms, row, column)
+        if expected is None:
+            assert outcome == Tracer.HIT
+        else:
+            assert terminus == expected[0] * 10 + expected[1]
+            assert outcome == (Tracer.REFLECTION if terminus == origin else Tracer.EXIT)
+
+
+@pytest.mark.parametrize("seed", range(400, 500))
+def test_trace_mask_matches_trace(seed):
+    board = random_game(seed).get_board()
+
+    for row, column in board.get_edges():
+        origin = row * 10 + column
+        assert Tracer.trace_mask(board.get_atom_mask(), 10, origin) == Tracer.trace(board.get_cells(), 10, origin)
+
+
+def test_reflection_before_first_step():
+    # an atom diagonal to the first step reflects the ray straight back out
+    board = Board.Board(1, 10, [[1, 4]])
+
+    assert Tracer.trace_mask(board.get_atom_mask(), 10, 3)[:2] == (Tracer.REFLECTION, 3)
+    assert Tracer.trace(board.get_cells(), 10, 3)[:2] == (Tracer.REFLECTION, 3)
+
+
+def test_large_boards_do_not_recurse():
+    board = Board.Board(1, 2000, [[1000, 1000]])
+
+    assert Tracer.trace(board.get_cells(), 2000, 500)[:2] == (Tracer.EXIT, 1999 * 2000 + 500)